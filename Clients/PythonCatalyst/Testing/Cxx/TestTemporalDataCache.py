@@ -0,0 +1,126 @@
+from paraview import coprocessing, servermanager
+import os, sys, tempfile
+
+# Tests the memory budgeted temporal cache of CreateTemporalProducer(), to be
+# run with waveletdriver.py for 6 timesteps. The budget only fits the newest
+# output, so every older output gets compressed and spilled to disk.
+MAXTIMES = 4
+spilldirectory = tempfile.mkdtemp()
+ranges = {}
+
+def Error(message):
+  print('ERROR: %s' % message)
+  sys.exit(1)
+
+# ----------------------- CoProcessor definition -----------------------
+def CreateCoProcessor():
+  def _CreatePipeline(coprocessor, datadescription):
+    class Pipeline:
+      grid = datadescription.GetInputDescriptionByName("input").GetGrid()
+      Wavelet1 = coprocessor.CreateTemporalProducer(
+        datadescription, "input", maxbytes=grid.GetActualMemorySize() * 1024,
+        maxtimes=MAXTIMES, compress=True, spilldirectory=spilldirectory)
+    return Pipeline()
+
+  class CoProcessor(coprocessing.CoProcessor):
+    def CreatePipeline(self, datadescription):
+      self.Pipeline = _CreatePipeline(self, datadescription)
+
+  coprocessor = CoProcessor()
+  freqs = {'input': [1]}
+  coprocessor.SetUpdateFrequencies(freqs)
+  return coprocessor
+
+coprocessor = CreateCoProcessor()
+coprocessor.EnableLiveVisualization(False, 1)
+
+# ------------------- Checks of the cache on its own -------------------
+def CheckCompressedInMemory():
+  """An output that compresses well is kept in memory once compressed and
+  an output that does not fit is discarded without a spill directory."""
+  import numpy
+  from vtkmodules.vtkCommonDataModel import vtkImageData
+  from vtkmodules.util.numpy_support import numpy_to_vtk
+  image = vtkImageData()
+  image.SetDimensions(64, 64, 64)
+  array = numpy_to_vtk(numpy.zeros(64 * 64 * 64), deep=1)
+  array.SetName("zeros")
+  image.GetPointData().AddArray(array)
+  size = image.GetActualMemorySize() * 1024
+
+  cache = coprocessing.TemporalDataCache(2 * size - 1)
+  cache.Add(0.0, image)
+  cache.Add(1.0, image)
+  stats = cache.Statistics
+  if cache.GetTimes() != [0.0, 1.0] or stats['serializations'] != 1 or \
+     stats['spills'] != 0 or cache.GetMemoryUsage() > 2 * size - 1:
+    Error('compressed output not kept in memory: %s' % stats)
+  restored = cache.Get(0.0)
+  if restored.GetNumberOfPoints() != image.GetNumberOfPoints() or \
+     restored.GetPointData().GetArray("zeros").GetRange() != (0.0, 0.0):
+    Error('compressed output not restored')
+
+  cache = coprocessing.TemporalDataCache(size, compress=False)
+  cache.Add(0.0, image)
+  cache.Add(1.0, image)
+  if cache.GetTimes() != [1.0] or cache.GetMemoryUsage() != size:
+    Error('output over budget not discarded: %s' % cache.GetTimes())
+
+# ---------------------- Data Selection method ----------------------
+
+def RequestDataDescription(datadescription):
+    "Callback to populate the request for current timestep"
+    global coprocessor
+    if datadescription.GetForceOutput() == True:
+        for i in range(datadescription.GetNumberOfInputDescriptions()):
+            datadescription.GetInputDescription(i).AllFieldsOn()
+            datadescription.GetInputDescription(i).GenerateMeshOn()
+        return
+
+    coprocessor.LoadRequestedData(datadescription)
+
+# ------------------------ Processing method ------------------------
+
+def DoCoProcessing(datadescription):
+    "Callback to do co-processing for current timestep"
+    global coprocessor
+    timestep = datadescription.GetTimeStep()
+    time = datadescription.GetTime()
+    print("Timestep: %d Time: %f" % (timestep, time))
+
+    coprocessor.UpdateProducers(datadescription)
+    producer = coprocessor.Pipeline.Wavelet1
+    cache = producer.cpTemporalCache
+
+    grid = servermanager.Fetch(producer)
+    ranges[time] = grid.GetPointData().GetArray("RTData").GetRange()
+
+    times = cache.GetTimes()
+    if len(times) != min(timestep + 1, MAXTIMES) or times[-1] != time:
+      Error('cached times %s at step %d' % (times, timestep))
+    if cache.GetMemoryUsage() > cache.MaximumBytes:
+      Error('%d bytes cached for a budget of %d' %
+            (cache.GetMemoryUsage(), cache.MaximumBytes))
+    stats = cache.Statistics
+    if stats['serializations'] != timestep or stats['spills'] != timestep:
+      Error('older outputs not compressed and spilled: %s' % stats)
+    if len(os.listdir(spilldirectory)) != len(times) - 1:
+      Error('spilled files %s for times %s' % (os.listdir(spilldirectory), times))
+
+    # ex post facto processing of all the cached timesteps
+    for t in times[:-1]:
+      if not coprocessor.LoadTemporalData(producer, t):
+        Error('time %f not loaded' % t)
+      loaded = servermanager.Fetch(producer)
+      if loaded.GetPointData().GetArray("RTData").GetRange() != ranges[t]:
+        Error('time %f not restored' % t)
+    evicted = [t for t in ranges if t not in times]
+    if evicted and coprocessor.LoadTemporalData(producer, evicted[0]):
+      Error('evicted time %f loaded' % evicted[0])
+
+    if timestep == 5:
+      CheckCompressedInMemory()
+      cache.Clear()
+      if os.listdir(spilldirectory):
+        Error('spilled files left after Clear()')
+      os.rmdir(spilldirectory)
@@ -1,4 +1,5 @@
 coProcessor = None
+adaptor = None
 
 def initialize():
     global coProcessor
@@ -44,28 +45,22 @@ def addscript(name):
     coProcessor.AddPipeline(pipeline)
 
 def coprocess(time, timeStep, grid, attributes):
-    global coProcessor
-    import vtk
+    global coProcessor, adaptor
     from paraview.modules import vtkPVCatalyst as catalyst
-    import paraview
-    from paraview.vtk.util import numpy_support
+    from paraview import cpadaptor
     dataDescription = catalyst.vtkCPDataDescription()
     dataDescription.SetTimeData(time, timeStep)
     dataDescription.AddInput("input")
 
     if coProcessor.RequestDataDescription(dataDescription):
-        import fedatastructures
-        imageData = vtk.vtkImageData()
-        imageData.SetExtent(grid.XStartPoint, grid.XEndPoint, 0, grid.NumberOfYPoints-1, 0, grid.NumberOfZPoints-1)
-        imageData.SetSpacing(grid.Spacing)
-
-        velocity = numpy_support.numpy_to_vtk(attributes.Velocity)
-        velocity.SetName("velocity")
-        imageData.GetPointData().AddArray(velocity)
-
-        pressure = numpy_support.numpy_to_vtk(attributes.Pressure)
-        pressure.SetName("pressure")
-        imageData.GetCellData().AddArray(pressure)
-        dataDescription.GetInputDescriptionByName("input").SetGrid(imageData)
-        dataDescription.GetInputDescriptionByName("input").SetWholeExtent(0, grid.NumberOfGlobalXPoints-1, 0, grid.NumberOfYPoints-1, 0, grid.NumberOfZPoints-1)
-        coProcessor.CoProcess(dataDescription)
+        # the adaptor keeps the grid across timesteps and shares the memory
+        # of the simulation arrays instead of copying them.
+        if not adaptor:
+            adaptor = cpadaptor.ImageDataAdaptor("input")
+        adaptor.SetGeometry((grid.XStartPoint, grid.XEndPoint, 0, grid.NumberOfYPoints-1, 0, grid.NumberOfZPoints-1),
+                            (0, grid.NumberOfGlobalXPoints-1, 0, grid.NumberOfYPoints-1, 0, grid.NumberOfZPoints-1),
+                            spacing=grid.Spacing)
+        adaptor.SetPointArray("velocity", attributes.Velocity)
+        adaptor.SetCellArray("pressure", attributes.Pressure)
+        if adaptor.Attach(dataDescription):
+            coProcessor.CoProcess(dataDescription)
@@ -57,10 +57,10 @@ class pftools:
         The result is a matrix; each row corresponds to a top-surface cell
         and each column holds a cell's k-, j-, and i-indices, respectively.
         """
-        itop = np.array([(top[i,j], j, i) \
-            for i in range(top.shape[0]) \
-                for j in range(top.shape[1]) \
-                    if top[i,j] >= 0])
+        # np.nonzero visits entries in the same (row-major) order as
+        # looping over the rows and then the columns of "top" would:
+        ii, jj = np.nonzero(top >= 0)
+        itop = np.column_stack((top[ii, jj], jj, ii))
         return itop
 
     @staticmethod
@@ -100,9 +100,14 @@ class pftools:
         return sbs
 
     @staticmethod
-    def computeSurfaceRunoff(top, xx, pressure, slope, mannings):
+    def computeSurfaceRunoff(top, xx, pressure, slope, mannings, halo=None):
         """Compute surface runoff (water leaving the domain boundary
-        or flowing into a masked area)"""
+        or flowing into a masked area)
+
+        If given, halo is the "top" surface grown by one cell on each
+        side; it holds the top of neighbouring columns that belong to
+        other ranks. Otherwise, the cells around "top" are taken to be
+        outside of the domain."""
         def addToRunoff(runoff, sro, top, slope, pressure, mannings, delta):
             """Given a truthy 2-d array (idx) of places where runoff occurs,
             compute the runoff and add it to the total (sro).
@@ -127,22 +132,23 @@ class pftools:
         tk = np.reshape(top, sz)
         tj = np.floor(np.arange(sz)/top.shape[1]).astype(int)
         ti = np.arange(sz) % top.shape[1]
-        tt = np.zeros(top.shape) # temporary array
+        if halo is None:
+            halo = np.pad(top, 1, 'constant', constant_values=-1)
         # Subset of pressure at the top surface:
         ptop = np.reshape(np.reshape(pressure, ext)[tk, tj, ti], top.shape)
 
         # Determine size of top-surface cells along north-south direction:
         delta = np.reshape((xx[tk, tj + 1, ti] - xx[tk, tj, ti])[:,1], top.shape)
 
-        # Fill the temporary array with data shifted south by 1:
-        np.concatenate((top[1:,:], -np.ones((1,top.shape[1]))), axis=0, out=tt)
+        # Use the top surface shifted south by 1:
+        tt = halo[2:,1:-1]
         # Compute conditions for flow exiting to the north:
         cnorth = (top >= 0) & (tt < 0) & (slope[:,:,1] < 0) & (ptop > 0)
         # Now add values to per-cell runoff sro:
         addToRunoff(cnorth, sro, top, slope[:,:,1], pressure, mannings, delta)
 
-        # Fill the temporary array with data shifted north by 1:
-        np.concatenate((-np.ones((1,top.shape[1])), top[0:-1,:]), axis=0, out=tt)
+        # Use the top surface shifted north by 1:
+        tt = halo[:-2,1:-1]
         # Compute conditions for flow exiting to the south:
         csouth = (top >= 0) & (tt < 0) & (slope[:,:,1] > 0) & (ptop > 0)
         # Now add values to per-cell runoff sro:
@@ -151,15 +157,15 @@ class pftools:
         # Determine size of top-surface cells along east-west direction:
         delta = np.reshape((xx[tk, tj, ti + 1] - xx[tk, tj, ti])[:,0], top.shape)
 
-        # Fill the temporary array with data shifted east by 1:
-        np.concatenate((top[:,1:], -np.ones((top.shape[0], 1))), axis=1, out=tt)
+        # Use the top surface shifted east by 1:
+        tt = halo[1:-1,2:]
         # Compute conditions for flow exiting to the west:
         cwest = (top >= 0) & (tt < 0) & (slope[:,:,0] < 0) & (ptop > 0)
         # Now add values to per-cell runoff sro:
         addToRunoff(cwest, sro, top, slope[:,:,0], pressure, mannings, delta)
 
-        # Fill the temporary array with data shifted north by 1:
-        np.concatenate((-np.ones((top.shape[0], 1)), top[:,0:-1]), axis=1, out=tt)
+        # Use the top surface shifted west by 1:
+        tt = halo[1:-1,:-2]
         # Compute conditions for flow exiting to the south:
         ceast = (top >= 0) & (tt < 0) & (slope[:,:,0] > 0) & (ptop > 0)
         # Now add values to per-cell runoff sro:
@@ -217,7 +223,221 @@ class ParFlowAlgorithm(VTKPythonAlgorithmBase):
     image data or structured grids (both of which may
     be output by the reader) can be passed through the
     filter.
+
+    3. cellVolumes and topSurface cache quantities
+    derived from the mesh and mask, which do not change
+    over the course of a ParFlow run, so that only the
+    time-varying computations are repeated for each
+    timestep.
+
+    4. When the data is distributed (e.g., under pvbatch),
+    topSurface finds the top of columns split across
+    ranks, ghostCells identifies duplicated cells that
+    must not be counted twice and allReduce combines the
+    per-rank totals.
     """
+    @staticmethod
+    def controller():
+        """Return the global controller when running in parallel and
+        None otherwise."""
+        from vtkmodules.vtkParallelCore import vtkMultiProcessController
+        controller = vtkMultiProcessController.GetGlobalController()
+        if controller and controller.GetNumberOfProcesses() > 1:
+            return controller
+        return None
+
+    @staticmethod
+    def allReduce(values, operation='sum'):
+        """Return the element-wise sum (or 'max') of the NumPy array
+        values across all ranks."""
+        controller = ParFlowAlgorithm.controller()
+        if controller is None:
+            return values
+        from vtkmodules.vtkParallelCore import vtkCommunicator
+        from vtkmodules.util.numpy_support import vtk_to_numpy as vton
+        from vtkmodules.util.numpy_support import numpy_to_vtk as ntov
+        values = np.asarray(values)
+        send = ntov(np.ravel(values), deep=1)
+        recv = send.NewInstance()
+        op = vtkCommunicator.MAX_OP if operation == 'max' else vtkCommunicator.SUM_OP
+        controller.AllReduce(send, recv, op)
+        return np.reshape(np.array(vton(recv), dtype=values.dtype), values.shape)
+
+    @staticmethod
+    def allGather(values):
+        """Return the NumPy arrays values of all ranks, stacked in rank
+        order along a new first axis."""
+        controller = ParFlowAlgorithm.controller()
+        values = np.asarray(values)
+        if controller is None:
+            return values[np.newaxis]
+        from vtkmodules.util.numpy_support import vtk_to_numpy as vton
+        from vtkmodules.util.numpy_support import numpy_to_vtk as ntov
+        send = ntov(np.ravel(values), deep=1)
+        recv = send.NewInstance()
+        controller.AllGather(send, recv)
+        return np.reshape(np.array(vton(recv), dtype=values.dtype), \
+            (controller.GetNumberOfProcesses(),) + values.shape)
+
+    @staticmethod
+    def arraysPresent(arrays):
+        """Return True if none of the VTK arrays is None on any rank.
+
+        This is collective, so that all ranks give up together rather than
+        leave the others waiting in a later reduction."""
+        missing = any(arr is None for arr in arrays)
+        return not ParFlowAlgorithm.allReduce(np.array([missing], dtype=np.int32), 'max')[0]
+
+    @staticmethod
+    def ghostCells(dataset):
+        """Return a boolean array marking the cells of dataset that are
+        duplicated from another rank or None if there are none."""
+        from vtkmodules.vtkCommonDataModel import vtkDataSetAttributes as dsa
+        from vtkmodules.util.numpy_support import vtk_to_numpy as vton
+        ghosts = dataset.GetCellData().GetArray(dsa.GhostArrayName())
+        if ghosts is None:
+            return None
+        return (vton(ghosts) & dsa.DUPLICATECELL) != 0
+
+    def cachedValue(self, name, key, compute, collective=False):
+        """Return the value cached under name if it was computed for key,
+        otherwise call compute() and cache its result for key.
+
+        When compute() communicates with other ranks, pass collective=True
+        so that either all ranks or none of them call it."""
+        if not hasattr(self, '_cache'):
+            self._cache = {}
+        cached = self._cache.get(name)
+        valid = cached is not None and cached[0] == key
+        if collective:
+            valid = not self.allReduce(np.array([not valid], dtype=np.int32), 'max')[0]
+        if valid:
+            return cached[1]
+        value = compute()
+        self._cache[name] = (key, value)
+        return value
+
+    @staticmethod
+    def contentKey(array):
+        """Return a key that changes whenever the values of the VTK array do.
+
+        The reader creates new arrays for every timestep, so their MTime
+        cannot tell whether the values changed; a checksum of the values
+        is far cheaper than what gets cached under it."""
+        import hashlib
+        from vtkmodules.util.numpy_support import vtk_to_numpy as vton
+        values = np.ascontiguousarray(vton(array))
+        return (values.shape, values.dtype.str, hashlib.sha1(values).hexdigest())
+
+    @staticmethod
+    def meshKey(dataset):
+        """Return a key that changes whenever the geometry of dataset does."""
+        if dataset.IsA('vtkPointSet'):
+            return (dataset.GetExtent(), \
+                ParFlowAlgorithm.contentKey(dataset.GetPoints().GetData()))
+        return (dataset.GetExtent(), dataset.GetOrigin(), dataset.GetSpacing())
+
+    def cellVolumes(self, dataset):
+        """Return the volume of each (hexahedral) cell of dataset."""
+        def compute():
+            from vtkmodules.vtkFiltersVerdict import vtkMeshQuality as mq
+            from vtkmodules.util.numpy_support import vtk_to_numpy as vton
+            mqf = mq()
+            mqf.SetHexQualityMeasureToVolume()
+            mqf.SetInputDataObject(0, dataset)
+            mqf.Update()
+            # Keep the VTK array alongside the NumPy array that views it:
+            vvolume = mqf.GetOutputDataObject(0).GetCellData().GetArray('Quality')
+            return (vvolume, vton(vvolume))
+        return self.cachedValue('volume', self.meshKey(dataset), compute)[1]
+
+    def topSurface(self, dataset, vmask, wholeExtent=None):
+        """Return the top surface of dataset, the indices of its valid
+        cells (see pftools.computeTopSurface and
+        pftools.computeTopSurfaceIndices) and its halo (see
+        pftools.computeSurfaceRunoff) given the VTK mask array.
+
+        When running in parallel and given the whole (point) extent of
+        the dataset, each rank exchanges the tops of its columns with the
+        ranks holding the same or neighbouring columns only. A rank then
+        only keeps the top cells it holds and that are not ghost cells,
+        so each top cell is counted by exactly one rank.
+        """
+        def compute():
+            from vtkmodules.util.numpy_support import vtk_to_numpy as vton
+            top = pftools.computeTopSurface(ext, vton(vmask))
+            if not distributed:
+                halo = np.pad(top, 1, 'constant', constant_values=-1)
+                return (top, pftools.computeTopSurfaceIndices(top), halo)
+            # Offset of this block's cells along k in the whole domain:
+            ko = extent[4] - wholeExtent[4]
+            nk, nj, ni = ext
+            # The top (as a global k index) of this block's columns and of
+            # the columns around them, combined with the other ranks':
+            halo = -np.ones((nj + 2, ni + 2), dtype=np.int32)
+            halo[1:-1, 1:-1] = np.where(top >= 0, top + ko, -1)
+            self.exchangeColumnTops(extent, halo)
+            # Keep the top cells inside this block that are not ghosts:
+            top = halo[1:-1, 1:-1].astype(top.dtype) - ko
+            top[(top < 0) | (top >= nk)] = -1
+            ghosts = self.ghostCells(dataset)
+            if ghosts is not None:
+                jj, ii = np.nonzero(top >= 0)
+                gg = np.reshape(ghosts, ext)[top[jj, ii], jj, ii]
+                top[jj[gg], ii[gg]] = -1
+            return (top, pftools.computeTopSurfaceIndices(top), halo)
+        ext = pftools.dataCellExtent(dataset)
+        extent = dataset.GetExtent()
+        distributed = wholeExtent is not None and self.controller() is not None
+        key = (extent, tuple(wholeExtent or ()), self.contentKey(vmask))
+        return self.cachedValue('top', key, compute, collective=distributed)
+
+    def exchangeColumnTops(self, extent, halo):
+        """Given the (point) extent of this rank's block and the tops of
+        its columns in the middle of halo, a (j, i) array with a one-cell
+        border, take the max of each entry of halo with the tops that the
+        other ranks hold for the same column.
+
+        Only ranks whose columns overlap or border this rank's columns
+        exchange their tops, so the communication per rank is proportional
+        to the size of its own surface. This must be called on all ranks.
+        """
+        from vtkmodules.util.numpy_support import vtk_to_numpy as vton
+        from vtkmodules.util.numpy_support import numpy_to_vtk as ntov
+        from vtkmodules.vtkCommonCore import vtkIntArray
+        controller = self.controller()
+        rank = controller.GetLocalProcessId()
+        extents = self.allGather(np.array(extent, dtype=np.int32))
+        # Cells of this block along j and i, in whole-domain indices:
+        jlo, jhi, ilo, ihi = extent[2], extent[3], extent[0], extent[1]
+
+        tag = 7237
+        for remote in range(controller.GetNumberOfProcesses()):
+            if remote == rank:
+                continue
+            e = extents[remote]
+            # Our columns that border or share the remote block's columns:
+            sj0, sj1 = max(jlo, e[2] - 1), min(jhi, e[3] + 1)
+            si0, si1 = max(ilo, e[0] - 1), min(ihi, e[1] + 1)
+            # The remote block's columns that border or share ours:
+            rj0, rj1 = max(e[2], jlo - 1), min(e[3], jhi + 1)
+            ri0, ri1 = max(e[0], ilo - 1), min(e[1], ihi + 1)
+            if sj0 >= sj1 or si0 >= si1:
+                # Then the remote block's region is empty as well.
+                continue
+            send = ntov(np.ravel(halo[sj0 - jlo + 1:sj1 - jlo + 1, \
+                si0 - ilo + 1:si1 - ilo + 1]), deep=1)
+            recv = vtkIntArray()
+            # The lower rank of each pair sends first:
+            if rank < remote:
+                controller.Send(send, remote, tag)
+                controller.Receive(recv, remote, tag)
+            else:
+                controller.Receive(recv, remote, tag)
+                controller.Send(send, remote, tag)
+            block = halo[rj0 - jlo + 1:rj1 - jlo + 1, ri0 - ilo + 1:ri1 - ilo + 1]
+            np.maximum(block, np.reshape(vton(recv), block.shape), out=block)
+
     def FillInputPortInformation(self, port, info):
         info.Set(self.INPUT_REQUIRED_DATA_TYPE(), "vtkDataSet")
         return 1
@@ -295,7 +515,6 @@ class SubsurfaceStorage(ParFlowAlgorithm):
     def RequestData(self, request, inInfoVec, outInfoVec):
         from vtkmodules.vtkCommonDataModel import vtkTable, vtkDataSet, vtkPolyData
         from vtkmodules.vtkIOExodus import vtkExodusIIReader as e2r
-        from vtkmodules.vtkFiltersVerdict import vtkMeshQuality as mq
         from vtkmodules.util.numpy_support import vtk_to_numpy as vton
         from vtkmodules.util.numpy_support import numpy_to_vtk as ntov
         import numpy as np
@@ -312,21 +531,15 @@ class SubsurfaceStorage(ParFlowAlgorithm):
         vporosity = cd.GetArray('porosity')
         vpressure = cd.GetArray('pressure')
         vspecstor = cd.GetArray('specific storage')
-        if vmask == None or vsaturation == None or \
-           vporosity == None or vpressure == None or \
-           vspecstor == None:
+        if not self.arraysPresent( \
+                (vmask, vsaturation, vporosity, vpressure, vspecstor)):
             print('Error: A required array was not present.')
             return 0
 
         ## Compute the volume of each cell:
-        mqf = mq()
-        mqf.SetHexQualityMeasureToVolume()
-        mqf.SetInputDataObject(0, output)
-        mqf.Update()
-        volume = vton(mqf.GetOutputDataObject(0).GetCellData().GetArray('Quality'))
+        volume = self.cellVolumes(output)
 
         ## Get NumPy versions of each array so we can do arithmetic:
-        mask = vton(vmask)
         saturation = vton(vsaturation)
         porosity = vton(vporosity)
         pressure = vton(vpressure)
@@ -334,8 +547,12 @@ class SubsurfaceStorage(ParFlowAlgorithm):
 
         ## Compute the subsurface storage as sbs
         ## and store it as field data.
-        sbs = np.sum(pftools.computeSubsurfaceStorage( \
-                saturation, pressure, volume, porosity, specstor))
+        sbs = pftools.computeSubsurfaceStorage( \
+                saturation, pressure, volume, porosity, specstor)
+        ghosts = self.ghostCells(output)
+        if ghosts is not None:
+            sbs = sbs[~ghosts]
+        sbs = self.allReduce(np.array([np.sum(sbs)]))
         arr = ntov(sbs)
         arr.SetName('subsurface storage')
         arr.GetInformation().Set(e2r.GLOBAL_TEMPORAL_VARIABLE(), 1)
@@ -370,7 +587,6 @@ class WaterTableDepth(ParFlowAlgorithm):
     def RequestData(self, request, inInfoVec, outInfoVec):
         from vtkmodules.vtkCommonDataModel import vtkTable, vtkDataSet, vtkPolyData
         from vtkmodules.vtkIOExodus import vtkExodusIIReader as e2r
-        from vtkmodules.vtkFiltersVerdict import vtkMeshQuality as mq
         from vtkmodules.util.numpy_support import vtk_to_numpy as vton
         from vtkmodules.util.numpy_support import numpy_to_vtk as ntov
         import numpy as np
@@ -386,17 +602,15 @@ class WaterTableDepth(ParFlowAlgorithm):
         scd = input0.GetCellData()
         vmask = scd.GetArray('mask')
         vsaturation = scd.GetArray('saturation')
-        if vmask == None or vsaturation == None:
+        if not self.arraysPresent((vmask, vsaturation)):
             print('Error: A required array was not present.')
             return 0
 
         ## Get NumPy versions of each array so we can do arithmetic:
-        mask = vton(vmask)
         saturation = vton(vsaturation)
 
         ## Find the top surface
-        ext = pftools.dataCellExtent(input0)
-        top = pftools.computeTopSurface(ext, mask)
+        top, itop, halo = self.topSurface(input0, vmask)
 
         ## Compute the water table depth storage as wtd
         ## and store it as cell data.
@@ -430,7 +644,7 @@ class WaterBalance(ParFlowAlgorithm):
     def RequestData(self, request, inInfoVec, outInfoVec):
         from vtkmodules.vtkCommonDataModel import vtkTable, vtkDataSet, vtkPolyData
         from vtkmodules.vtkIOExodus import vtkExodusIIReader as e2r
-        from vtkmodules.vtkFiltersVerdict import vtkMeshQuality as mq
+        from vtkmodules.vtkCommonExecutionModel import vtkStreamingDemandDrivenPipeline as sddp
         from vtkmodules.util.numpy_support import vtk_to_numpy as vton
         from vtkmodules.util.numpy_support import numpy_to_vtk as ntov
         import numpy as np
@@ -451,22 +665,15 @@ class WaterBalance(ParFlowAlgorithm):
         vspecstor = cd.GetArray('specific storage')
         vslope = scd.GetArray('slope')
         vmannings = scd.GetArray('mannings')
-        if vmask == None or vsaturation == None or \
-           vporosity == None or vpressure == None or \
-           vspecstor == None or vslope == None or \
-           vmannings == None:
+        if not self.arraysPresent((vmask, vsaturation, vporosity, \
+                vpressure, vspecstor, vslope, vmannings)):
             print('Error: A required array was not present.')
             return 0
 
         ## Compute the volume of each cell:
-        mqf = mq()
-        mqf.SetHexQualityMeasureToVolume()
-        mqf.SetInputDataObject(0, output)
-        mqf.Update()
-        volume = vton(mqf.GetOutputDataObject(0).GetCellData().GetArray('Quality'))
+        volume = self.cellVolumes(output)
 
         ## Get NumPy versions of each array so we can do arithmetic:
-        mask = vton(vmask)
         saturation = vton(vsaturation)
         porosity = vton(vporosity)
         pressure = vton(vpressure)
@@ -474,37 +681,37 @@ class WaterBalance(ParFlowAlgorithm):
         slope = vton(vslope)
         mannings = vton(vmannings)
 
-        ## Compute the subsurface storage as sbs
-        ## and store it as field data.
-        sbs = np.sum(pftools.computeSubsurfaceStorage( \
-                saturation, pressure, volume, porosity, specstor))
-        arr = ntov(sbs)
-        arr.SetName('subsurface storage')
-        arr.GetInformation().Set(e2r.GLOBAL_TEMPORAL_VARIABLE(), 1)
-        output.GetFieldData().AddArray(arr)
+        ## Compute the subsurface storage as sbs,
+        ## skipping cells duplicated from other ranks:
+        sbs = pftools.computeSubsurfaceStorage( \
+                saturation, pressure, volume, porosity, specstor)
+        ghosts = self.ghostCells(output)
+        if ghosts is not None:
+            sbs = sbs[~ghosts]
 
         ## Find the top surface
         ext = pftools.dataCellExtent(input0)
-        top = pftools.computeTopSurface(ext, mask)
-        itop = pftools.computeTopSurfaceIndices(top)
+        wholeExtent = inInfoVec[0].GetInformationObject(0).Get(sddp.WHOLE_EXTENT())
+        top, itop, halo = self.topSurface(input0, vmask, wholeExtent)
 
         ## Compute the surface storage
         ps = pftools.dataPointExtent(input0) + (3,)
         xx = np.reshape(vton(output.GetPoints().GetData()), ps)
-        sus = np.sum(pftools.computeSurfaceStorage(ext, itop, xx, pressure))
-        arr = ntov(sus)
-        arr.SetName('surface storage')
-        arr.GetInformation().Set(e2r.GLOBAL_TEMPORAL_VARIABLE(), 1)
-        output.GetFieldData().AddArray(arr)
+        sus = pftools.computeSurfaceStorage(ext, itop, xx, pressure)
 
         ## Compute the surface runoff
         slope = np.reshape(slope, top.shape + (2,))
         mannings = np.reshape(mannings, top.shape)
-        sro = np.sum(pftools.computeSurfaceRunoff(top, xx, pressure, slope, mannings))
-        arr = ntov(sro)
-        arr.SetName('surface runoff')
-        arr.GetInformation().Set(e2r.GLOBAL_TEMPORAL_VARIABLE(), 1)
-        output.GetFieldData().AddArray(arr)
+        sro = pftools.computeSurfaceRunoff(top, xx, pressure, slope, mannings, halo)
+
+        ## Sum the totals across all ranks and store them as field data.
+        totals = self.allReduce(np.array([np.sum(sbs), np.sum(sus), np.sum(sro)]))
+        for name, total in zip( \
+                ('subsurface storage', 'surface storage', 'surface runoff'), totals):
+            arr = ntov(np.array([total]))
+            arr.SetName(name)
+            arr.GetInformation().Set(e2r.GLOBAL_TEMPORAL_VARIABLE(), 1)
+            output.GetFieldData().AddArray(arr)
 
         return 1
 
@@ -1,3 +1,4 @@
+import re
 import blot_common
 import paraview.simple
 smp = paraview.simple
@@ -24,6 +25,18 @@ STANDARD_CHART_COLORS = [
 
 _global_view = None
 
+class _Extraction(object):
+    """The filters extracting the curve variables of one source and
+    variable type over time, along with the ids they extract and the
+    composite index of the block holding the series of each id."""
+
+    def __init__(self, selection, plot):
+        self.selection = selection
+        self.plot = plot
+        self.ids = []
+        self.block_indices = dict()
+
+
 class TPlot(object):
 
     def __init__(self):
@@ -42,6 +55,7 @@ class TPlot(object):
         self.view = _global_view
         self._curve_reps = dict()
         self._filters = []
+        self._extractions = dict()
         self.reset()
         pass
 
@@ -71,6 +85,7 @@ class TPlot(object):
         for proxy in self._filters:
             smp.Delete(proxy)
         self._filters = list()
+        self._extractions = dict()
 
 
         self.view.Representations = []
@@ -105,10 +120,87 @@ class TPlot(object):
         else:
             return self.create_selection_over_time_representation(c)
 
+    def _get_extraction_key(self, c):
+        if c.var.type == GLOBAL_VARIABLE: return (c.var.source, GLOBAL_VARIABLE)
+        return (c.var.source, _get_field_type_for_variable(c.var))
+
+    def update_extractions(self):
+        """Create or update the filters extracting the curve variables over
+        time.  All the curves reading the same source and variable type
+        share one filter, so each timestep is read once however many
+        curves are plotted.  The representations of the curves keep the
+        extracted series, so replotting does not read the data again."""
+        ids = dict()
+        for c in self._curves:
+            key = self._get_extraction_key(c)
+            if c.var.type == GLOBAL_VARIABLE:
+                ids.setdefault(key, set())
+            else:
+                ids.setdefault(key, set()).add(long(c.id))
+
+        for key, id_set in ids.items():
+            extraction = self._extractions.get(key)
+            source, field_type = key
+            if field_type == GLOBAL_VARIABLE:
+                if extraction is None:
+                    plot = smp.PlotGlobalVariablesOverTime(source)
+                    self._filters.append(plot)
+                    self._extractions[key] = _Extraction(None, plot)
+                continue
+
+            if extraction is None:
+                selection = smp.GlobalIDSelectionSource(FieldType=field_type)
+                plot = smp.PlotSelectionOverTime(source, Selection=selection)
+                # one table (block) per selected id rather than statistics
+                plot.OnlyReportSelectionStatistics = 0
+                self._filters.append(selection)
+                self._filters.append(plot)
+                extraction = _Extraction(selection, plot)
+                self._extractions[key] = extraction
+            id_list = sorted(id_set)
+            if extraction.ids != id_list:
+                extraction.selection.GlobalIDs = id_list
+                extraction.ids = id_list
+                extraction.block_indices = self._get_block_indices(extraction.plot)
+                # the blocks of existing curves may have moved
+                for c in self._curves:
+                    rep = self._curve_reps.get(c.curve_index)
+                    if rep and self._get_extraction_key(c) == key:
+                        self._set_block_index(rep, c)
+
+    def _get_block_indices(self, plot):
+        """Return a dict of id to the composite index of the block holding
+        its series in the output of a PlotSelectionOverTime filter.  The
+        blocks are named after the id they hold (e.g. "gid=12"); ids that
+        are not in the data have no block."""
+        plot.UpdatePipeline()
+        info = plot.GetDataInformation().DataInformation.GetCompositeDataInformation()
+        indices = dict()
+        for i in range(info.GetNumberOfChildren()):
+            match = re.search(r'id=(-?\d+)', info.GetName(i) or '', re.IGNORECASE)
+            if match:
+                indices[long(match.group(1))] = i + 1
+        return indices
+
+    def _get_block_index(self, c):
+        """Return the composite index of the block holding the series of
+        curve c in the output of its PlotSelectionOverTime filter, or None
+        if its id is not in the data."""
+        return self._extractions[self._get_extraction_key(c)].block_indices.get(long(c.id))
+
+    def _set_block_index(self, rep, c):
+        index = self._get_block_index(c)
+        if index is None:
+            print " No data for id %d, curve %d is not plotted" % (long(c.id), c.curve_index)
+            rep.Visibility = 0
+        else:
+            rep.CompositeDataSetIndex = index
+            rep.Visibility = 1
+
     def create_global_over_time_representation(self, c):
 
-        plot = smp.PlotGlobalVariablesOverTime(c.var.source)
-        self._filters.append(plot)
+        self.update_extractions()
+        plot = self._extractions[self._get_extraction_key(c)].plot
 
         chart_variable_name = c.chart_variable_name
         chart_series_label = c.get_series_label()
@@ -136,13 +228,8 @@ class TPlot(object):
 
     def create_selection_over_time_representation(self, c):
 
-        field_type = _get_field_type_for_variable(c.var)
-        selection = smp.GlobalIDSelectionSource(FieldType=field_type)
-        selection.GlobalIDs = [long(c.id)]
-        plot = smp.PlotSelectionOverTime(c.var.source, Selection=selection)
-
-        self._filters.append(selection)
-        self._filters.append(plot)
+        self.update_extractions()
+        plot = self._extractions[self._get_extraction_key(c)].plot
 
         chart_variable_name = c.chart_variable_name
         chart_series_label = c.get_series_label()
@@ -153,7 +240,7 @@ class TPlot(object):
         paraview.servermanager.ProxyManager().RegisterProxy("representations", \
           "plot_rep_%d" % c.curve_index, rep)
 
-        rep.CompositeDataSetIndex = 1
+        self._set_block_index(rep, c)
         rep.AttributeType = 6 # "Row Data"
         rep.Update()
         visibility = []
@@ -208,6 +295,9 @@ class TPlot(object):
 
         view.AxisTitle = [ylabel, xlabel, '', '']
 
+        # extract all the curves at once, before any of them is updated
+        self.update_extractions()
+
         count = 0
         for c in curves_to_plot:
             rep = self.get_curve_representation(c)
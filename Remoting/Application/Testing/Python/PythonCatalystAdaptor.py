@@ -0,0 +1,49 @@
+"""Tests that the Catalyst adaptors pass in place updates of the simulation's
+arrays on to VTK, including for arrays VTK cannot share the memory of."""
+import numpy
+from vtkmodules.util import numpy_support
+from paraview import cpadaptor
+
+def Error(message):
+  raise Exception("ERROR: %s" % message)
+
+adaptor = cpadaptor.ImageDataAdaptor("input")
+adaptor.SetGeometry((0, 3, 0, 3, 0, 0))
+
+def Check(name, values, expected):
+  array = adaptor.SetPointArray(name, values)
+  mtime = array.GetMTime()
+  if not numpy.array_equal(numpy_support.vtk_to_numpy(array), expected):
+    Error("%s array does not hold the values set." % name)
+  return mtime
+
+# contiguous, shared with VTK
+contiguous = numpy.arange(16, dtype=numpy.float64)
+mtime = Check("contiguous", contiguous, contiguous)
+contiguous[:] = 3
+if Check("contiguous", contiguous, contiguous) <= mtime:
+  Error("contiguous array not marked as modified.")
+
+# non-contiguous, copied
+strided = numpy.arange(32, dtype=numpy.float64)[::2]
+Check("strided", strided, strided)
+strided *= 2
+Check("strided", strided, strided)
+
+# bool, converted to unsigned char
+mask = numpy.zeros(16, dtype=numpy.bool_)
+Check("mask", mask, mask.astype(numpy.uint8))
+mask[::3] = True
+Check("mask", mask, mask.astype(numpy.uint8))
+
+# non-contiguous points
+grid = cpadaptor.UnstructuredGridAdaptor("input")
+coordinates = numpy.zeros((4, 6))[:, ::2]
+grid.SetPoints(coordinates)
+coordinates[:, 0] = 1
+grid.SetPoints(coordinates)
+points = numpy_support.vtk_to_numpy(grid.GetGrid().GetPoints().GetData())
+if not numpy.array_equal(points, coordinates):
+  Error("points do not hold the coordinates set.")
+
+print("Success")
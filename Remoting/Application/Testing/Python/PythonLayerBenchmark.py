@@ -0,0 +1,43 @@
+from paraview.benchmark import pythonlayer
+from paraview.benchmark import logbase
+from paraview import smtesting
+import os
+
+def Error(message):
+  raise Exception("ERROR: %s" % message)
+
+smtesting.ProcessCommandLineArguments()
+
+# runs are appended to the archive, start from a new one.
+filename = os.path.join(smtesting.TempDir, "PythonLayerBenchmark.zip")
+if os.path.exists(filename):
+  os.remove(filename)
+
+sizes = dict((name, 10) for name, function, size in pythonlayer.BENCHMARKS)
+results = pythonlayer.run(sizes=sizes, repeat=1, filename=filename,
+                          metadata={'test': True})
+if sorted(results) != sorted(sizes):
+  Error("Not all benchmarks ran.")
+
+baseline = pythonlayer.load_results(filename)
+if baseline != results:
+  Error("Saved results differ.")
+
+# an archive without runs of these benchmarks is not a baseline.
+other = os.path.join(smtesting.TempDir, "PythonLayerBenchmarkOther.zip")
+if os.path.exists(other):
+  os.remove(other)
+logbase.dump_logs(other)
+try:
+  pythonlayer.load_results(other)
+  Error("Baseline without results loaded.")
+except RuntimeError:
+  pass
+
+slower = dict((name, {'size': 10, 'seconds': 0.0}) for name in results)
+if len(pythonlayer.compare(results, slower)) != len(results):
+  Error("Regressions not reported.")
+if pythonlayer.compare(results, results):
+  Error("Regressions reported against the same results.")
+
+print("Success")
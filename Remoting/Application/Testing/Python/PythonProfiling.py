@@ -0,0 +1,40 @@
+"""Tests the timing of the hot paths of servermanager and simple."""
+from paraview.simple import *
+from paraview import profiling
+
+def Error(message):
+  raise Exception("ERROR: %s" % message)
+
+sphere = Sphere()
+if profiling.get_stats():
+  Error("Calls were timed while timing is disabled.")
+
+profiling.enable()
+shrink = Shrink(Input=sphere)
+shrink.ShrinkFactor = 0.2
+shrink.UpdatePipeline()
+servermanager.Fetch(shrink)
+Show(shrink)
+Render()
+profiling.disable()
+
+stats = profiling.gather()
+for site in ['servermanager.Proxy.__init__', 'servermanager._getPyProxy',
+             'servermanager.Property._UpdateProperty',
+             'servermanager.SourceProxy.UpdatePipeline', 'servermanager.Fetch',
+             'simple.Show', 'simple.Render']:
+  if site not in stats or stats[site]['count'] < 1:
+    Error("Calls to %s were not timed." % site)
+  if sum(stats[site]['histogram']) != stats[site]['count']:
+    Error("Histogram of %s does not match the number of calls." % site)
+
+merged = profiling.merge([stats, stats])
+if merged['simple.Render']['count'] != 2 * stats['simple.Render']['count']:
+  Error("Statistics not merged.")
+profiling.report(stats)
+
+profiling.reset()
+if profiling.get_stats():
+  Error("Statistics not reset.")
+
+print("Success")
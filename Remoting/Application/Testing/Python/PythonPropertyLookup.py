@@ -0,0 +1,31 @@
+"""Tests looking up proxy properties by XML name and by label."""
+from paraview.simple import *
+from paraview import servermanager
+
+def Error(message):
+  raise Exception("ERROR: %s" % message)
+
+sphere = Sphere()
+contour = Contour(Input=sphere, ContourBy=['POINTS', 'Normals'])
+
+# "Isosurfaces" is the label of the "ContourValues" property.
+byname = contour.GetProperty("ContourValues")
+bylabel = contour.GetProperty("Isosurfaces")
+if byname is None or bylabel is None:
+  Error("Property not found.")
+if byname.SMProperty != bylabel.SMProperty:
+  Error("Name and label resolve to different properties.")
+if contour.GetProperty("ContourValues") is not byname:
+  Error("Property wrapper was not reused.")
+if contour.GetProperty("NoSuchProperty") is not None:
+  Error("Unknown property was found.")
+
+contour.Isosurfaces = [0.1, 0.2]
+if list(contour.GetProperty("ContourValues")) != [0.1, 0.2]:
+  Error("Value set by label not visible by name.")
+
+# the output port proxies share the resolved properties.
+if servermanager.OutputPort(contour, 0).GetProperty("Isosurfaces").SMProperty != byname.SMProperty:
+  Error("Output port resolved a different property.")
+
+print("Success")
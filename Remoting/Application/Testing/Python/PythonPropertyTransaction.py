@@ -0,0 +1,51 @@
+"""Tests batching of property pushes with Proxy.PropertyTransaction()."""
+from paraview.simple import *
+
+def Error(message):
+  raise Exception("ERROR: %s" % message)
+
+sphere = Sphere(Radius=2.0, ThetaResolution=16)
+vtkobject = sphere.GetClientSideObject()
+if vtkobject.GetRadius() != 2.0 or vtkobject.GetThetaResolution() != 16:
+  Error("Constructor arguments were not pushed.")
+
+with sphere.PropertyTransaction():
+  sphere.Radius = 3.0
+  sphere.Center = [1, 2, 3]
+  if not sphere.IsInPropertyTransaction():
+    Error("Transaction not in progress.")
+  if vtkobject.GetRadius() != 2.0:
+    Error("Property pushed before the transaction was committed.")
+
+if sphere.IsInPropertyTransaction():
+  Error("Transaction still in progress.")
+if vtkobject.GetRadius() != 3.0 or list(vtkobject.GetCenter()) != [1, 2, 3]:
+  Error("Properties not pushed when committing the transaction.")
+
+# nested transactions push when the outermost one is committed.
+sphere.BeginPropertyTransaction()
+sphere.BeginPropertyTransaction()
+sphere.Radius = 4.0
+sphere.CommitPropertyTransaction()
+if vtkobject.GetRadius() != 3.0:
+  Error("Inner commit pushed the properties.")
+sphere.CommitPropertyTransaction()
+if vtkobject.GetRadius() != 4.0:
+  Error("Outer commit did not push the properties.")
+
+try:
+  sphere.CommitPropertyTransaction()
+  Error("Commit without a transaction did not raise.")
+except RuntimeError:
+  pass
+
+SetProperties(sphere, Radius=5.0, PhiResolution=12)
+if vtkobject.GetRadius() != 5.0 or vtkobject.GetPhiResolution() != 12:
+  Error("SetProperties did not push the properties.")
+
+sphere.UpdatePipeline()
+bounds = sphere.GetDataInformation().GetBounds()
+if abs(bounds[1] - 6.0) > 1e-3:
+  Error("Unexpected bounds %s" % str(bounds))
+
+print("Success")
@@ -0,0 +1,55 @@
+"""Tests that query selections of ids, which are looked up instead of being
+evaluated on every element, select the same elements as the equivalent
+evaluated queries."""
+from paraview.simple import *
+from paraview.selection import *
+from paraview.detail import python_selector
+
+def Error(message):
+  raise Exception("ERROR: %s" % message)
+
+if python_selector.parse_id_query("(id == 1) | (id == 7) | (id == 2)") != ('id', [[1, 2], [7, 7]]):
+  Error("List of ids not parsed correctly.")
+if python_selector.parse_id_query("(id > 3) & (id < 9.5)") != ('id', [[4, 9]]):
+  Error("Range of ids not parsed correctly.")
+if python_selector.parse_id_query("id == int(4)") is not None or \
+   python_selector.parse_id_query("Normals > 4") is not None:
+  Error("Query that is not an id query was parsed.")
+
+def NumberOfCells(source, query):
+  SetActiveSource(source)
+  QuerySelect(QueryString=query, FieldType='CELL')
+  extract = ExtractSelection()
+  extract.UpdatePipeline()
+  count = extract.GetDataInformation().GetNumberOfCells()
+  Delete(extract)
+  return count
+
+def Compare(source, query, evaluated, expected):
+  count = NumberOfCells(source, query)
+  if count != NumberOfCells(source, evaluated) or count != expected:
+    Error("'%s' selected %d cells instead of %d." % (query, count, expected))
+
+sphere = Sphere()
+Compare(sphere, "id == 5", "id == int(5)", 1)
+Compare(sphere, "(id == 1) | (id == 7) | (id == 900000)",
+        "(id == int(1)) | (id == int(7)) | (id == int(900000))", 2)
+Compare(sphere, "(id >= 10) & (id < 20)", "(id >= int(10)) & (id < int(20))", 10)
+
+# extracted cells keep the ids they have in the sphere as vtkOriginalCellIds.
+SetActiveSource(sphere)
+QuerySelect(QueryString="(id % 3) == 0", FieldType='CELL')
+extract = ExtractSelection()
+Compare(extract, "(vtkOriginalCellIds >= 30) & (vtkOriginalCellIds <= 60)",
+        "(vtkOriginalCellIds >= int(30)) & (vtkOriginalCellIds <= int(60))", 11)
+Compare(extract, "vtkOriginalCellIds in [3, 4, 5, 6]",
+        "(vtkOriginalCellIds == int(3)) | (vtkOriginalCellIds == int(6))", 2)
+
+# queries on ids that are not integers are evaluated.
+calculator = PythonCalculator(Input=sphere, ArrayAssociation='Cell Data',
+  ArrayName='id', Expression="np.arange(inputs[0].GetNumberOfCells()) + 0.5")
+Compare(calculator, "id == 5", "id == int(5)", 0)
+Compare(calculator, "id < 5", "id < int(5)", 5)
+Compare(calculator, "(id > 2) & (id <= 4)", "(id > int(2)) & (id <= int(4))", 2)
+
+print("Success")
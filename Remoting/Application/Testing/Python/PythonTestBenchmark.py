@@ -1,6 +1,12 @@
 from paraview.simple import *
 
 import paraview.benchmark as pvb
+# the log columns and their statistics need numpy, the rest does not.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 pvb.logbase.maximize_logs()
 
 w = Wavelet()
@@ -9,6 +15,14 @@ w.UpdatePipeline()
 pvb.logbase.get_logs()
 pvb.logbase.print_logs()
 pvb.logbase.dump_logs("benchmark.log")
+pvb.logbase.append_logs("benchmark.log", {'run': 'second'})
+runs = pvb.logbase.list_runs("benchmark.log")
+assert len(runs) == 2 and runs[1]['metadata']['run'] == 'second'
+if numpy:
+    columns, header = pvb.logbase.load_columns("benchmark.log", ranks=[0],
+                                               columns=['Rank', 'Duration'])
+    assert set(columns.keys()) == set(['Rank', 'Duration'])
+    assert (columns['Rank'] == 0).all()
 pvb.logbase.import_logs("benchmark.log")
 
 print('='*40)
@@ -31,4 +45,20 @@ for c, rank_frame_logs in comp_rank_frame_logs.items():
         for f in rank_frame_logs[r]:
             print(f)
 
+if numpy:
+    print('='*40)
+    print('Log columns:')
+    print('='*40)
+    for c, log_columns in pvb.logparser.parse_logs().items():
+        columns = log_columns.columns(complete_frames_only=False)
+        print('Component: %s, %d entries' % (c, len(columns['Key'])))
+        frame_stats = pvb.logparser.column_frame_stats(columns)
+        pvb.logparser.write_column_stats_to_file(frame_stats, log_columns.Names)
+
+# logs without lines are restored without lines.
+pvb.logbase.logs[0].lines = []
+pvb.logbase.dump_logs("benchmark.log")
+pvb.logbase.import_logs("benchmark.log")
+assert pvb.logbase.logs[0].lines == []
+
 print('SUCCESS')
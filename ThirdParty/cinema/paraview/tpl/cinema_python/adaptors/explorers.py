@@ -7,6 +7,7 @@ to make corresponding changes before inserting the result into the database.
 from __future__ import absolute_import
 
 from ..database import store
+from . import runner
 
 
 class Explorer(object):
@@ -26,6 +27,12 @@ class Explorer(object):
         self.__store = store
         self.parameters = parameters
         self.tracks = tracks
+        # vary expensive tracks least often, see order_parameters()
+        self.orderByCost = True
+        # number of track executions that modified the pipeline in the last
+        # explore()
+        self.pipeline_executions = 0
+        self.__last_values = {}
 
     @property
     def store(self):
@@ -38,8 +45,25 @@ class Explorer(object):
         """
         return self.parameters
 
+    def order_parameters(self, parameters):
+        """
+        Sorts parameters by the cost of the tracks that consume them, most
+        expensive first. The last parameter varies fastest during the
+        exploration, so filter parameters change least often while camera
+        and color sweeps run innermost. Parameters that no track consumes
+        are kept outermost, ties keep their given order.
+        """
+        costs = {}
+        for track in (self.tracks or []):
+            for name in track.parameters():
+                costs[name] = max(costs.get(name, track.cost), track.cost)
+        return sorted(parameters,
+                      key=lambda name: -costs.get(name, float('inf')))
+
     def prepare(self):
         """ Give tracks a chance to get ready for a run """
+        self.pipeline_executions = 0
+        self.__last_values = {}
         if self.tracks:
             for e in self.tracks:
                 e.prepare(self)
@@ -48,25 +72,58 @@ class Explorer(object):
         # Create the document/data product for this sample.
         doc = store.Document(desc)
         for e in self.tracks:
+            if e.skipUnchanged:
+                values = [desc.get(name) for name in e.parameters()]
+                if self.__last_values.get(id(e)) == values:
+                    continue
+                self.__last_values[id(e)] = values
             # print ("EXECUTING track ", e, doc.descriptor)
             e.execute(doc)
+            if e.modifiesPipeline:
+                self.pipeline_executions += 1
         self.insert(doc)
 
-    def explore(self, fixedargs=None, progressObject=None):
+    def explore(self, fixedargs=None, progressObject=None,
+                worker=None, checkpoint=None):
         """
         Explore the problem space to populate the store being careful not to
-        hit combinations where dependencies are not satisfied.
+        hit combinations where dependencies are not satisfied. Afterwards
+        pipeline_executions holds the number of filter changes it took.
         Fixed arguments are the parameters that we want to hold constant in
         the exploration.
+        Worker, if supplied, is an (index, count) tuple, only that worker's
+        share of the descriptors is explored. Checkpoint, if supplied, is a
+        runner.Checkpoint; descriptors it has already seen are skipped and
+        the ones completed here are recorded into it. See runner.run().
         """
         self.prepare()
 
-        for descriptor in self.store.iterate(
-                self.list_parameters(), fixedargs, progressObject):
+        parameters = self.list_parameters()
+        if self.orderByCost:
+            parameters = self.order_parameters(parameters)
+        descriptors = self.store.iterate(
+            parameters, fixedargs, progressObject)
+        if worker is not None:
+            descriptors = runner.partition(descriptors, worker[0], worker[1])
+
+        for descriptor in descriptors:
+            if checkpoint is None:
+                self.execute(descriptor)
+                continue
+            if checkpoint.completed(descriptor):
+                continue
+            numfiles = len(self.__new_files())
             self.execute(descriptor)
+            checkpoint.record(descriptor, self.__new_files()[numfiles:])
 
         self.finish()
 
+    def __new_files(self):
+        try:
+            return self.store.get_new_files()
+        except AttributeError:
+            return []
+
     def finish(self):
         """ Give tracks a chance to clean up after a run """
         if self.tracks:
@@ -86,9 +143,25 @@ class Track(object):
     then tie a particular set of parameters to an action with a track
     """
 
+    # relative cost of changing the value of this track
+    cost = 1
+    # execute() is skipped while the track's parameters keep their values,
+    # only safe for tracks that do nothing beyond applying those values
+    skipUnchanged = False
+    # execute() makes the visualization pipeline re-execute
+    modifiesPipeline = False
+
     def __init__(self):
         pass
 
+    def parameters(self):
+        """ names of the descriptor entries this track consumes """
+        for attr in ('parameter', 'argument'):
+            name = getattr(self, attr, None)
+            if name is not None:
+                return [name]
+        return []
+
     def prepare(self, explorer):
         """ subclasses get ready to run here """
         pass
@@ -102,6 +175,16 @@ class Track(object):
         pass
 
 
+class FilterTrack(Track):
+    """
+    Base for tracks that set a filter parameter. These are the expensive
+    tracks, changing their value re-executes the pipeline.
+    """
+    cost = 100
+    skipUnchanged = True
+    modifiesPipeline = True
+
+
 class LayerControl(object):
     """
     Prototype for something that Layer track can control
@@ -117,6 +200,8 @@ class Layer(Track):
     A track that connects a layer to the set of objects in the scene that it
     controls.
     """
+    cost = 10
+
     def __init__(self, layer, objectlist):
         super(Layer, self).__init__()
         self.parameter = layer
@@ -8,10 +8,24 @@ from ...images import querymaker_specb as CT
 from ...images.camera_utils import convert_pose_to_camera
 
 from paraview import vtk
-from paraview.vtk.numpy_interface import dataset_adapter as dsa
+from paraview import numpy_support
 
 from ast import literal_eval
 
+import numpy as np
+
+
+def buffer2array(buf, name, flat=False):
+    """wraps the image buffer of a layer as a vtk array. The array shares
+    the buffer's memory, a copy is only made when the buffer is not
+    contiguous (e.g. a flipped view)."""
+    buf = np.ascontiguousarray(buf)
+    npixels = buf.shape[0] * buf.shape[1]
+    buf = buf.reshape(npixels) if flat else buf.reshape((npixels, -1))
+    array = numpy_support.numpy_to_vtk(buf)
+    array.SetName(name)
+    return array
+
 
 def layer2img(layer):
     """converts a layer to vtkImageData."""
@@ -26,10 +40,8 @@ def layer2img(layer):
         dims[0] = nvalues.shape[1]
         dims[1] = nvalues.shape[0]
         img.SetDimensions(dims[0], dims[1], 1)
-
-        nvalues = nvalues.reshape(dims[0]*dims[1])
-        vvalues = dsa.numpyTovtkDataArray(nvalues, "Values")
-        img.GetPointData().SetScalars(vvalues)
+        img.GetPointData().SetScalars(
+            buffer2array(nvalues, "Values", flat=True))
 
     elif layer.hasColorArray():
         ncolors = layer.getColorArray()
@@ -37,22 +49,16 @@ def layer2img(layer):
         dims[0] = ncolors.shape[1]
         dims[1] = ncolors.shape[0]
         img.SetDimensions(dims[0], dims[1], 1)
-        ncolors = ncolors.reshape((dims[0]*dims[1], -1))
-        vcolors = dsa.numpyTovtkDataArray(ncolors, "Colors")
-        img.GetPointData().SetScalars(vcolors)
+        img.GetPointData().SetScalars(buffer2array(ncolors, "Colors"))
 
     ndepth = layer.getDepth()
     if ndepth is None:
         raise RuntimeError("Missing 'depth'")
-    ndepth = ndepth.reshape(dims[0]*dims[1])
-    vdepth = dsa.numpyTovtkDataArray(ndepth, "Depth")
-    img.GetPointData().AddArray(vdepth)
+    img.GetPointData().AddArray(buffer2array(ndepth, "Depth", flat=True))
 
     nluminance = layer.getLuminance()
     if nluminance is not None:
-        nluminance = nluminance.reshape((dims[0]*dims[1], -1))
-        vluminance = dsa.numpyTovtkDataArray(nluminance, "Luminance")
-        img.GetPointData().AddArray(vluminance)
+        img.GetPointData().AddArray(buffer2array(nluminance, "Luminance"))
 
     # from paraview.vtk.vtkIOLegacy import vtkDataSetWriter
     # writer = vtkDataSetWriter()
@@ -120,6 +126,11 @@ class FileStoreAPI(object):
         """returns current database spec """
         return ""
 
+    def get_documents(self, queries):
+        """resolves a batch of complete descriptors (e.g. all layer fields of
+        one camera/time pose) at once, see FileStore.get_many()"""
+        return self.fs.get_many(queries)
+
 
 class FileStoreSpecA(FileStoreAPI):
     def __init__(self, fs):
@@ -222,15 +233,12 @@ class FileStoreSpecA(FileStoreAPI):
             dims[0] = ncolors.shape[1]
             dims[1] = ncolors.shape[0]
             img.SetDimensions(dims[0], dims[1], 1)
-            ncolors = ncolors.reshape((dims[0]*dims[1], -1))
-            vcolors = dsa.numpyTovtkDataArray(ncolors, "Colors")
-            img.GetPointData().SetScalars(vcolors)
+            img.GetPointData().SetScalars(buffer2array(ncolors, "Colors"))
 
         nluminance = layer.getLuminance()
         if nluminance is not None:
-            nluminance = nluminance.reshape((dims[0]*dims[1], -1))
-            vluminance = dsa.numpyTovtkDataArray(nluminance, "Luminance")
-            img.GetPointData().AddArray(vluminance)
+            img.GetPointData().AddArray(
+                buffer2array(nluminance, "Luminance"))
 
         return [img]
 
@@ -7,6 +7,7 @@ from __future__ import absolute_import
 import numpy as np
 import math
 from .. import explorers as explorers
+from .. import runner
 from ...images.camera_utils import convert_pose_to_camera
 
 import paraview.simple as simple
@@ -69,6 +70,13 @@ class ImageExplorer(explorers.Explorer):
         # not supported.
         self.ValueMode = ValueMode().FLOATING_POINT
         self.CheckFloatSupport = True
+        # When enabled the depth buffer is grabbed along with each color
+        # render and reused for the depth image of the same camera, color
+        # parameters then vary innermost so that the two are consecutive.
+        self.ShareDepth = False
+        self.__sharedDepth = None
+        # capture buffers reused across explorations, see captureBuffer()
+        self.__buffers = {}
 
         if self.view:
             try:
@@ -108,22 +116,16 @@ class ImageExplorer(explorers.Explorer):
 
         if self.CaptureDepth:
             # Depth capture
-            rep = simple.GetRepresentation()
-            wasVol = rep.Representation == 'Volume'
-            if wasVol:
-                rep.Representation = 'Surface'
-            simple.Render()
-            image = self.view.CaptureDepthBuffer()
-            idata = numpy_support.vtk_to_numpy(image) * 256
-            rw = self.view.GetRenderWindow()
-            width, height = rw.GetSize()
-            try:
-                imageslice = idata.reshape(height, width)
-            except ValueError:
-                imageslice = None
-
-            if wasVol:
-                rep.Representation = 'Volume'
+            imageslice = self.takeSharedDepth(document.descriptor)
+            if imageslice is None:
+                rep = simple.GetRepresentation()
+                wasVol = rep.Representation == 'Volume'
+                if wasVol:
+                    rep.Representation = 'Surface'
+                simple.Render()
+                imageslice = self.captureDepthAsNumpy('depth')
+                if wasVol:
+                    rep.Representation = 'Volume'
 
             document.data = imageslice
             self.CaptureDepth = False
@@ -157,6 +159,7 @@ class ImageExplorer(explorers.Explorer):
                 elif self.ValueMode is ValueMode().FLOATING_POINT:
                     simple.Render()
                     image = self.view.GetValuesFloat()
+                    # a view on the rendered values, not a copy
                     idata = numpy_support.vtk_to_numpy(image)
                     idataMin = idata.min() if len(idata) > 0 else 0
                     idataMax = idata.max() if len(idata) > 0 else 0
@@ -175,10 +178,75 @@ class ImageExplorer(explorers.Explorer):
             else:  # Capture color image
                 imageslice = self.captureWindowRGB()
                 document.data = imageslice
+                if self.ShareDepth:
+                    self.shareDepth(document.descriptor)
 
         if self.iSave:
             super(ImageExplorer, self).insert(document)
 
+    def captureBuffer(self, name, shape, dtype):
+        """ Returns a preallocated array, reused by all captures of the
+        same name, shape and type. Its content is only valid until the next
+        capture of the same name. """
+        key = (name, tuple(shape), np.dtype(dtype))
+        buf = self.__buffers.get(key)
+        if buf is None:
+            buf = np.empty(shape, dtype)
+            self.__buffers[key] = buf
+        return buf
+
+    def captureDepthAsNumpy(self, name):
+        """ Captures the current depth buffer, scaled by 256, into the
+        capture buffer with the given name. Rows are bottom to top, as
+        rendered; the writers take care of the orientation. """
+        image = self.view.CaptureDepthBuffer()
+        idata = numpy_support.vtk_to_numpy(image)
+        rw = self.view.GetRenderWindow()
+        width, height = rw.GetSize()
+        if len(idata) != width * height:
+            return None
+        imageslice = self.captureBuffer(name, (height, width), idata.dtype)
+        np.multiply(idata.reshape(height, width), 256, out=imageslice)
+        return imageslice
+
+    def __depthKey(self, descriptor):
+        colors = set()
+        for track in self.tracks:
+            if isinstance(track, Color):
+                colors.update(track.parameters())
+        return runner.descriptor_key(
+            dict((k, v) for k, v in descriptor.items() if k not in colors))
+
+    def shareDepth(self, descriptor):
+        """ Keeps the depth of the render that just happened around for the
+        depth image of the same camera, see ShareDepth. """
+        self.__sharedDepth = None
+        rep = simple.GetRepresentation()
+        if rep is not None and rep.Representation == 'Volume':
+            # volumes are depth captured as surfaces
+            return
+        depth = self.captureDepthAsNumpy('shareddepth')
+        if depth is not None:
+            self.__sharedDepth = (self.__depthKey(descriptor), depth)
+
+    def takeSharedDepth(self, descriptor):
+        if self.__sharedDepth is None:
+            return None
+        key, depth = self.__sharedDepth
+        self.__sharedDepth = None
+        if key != self.__depthKey(descriptor):
+            return None
+        return depth
+
+    def order_parameters(self, parameters):
+        parameters = super(ImageExplorer, self).order_parameters(parameters)
+        if self.ShareDepth:
+            colors = [p for p in parameters
+                      if any(isinstance(t, Color) and p in t.parameters()
+                             for t in self.tracks)]
+            parameters = [p for p in parameters if p not in colors] + colors
+        return parameters
+
     def captureWindowRGB(self):
         idata, width, height = self.captureWindowAsNumpy()
         imageslice = idata.reshape(height, width, 3)
@@ -291,6 +359,8 @@ class Camera(explorers.Track):
     tracks. This allows the creation of spherical camera stores where the
     user can view the data from many points around it.
     """
+    cost = 0
+
     def __init__(self, center, axis, distance, view):
         super(Camera, self).__init__()
         try:
@@ -330,6 +400,9 @@ class Camera(explorers.Track):
         self.view.CameraViewUp = up
         self.view.CameraFocalPoint = self.center
 
+    def parameters(self):
+        return ['phi', 'theta']
+
 
 class PoseCamera(explorers.Track):
     """
@@ -360,8 +433,11 @@ class PoseCamera(explorers.Track):
         self.view.GetActiveCamera().SetFocalPoint(newf)
         self.view.GetActiveCamera().SetViewUp(newv)
 
+    def parameters(self):
+        return ['pose']
+
 
-class Slice(explorers.Track):
+class Slice(explorers.FilterTrack):
     """
     A track that connects a slice filter to a scalar valued parameter.
     """
@@ -380,7 +456,7 @@ class Slice(explorers.Track):
             self.slice.SliceOffsetValues = [o]
 
 
-class Contour(explorers.Track):
+class Contour(explorers.FilterTrack):
     """
     A track that connects a contour filter to a scalar valued parameter.
     """
@@ -399,7 +475,7 @@ class Contour(explorers.Track):
             self.contour.SetPropertyWithName(self.control, [o])
 
 
-class Clip(explorers.Track):
+class Clip(explorers.FilterTrack):
     """
     A track that connects a clip filter to a scalar valued parameter.
     """
@@ -418,14 +494,14 @@ class Clip(explorers.Track):
             self.clip.Value = o
 
 
-class Templated(explorers.Track):
+class Templated(explorers.FilterTrack):
     """
     A track that connects any type of filter to a scalar valued
     parameter. To use pass in a source proxy (aka filter)
     and the name of method (aka property) to be called on it.
     """
     def __init__(self, parameter, filt, methodName):
-        explorers.Track.__init__(self)
+        explorers.FilterTrack.__init__(self)
 
         self.parameter = parameter
         self.filt = filt
@@ -477,6 +553,8 @@ class Color(explorers.Track):
     """
     A track that connects a parameter to color controls.
     """
+    cost = 5
+
     def __init__(self, parameter, colorlist, rep):
         super(Color, self).__init__()
         self.parameter = parameter
@@ -0,0 +1,183 @@
+"""
+Execution layer for explorers. Splits the descriptor space of an exploration
+across several worker processes, checkpoints completed descriptors so that
+an interrupted run can be resumed, and merges the per-worker results into the
+final store.
+
+Each worker must be able to render on its own, i.e. workers are separate
+(serial or symmetric) processes that each hold the whole visualization, not
+ranks of a single parallel render that composite their images together.
+
+Typical use, in every worker::
+
+    runner.run(explorer, worker=(index, count), checkpointdir=ckdir)
+
+and, once all workers are done, in one process::
+
+    new_files = runner.merge(cs, count, checkpointdir=ckdir)
+"""
+from __future__ import absolute_import
+
+import json
+import os
+
+
+def descriptor_key(descriptor):
+    """ A hashable, order independent identifier for a descriptor. """
+    return json.dumps(descriptor, sort_keys=True)
+
+
+def partition(descriptors, index, count):
+    """
+    Yields the share of descriptors that worker index out of count is
+    responsible for. Descriptors are dealt round robin, so that neighbouring
+    (similarly expensive) descriptors end up on different workers.
+    """
+    if count < 1 or not (0 <= index < count):
+        raise ValueError("invalid worker %d of %d" % (index, count))
+    for i, descriptor in enumerate(descriptors):
+        if i % count == index:
+            yield descriptor
+
+
+def mpi_worker(comm=None):
+    """
+    Returns the (index, count) worker tuple of this rank, uses
+    MPI.COMM_WORLD when no communicator is given.
+    """
+    if comm is None:
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+    return (comm.Get_rank(), comm.Get_size())
+
+
+class Checkpoint(object):
+    """
+    Journal of completed descriptors and the files written for them. The
+    journal is a file with one json record per line, it is appended to (and
+    flushed) after each descriptor, so at most one descriptor is redone when
+    a run is interrupted.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.__completed = {}
+        if os.path.exists(filename):
+            self.__read()
+
+    def __read(self):
+        with open(self.filename, mode="r") as file:
+            lines = file.read().split("\n")
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # a partially written last line from an interrupted run
+                continue
+            key = descriptor_key(record['descriptor'])
+            self.__completed[key] = record['files']
+        if lines[-1]:
+            # terminate the partial line so new records start on their own
+            with open(self.filename, mode="a") as file:
+                file.write("\n")
+
+    def completed(self, descriptor):
+        """ True if the descriptor was finished in an earlier run. """
+        return descriptor_key(descriptor) in self.__completed
+
+    def record(self, descriptor, files):
+        """ Marks the descriptor done, along with the files it produced. """
+        files = [f for d, f in files]
+        self.__completed[descriptor_key(descriptor)] = files
+        dirname = os.path.dirname(self.filename)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        with open(self.filename, mode="a") as file:
+            file.write(json.dumps({'descriptor': descriptor,
+                                   'files': files}) + "\n")
+            file.flush()
+
+    def __len__(self):
+        return len(self.__completed)
+
+    def new_files(self):
+        """ [(descriptor, filename), ...] for every completed descriptor. """
+        result = []
+        for key, files in self.__completed.items():
+            descriptor = json.loads(key)
+            result.extend([(descriptor, f) for f in files])
+        return result
+
+
+def checkpoint_filename(checkpointdir, index):
+    return os.path.join(checkpointdir, "checkpoint.%d.json" % index)
+
+
+def worker_info_filename(checkpointdir, index):
+    return os.path.join(checkpointdir, "info.%d.json" % index)
+
+
+def run(explorer, worker=None, checkpointdir=None, fixedargs=None,
+        progressObject=None):
+    """
+    Runs explorer's share of the exploration. With worker=(index, count) only
+    every count'th descriptor is rendered. With a checkpointdir, descriptors
+    completed by an earlier run are skipped and the worker's view of the
+    store is saved next to its checkpoint for merge() to pick up.
+    """
+    index = worker[0] if worker else 0
+    checkpoint = None
+    if checkpointdir:
+        checkpoint = Checkpoint(checkpoint_filename(checkpointdir, index))
+
+    explorer.explore(fixedargs, progressObject,
+                     worker=worker, checkpoint=checkpoint)
+
+    if checkpointdir:
+        explorer.store.save(worker_info_filename(checkpointdir, index))
+    return checkpoint
+
+
+def _merge_parameters(parameters, other):
+    """ widens valueRanges that workers extended while rendering """
+    for name, param in other.items():
+        if name not in parameters:
+            parameters[name] = param
+            continue
+        ranges = param.get('valueRanges')
+        if not ranges:
+            continue
+        mine = parameters[name].setdefault('valueRanges', {})
+        for array, vrange in ranges.items():
+            if array in mine:
+                mine[array] = [min(mine[array][0], vrange[0]),
+                               max(mine[array][1], vrange[1])]
+            else:
+                mine[array] = vrange
+
+
+def merge(cs, count, checkpointdir):
+    """
+    Folds the info.json entries saved by count workers into the store cs,
+    saves it and returns the combined list of (descriptor, filename) that
+    the workers wrote, including those of earlier, resumed runs.
+    """
+    new_files = []
+    for index in range(count):
+        fname = worker_info_filename(checkpointdir, index)
+        if os.path.exists(fname):
+            with open(fname, mode="r") as file:
+                info_json = json.load(file)
+            params = info_json.get('parameter_list',
+                                   info_json.get('arguments', {}))
+            _merge_parameters(cs.parameter_list, params)
+            for key, value in info_json.get('metadata', {}).items():
+                if not cs.metadata or key not in cs.metadata:
+                    cs.add_metadata({key: value})
+
+        ckfname = checkpoint_filename(checkpointdir, index)
+        if os.path.exists(ckfname):
+            new_files.extend(Checkpoint(ckfname).new_files())
+
+    cs.save()
+    return new_files
@@ -72,7 +72,7 @@ class ImageExplorer(explorers.Explorer):
             self.rw.GetRenderers().GetFirstRenderer().SetPass(self.lp)
 
 
-class Clip(explorers.Track):
+class Clip(explorers.FilterTrack):
     """
     A track that connects clip filters to a scalar valued parameter.
     """
@@ -90,7 +90,7 @@ class Clip(explorers.Track):
             self.clip.SetValue(o)  # <---- the most important thing!
 
 
-class Contour(explorers.Track):
+class Contour(explorers.FilterTrack):
     """
     A track that connects clip filters to a scalar valued parameter.
     """
@@ -151,6 +151,8 @@ class ColorActors(explorers.Track):
     A track that connects a parameter to a choice of surface rendered color
     maps.
     """
+    cost = 5
+
     def __init__(self, parameter, colorlist, actors):
         super(ColorActors, self).__init__()
         self.parameter = parameter
@@ -228,6 +230,8 @@ class Camera(explorers.Track):
     This allows the creation of spherical camera stores where the user can
     view the data from many points around it.
     """
+    cost = 0
+
     def __init__(self, center, axis, distance, camera):
         super(Camera, self).__init__()
         try:
@@ -262,6 +266,9 @@ class Camera(explorers.Track):
         self.camera.SetViewUp(up)
         self.camera.SetFocalPoint(self.center)
 
+    def parameters(self):
+        return ['phi', 'theta']
+
     @staticmethod
     def obtain_angles(angular_steps=[10, 15]):
         thetas = []
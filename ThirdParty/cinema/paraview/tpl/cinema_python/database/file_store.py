@@ -9,6 +9,11 @@ import os
 import sys
 import copy
 import numpy as np
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    # python 2, get_many() falls back to sequential loading
+    ThreadPoolExecutor = None
 
 def py23iteritems(d):
     myit = None
@@ -36,6 +41,9 @@ class FileStore(store.Store):
         self.cached_files = {}
         self.metadata = {}
         self.__new_files = []
+        self.__executor = None
+        # number of threads get_many() reads files with
+        self.max_workers = 4
 
     def create(self):
         """creates a new file store"""
@@ -63,8 +71,8 @@ class FileStore(store.Store):
                 a = info_json['constraints']
             self._set_parameter_associations(a)
 
-    def save(self):
-        """ writes out a modified file store """
+    def save(self, filename=None):
+        """ writes out a modified file store, to filename if given """
         info_json = None
         if (self.get_version_major() < 1 or
             (self.get_version_minor() == 0 and
@@ -83,10 +91,12 @@ class FileStore(store.Store):
                 constraints=self.parameter_associations
             )
 
-        dirname = os.path.dirname(self.__dbfilename)
+        if filename is None:
+            filename = self.__dbfilename
+        dirname = os.path.dirname(filename)
         if not os.path.exists(dirname):
             os.makedirs(dirname)
-        with open(self.__dbfilename, mode="w") as file:
+        with open(filename, mode="w") as file:
             json.dump(info_json, file, sort_keys=True, indent=4)
 
     @property
@@ -329,5 +339,16 @@ class FileStore(store.Store):
         knows exactly what to retrieve."""
         return self._load_data(q)
 
+    def get_many(self, queries):
+        """ batch version of get(), for instance for all the fields of all
+        the layers of one camera/time pose. Files are read concurrently,
+        the documents are returned in the order of the queries."""
+        if (ThreadPoolExecutor is None or self.max_workers < 2 or
+                len(queries) < 2):
+            return [self._load_data(q) for q in queries]
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(self.max_workers)
+        return list(self.__executor.map(self._load_data, queries))
+
     def get_new_files(self):
         return self.__new_files
@@ -364,12 +364,14 @@ class RasterWrangler(object):
         #     character limit
         #     pimg.save(fname)
 
-        imageslice = numpy.flipud(imageslice)
         # Adjust the filename, replace .im with .npz
         baseName, ext = os.path.splitext(fname)
         adjustedName = baseName + ".Z"
 
+        # imageslice is not retained after returning, callers may reuse it
         if self.threadedwriter is not None:
+            # the writer works asynchronously, hand it its own (flipped) copy
+            imageslice = numpy.ascontiguousarray(numpy.flipud(imageslice))
             height = imageslice.shape[1]
             width = imageslice.shape[0]
             contig = imageslice.reshape(height*width)
@@ -379,8 +381,14 @@ class RasterWrangler(object):
             id.GetPointData().SetScalars(vtkarray)
             self.threadedwriter.EncodeAndWrite(id, adjustedName)
         else:
+            # compress rows bottom to top instead of materializing a flipped
+            # copy of the whole buffer
+            compressor = zlib.compressobj()
             with open(adjustedName, mode='wb') as file:
-                file.write(zlib.compress(numpy.array(imageslice)))
+                for row in imageslice[::-1]:
+                    file.write(compressor.compress(
+                        numpy.ascontiguousarray(row)))
+                file.write(compressor.flush())
         return adjustedName
 
     def assertvalidimage(self, filename):
@@ -165,35 +165,23 @@ class Compositor_SpecB(Compositor):
             # most likely came from an RGB render, in which case
             # already in 0..1
             # todo: grab from store.metadata.value_mode !=2 instead
-            pass
+            valueMin = 0.0
+            valueMax = 1.0
         else:
             # from a direct value render, numbers are actual
             if valueRange:
                 # we were given a global range, use it instead of local
-                # range from just this slice
+                # range from just this slice (out of range values, for
+                # example NaN's, are clamped by the lookup)
                 valueMin = valueRange[0]
                 valueMax = valueRange[1]
-                # this provides a way to clamp, for example NaN's
-                foreground[foreground < valueMin] = valueMin
-                foreground[foreground > valueMax] = valueMax
-            valRange = valueMax - valueMin
-            if valRange > 1e-4:
-                foreground = (foreground - valueMin) / valRange
-            else:
+            if valueMax - valueMin <= 1e-4:
                 # no way to know where this single value lies, so use bottom
-                foreground.fill(0.0)
-
-        colorLut = colorLutStruct.lut
-        bins = colorLutStruct.adjustedBins
-
-        colorIndices = np.digitize(foreground, bins)
-        colorIndices = np.subtract(colorIndices, 1)
-
-        shape = rgbVarr.shape
-        valueImage = np.zeros([shape[0], shape[1]], dtype=np.uint32)
-        valueImage[varrIdx[0], varrIdx[1]] = colorIndices
+                valueMax = valueMin
 
-        return colorLut[valueImage]
+        colors = colorLutStruct.mapValues(foreground, (valueMin, valueMax))
+        return self.__scatterColors(rgbVarr.shape, varrIdx, colors,
+                                    colorLutStruct)
 
     def __invertibleToRGB(self, rgbVarr, varrIdx, colorLutStruct):
         '''
@@ -209,22 +197,22 @@ class Compositor_SpecB(Compositor):
 
         value = np.bitwise_or(w0, w1)
         value = np.bitwise_or(value, w2)
-        value = np.subtract(value.astype(np.int32), 1)
-        normalized_val = np.divide(value.astype(float), 0xFFFFFE)
 
-        # Map float value to color lut (use a histogram to support non-uniform
-        # colormaps (fetch bin indices))
-        colorLut = colorLutStruct.lut
-        bins = colorLutStruct.adjustedBins
+        # encoded values are offset by one and span 0..0xFFFFFE, map them
+        # straight to the color table without normalizing first
+        colors = colorLutStruct.mapValues(value, (1.0, float(0xFFFFFF)))
+        return self.__scatterColors(rgbVarr.shape, varrIdx, colors,
+                                    colorLutStruct)
 
-        idx = np.digitize(normalized_val, bins)
-        idx = np.subtract(idx, 1)
-
-        valueImage = np.zeros([rgbVarr.shape[0], rgbVarr.shape[1]],
-                              dtype=np.uint32)
-        valueImage[varrIdx[0], varrIdx[1]] = idx
-
-        return colorLut[valueImage]
+    def __scatterColors(self, shape, varrIdx, colors, colorLutStruct):
+        '''
+        Places the foreground colors into an RGB image, background pixels
+        get the first color of the table.
+        '''
+        image = np.empty([shape[0], shape[1], 3], dtype=np.uint8)
+        image[:, :] = colorLutStruct.table[0]
+        image[varrIdx[0], varrIdx[1]] = colors
+        return image
 
     def __getForegroundPixels(self, depth):
         '''
@@ -2,8 +2,6 @@
 Manages the set of one or more fields that go into a layer.
 """
 
-import copy
-
 
 class LayerRasters(object):
     def __init__(self):
@@ -24,34 +22,47 @@ class LayerRasters(object):
         """ add a query for a particular field of the layer """
         self._fields[img_type] = {fieldname: fieldchoice}
 
+    def queries(self):
+        """
+        Returns the [(img_type, query), ...] pairs for the images that make
+        up the layer, img_type is None for a plain color image.
+        """
+        if len(self._fields) == 0:
+            return [(None, self.dict)]
+        result = []
+        for f in self._fields.keys():
+            query = dict(self.dict)
+            query.update(self._fields[f])
+            result.append((f, query))
+        return result
+
+    def setImages(self, img_types, docs):
+        """
+        Takes the documents found for the img_types returned by queries().
+        """
+        for f, doc in zip(img_types, docs):
+            if doc is None:
+                return
+
+            img = doc.data
+
+            if f is None or f == 'RGB':
+                self._addColor(img)
+            elif f == 'Z':
+                self._setDepth(img)
+            elif f == 'VALUE' or f == 'MAGNITUDE':
+                self._addValues(img)
+            elif f == 'LUMINANCE':
+                self._setLuminance(img)
+
     def loadImages(self, store):
         """
         Take the queries we've been given and get images for them.
         Later call get* to get the images out.
         """
-        nfields = len(self._fields)
-        if nfields == 0:
-            img = store.get(self.dict).data
-            self._addColor(img)
-        else:
-            for f in self._fields.keys():
-                query = copy.deepcopy(self.dict)
-                query.update(self._fields[f])
-
-                foundPaths = store.get(query)
-                if foundPaths is None:
-                    return
-
-                img = foundPaths.data
-
-                if f == 'RGB':
-                    self._addColor(img)
-                elif f == 'Z':
-                    self._setDepth(img)
-                elif f == 'VALUE' or f == 'MAGNITUDE':
-                    self._addValues(img)
-                elif f == 'LUMINANCE':
-                    self._setLuminance(img)
+        queries = self.queries()
+        self.setImages([f for f, q in queries],
+                       [store.get(q) for f, q in queries])
 
     def _setDepth(self, image):
         self.depth = image
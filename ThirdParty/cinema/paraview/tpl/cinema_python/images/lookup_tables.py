@@ -13,21 +13,27 @@ class LookupTable:
     - self.lut          : Actual color LUT.
     - self.x            : Vector containing the value bins.
     - self.adjustedBins : Vector containing the value bins
+    - self.table        : Dense color table sampled from the bins at a fixed
+                          resolution.
     Where adjustedBins is adjusted to hold a value > 1.0 in the end.
     '''
+    # number of entries in the dense color table
+    RESOLUTION = 4096
+
     def __init__(self):
         self.name = 'None'
         self.colorSpace = 'None'
         self.lut = None
         self.x = None
         self.adjustedBins = None
+        self.table = None
 
-    def ingest(self, rgbPoints):
+    def ingest(self, rgbPoints, resolution=None):
         xs = []
         tlut = []
         minx = float("inf")
         maxx = float("-inf")
-        for i in xrange(0, len(rgbPoints), 4):
+        for i in range(0, len(rgbPoints), 4):
             x = rgbPoints[i]
             maxx = x if x > maxx else maxx
             minx = x if x < minx else minx
@@ -56,6 +62,42 @@ class LookupTable:
             bins.append(1.01)  # 1.0 gets its own color so need an extra bin
         self.adjustedBins = bins
 
+        # sample the (possibly non-uniform) bins once, so that mapping
+        # values to colors is a scaled-index gather instead of a bin search
+        if resolution is None:
+            resolution = LookupTable.RESOLUTION
+        samples = np.linspace(0.0, 1.0, resolution)
+        indices = np.digitize(samples, bins) - 1
+        np.clip(indices, 0, len(lut) - 1, out=indices)
+        self.table = lut[indices]
+
+    def getMapping(self, valueRange):
+        '''
+        Returns the (scale, shift) pair that turns values in valueRange into
+        indices of self.table.
+        '''
+        low, high = float(valueRange[0]), float(valueRange[1])
+        span = high - low
+        if span > 0.0:
+            scale = (len(self.table) - 1) / span
+            return (scale, -low * scale)
+        # degenerate range, everything maps to the first color
+        return (0.0, 0.0)
+
+    def mapValues(self, values, valueRange=(0.0, 1.0)):
+        '''
+        Maps an array of values to uint8 RGB colors. Values outside
+        valueRange are clamped to the first/last color of the table.
+        '''
+        scale, shift = self.getMapping(valueRange)
+        indices = np.multiply(values, scale, dtype=np.float64)
+        if shift != 0.0:
+            indices += shift
+        with np.errstate(invalid='ignore'):
+            # NaN's end up clamped to the first color
+            indices = indices.astype(np.intp)
+        return self.table.take(indices, axis=0, mode='clip')
+
 
 class LookupTableManager:
     '''
@@ -19,11 +19,20 @@ class QueryMaker(object):
 
     def __loadLayers(self, layers):
         ''' Loads the required images in the LayerRasters instances.'''
-        # send queries to the store to obtain images
-        lcnt = 0
-        for l in range(0, len(layers)):
-            layers[l].loadImages(self.__store)
-            lcnt += 1
+        # send the queries of all layers to the store at once
+        queries = [l.queries() for l in layers]
+        flat = [q for lq in queries for f, q in lq]
+        get_many = getattr(self.__store, 'get_many', None)
+        if get_many:
+            docs = get_many(flat)
+        else:
+            docs = [self.__store.get(q) for q in flat]
+
+        start = 0
+        for layer, lq in zip(layers, queries):
+            end = start + len(lq)
+            layer.setImages([f for f, q in lq], docs[start:end])
+            start = end
 
     @abc.abstractmethod
     def __createBaseLayerFromQuery(self, query):
@@ -6,6 +6,7 @@ very specific web application.
 from __future__ import absolute_import, division, print_function
 
 import os, sys, types, inspect, traceback, logging, re, json, fnmatch, time
+import collections
 
 # import Twisted reactor for later callback
 from twisted.internet import reactor
@@ -1016,11 +1017,126 @@ class ParaViewWebTimeHandler(ParaViewWebProtocol):
         self.scene.PlayMode = "Snap To TimeSteps"
         self.playing = False
         self.playTime = 0.1 # Time in second
+        # Prefetching of upcoming timesteps while playing, see play()
+        self.prefetch = 0
+        self.prefetchBudget = 0 # In KB, 0 for no limit
+        self.prefetchedTimes = set()
+        self.prefetchStepCost = None # In seconds
+        self.prefetchStepSize = 0 # In KB
+        self.pipelineState = None
+        self.cacheGeometryForAnimation = 0
 
     def nextPlay(self):
+        startTime = time.time()
+        if self.prefetch:
+            self.limitGeometryCache()
         self.updateTime('next')
         if self.playing:
-            reactor.callLater(self.playTime, self.nextPlay)
+            if self.prefetch:
+                self.prefetchTimeSteps(startTime + self.playTime)
+                reactor.callLater(max(0, startTime + self.playTime - time.time()), self.nextPlay)
+            else:
+                reactor.callLater(self.playTime, self.nextPlay)
+
+    def getRepresentedDataSize(self, views):
+        size = 0
+        for view in views:
+            for rep in view.Representations:
+                if rep.SMProxy.IsA('vtkSMRepresentationProxy') and rep.GetProperty('Visibility') and rep.Visibility:
+                    size += rep.GetRepresentedDataInformation().GetMemorySize()
+        return size
+
+    def getPipelineState(self, views):
+        """
+        Returns a value that changes whenever a source or representation
+        gets modified, which makes the representations drop their caches.
+        """
+        proxies = list(servermanager.ProxyManager().GetProxiesInGroup('sources').values())
+        for view in views:
+            proxies.extend(view.Representations)
+        return sorted((proxy.SMProxy.GetGlobalIDAsString(), proxy.SMProxy.GetMTime()) for proxy in proxies)
+
+    def limitGeometryCache(self):
+        """
+        Keeps the cached geometry within the prefetch budget.  The cache of a
+        representation can only be dropped as a whole, which happens when it
+        gets updated without caching, so the next timestep is played without
+        caching when caching it would exceed the budget.
+        """
+        timesteps = list(self.scene.TimeKeeper.TimestepValues)
+        currentTime = self.scene.TimeKeeper.Time
+        nextTime = None
+        if currentTime in timesteps:
+            nextTime = timesteps[(timesteps.index(currentTime) + 1) % len(timesteps)]
+        cacheFull = self.prefetchBudget and \
+            (len(self.prefetchedTimes) + 1) * self.prefetchStepSize > self.prefetchBudget
+        caching = nextTime in self.prefetchedTimes or not cacheFull
+        settings = simple.GetSettingsProxy('GeneralSettings')
+        if settings.CacheGeometryForAnimation != caching:
+            settings.CacheGeometryForAnimation = 1 if caching else 0
+        if not caching:
+            self.prefetchedTimes = set()
+
+    def updateViews(self, views, t):
+        for view in views:
+            view.UseCache = 1
+            view.CacheKey = t
+            view.ViewTime = t
+            view.Update()
+
+    def prefetchTimeSteps(self, deadline):
+        """
+        Updates the views for the upcoming timesteps, with geometry caching
+        enabled, so that playing them only needs to render the cached
+        geometry.  Steps are only prefetched while their measured cost fits
+        before the next frame is due and the cached geometry fits in the
+        memory budget.
+        """
+        timeKeeper = self.scene.TimeKeeper
+        timesteps = list(timeKeeper.TimestepValues)
+        currentTime = timeKeeper.Time
+        if currentTime not in timesteps:
+            return
+        index = timesteps.index(currentTime)
+        upcoming = timesteps[index + 1:] + timesteps[:index]
+
+        views = list(self.scene.ViewModules)
+        pipelineState = self.getPipelineState(views)
+        if pipelineState != self.pipelineState:
+            self.pipelineState = pipelineState
+            self.prefetchedTimes = set()
+        if simple.GetSettingsProxy('GeneralSettings').CacheGeometryForAnimation:
+            # The current time got cached when it was played
+            self.prefetchedTimes.add(currentTime)
+            if not self.prefetchStepSize:
+                self.prefetchStepSize = self.getRepresentedDataSize(views)
+
+        prefetched = False
+        for t in upcoming[:self.prefetch]:
+            if t in self.prefetchedTimes:
+                continue
+            if self.prefetchBudget and (len(self.prefetchedTimes) + 1) * self.prefetchStepSize > self.prefetchBudget:
+                break
+            if self.prefetchStepCost is not None and time.time() + self.prefetchStepCost > deadline:
+                break
+
+            stepStart = time.time()
+            self.updateViews(views, t)
+            stepCost = time.time() - stepStart
+            if self.prefetchStepCost is None:
+                self.prefetchStepCost = stepCost
+            else:
+                self.prefetchStepCost = 0.7 * self.prefetchStepCost + 0.3 * stepCost
+            self.prefetchStepSize = max(self.prefetchStepSize, self.getRepresentedDataSize(views))
+            self.prefetchedTimes.add(t)
+            prefetched = True
+
+        # Bring the views back to the current time
+        if prefetched:
+            self.updateViews(views, currentTime)
+            for view in views:
+                view.UseCache = 0
+            self.pipelineState = self.getPipelineState(views)
 
     # RpcName: updateTime => pv.vcr.action
     @exportRpc("pv.vcr.action")
@@ -1089,10 +1205,26 @@ class ParaViewWebTimeHandler(ParaViewWebProtocol):
         return list(simple.GetAnimationScene().TimeKeeper.TimestepValues)
 
     @exportRpc("pv.time.play")
-    def play(self, deltaT=0.1):
+    def play(self, deltaT=0.1, prefetch=0, prefetchBudget=0):
+        """
+        Plays the animation, advancing one timestep every deltaT seconds.
+        With prefetch > 0, up to that many upcoming timesteps get computed
+        ahead of the playhead, in the time left between frames, and their
+        geometry is cached for at most prefetchBudget MB (0 for no limit).
+        """
         if not self.playing:
             self.playTime = deltaT
             self.playing = True
+            self.prefetch = prefetch
+            self.prefetchBudget = prefetchBudget * 1024
+            self.prefetchedTimes = set()
+            self.prefetchStepCost = None
+            self.prefetchStepSize = 0
+            self.pipelineState = None
+            if prefetch:
+                settings = simple.GetSettingsProxy('GeneralSettings')
+                self.cacheGeometryForAnimation = settings.CacheGeometryForAnimation
+                settings.CacheGeometryForAnimation = 1
             self.getApplication().InvokeEvent('StartInteractionEvent')
             self.nextPlay()
 
@@ -1100,6 +1232,9 @@ class ParaViewWebTimeHandler(ParaViewWebProtocol):
     def stop(self):
         self.getApplication().InvokeEvent('EndInteractionEvent')
         self.playing = False
+        if self.prefetch:
+            simple.GetSettingsProxy('GeneralSettings').CacheGeometryForAnimation = self.cacheGeometryForAnimation
+            self.prefetch = 0
 
 # =============================================================================
 #
@@ -1118,6 +1253,10 @@ class ParaViewWebColorManager(ParaViewWebProtocol):
         for i in range(self.presets.GetNumberOfPresets()):
             if showBuiltin or not self.presets.IsPresetBuiltin(i):
                 self.colorMapNames.append(self.presets.GetPresetName(i))
+        # (preset name, number of samples) -> base-64 png image
+        self.presetImageCache = {}
+        # representation id -> ((lut mtime, range, number of samples), image)
+        self.lutImageCache = {}
 
     # RpcName: getScalarBarVisibilities => pv.color.manager.scalarbar.visibility.get
     @exportRpc("pv.color.manager.scalarbar.visibility.get")
@@ -1443,16 +1582,11 @@ class ParaViewWebColorManager(ParaViewWebProtocol):
         simple.Render();
         self.getApplication().InvokeEvent('UpdateEvent')
 
-    # RpcName: getLutImage => pv.color.manager.lut.image.get
-    @exportRpc("pv.color.manager.lut.image.get")
-    def getLutImage(self, representation, numSamples, customRange=None):
-        repProxy = self.mapIdToProxy(representation)
-        lut = repProxy.LookupTable.GetClientSideObject()
-
-        dataRange = customRange
-        if not dataRange:
-            dataRange = lut.GetRange()
-
+    #--------------------------------------------------------------------------
+    # Encode numSamples colors of a lookup table, evenly spread over dataRange,
+    # as a base-64 png image.
+    #--------------------------------------------------------------------------
+    def encodeLutImage(self, lut, dataRange, numSamples, encoder):
         delta = (dataRange[1] - dataRange[0]) / float(numSamples)
 
         colorArray = vtkUnsignedCharArray()
@@ -1470,54 +1604,68 @@ class ParaViewWebColorManager(ParaViewWebProtocol):
         # Add the color array to an image data
         imgData = vtkImageData()
         imgData.SetDimensions(numSamples, 1, 1)
-        aIdx = imgData.GetPointData().SetScalars(colorArray)
+        imgData.GetPointData().SetScalars(colorArray)
 
         # Use the vtk data encoder to base-64 encode the image as png, using no compression
+        return encoder.EncodeAsBase64Png(imgData, 0)
+
+    # RpcName: getLutImage => pv.color.manager.lut.image.get
+    @exportRpc("pv.color.manager.lut.image.get")
+    def getLutImage(self, representation, numSamples, customRange=None):
+        repProxy = self.mapIdToProxy(representation)
+        lut = repProxy.LookupTable.GetClientSideObject()
+
+        dataRange = customRange
+        if not dataRange:
+            dataRange = lut.GetRange()
+
+        # Only rasterize again when the lookup table changed
+        cacheKey = (lut.GetMTime(), tuple(dataRange), numSamples)
+        cached = self.lutImageCache.get(representation)
+        if cached and cached[0] == cacheKey:
+            return { 'range': dataRange, 'image': cached[1] }
+
         encoder = vtkDataEncoder()
         # two calls in a row crash on Windows - bald timing hack to avoid the crash.
         time.sleep(0.01);
-        b64Str = encoder.EncodeAsBase64Png(imgData, 0)
+        b64Str = self.encodeLutImage(lut, dataRange, numSamples, encoder)
+        self.lutImageCache[representation] = (cacheKey, b64Str)
 
         return { 'range': dataRange, 'image': b64Str }
 
+    # RpcName: getLutImages => pv.color.manager.lut.image.all
     @exportRpc("pv.color.manager.lut.image.all")
-    def getLutImages(self, numSamples):
-        colorArray = vtkUnsignedCharArray()
-        colorArray.SetNumberOfComponents(3)
-        colorArray.SetNumberOfTuples(numSamples)
-
-        pxm = simple.servermanager.ProxyManager()
-        lutProxy = pxm.NewProxy('lookup_tables', 'PVLookupTable')
-        lut = lutProxy.GetClientSideObject()
-        dataRange = lut.GetRange()
-        delta = (dataRange[1] - dataRange[0]) / float(numSamples)
-
-        # Add the color array to an image data
-        imgData = vtkImageData()
-        imgData.SetDimensions(numSamples, 1, 1)
-        imgData.GetPointData().SetScalars(colorArray)
+    def getLutImages(self, numSamples, names=None):
+        """
+        Returns the images of all the color map presets, or of the ones listed
+        in names, in a single response:
 
-        # Use the vtk data encoder to base-64 encode the image as png, using no compression
-        encoder = vtkDataEncoder()
+        { 'Cool to Warm': 'iVBORw0KGgo...', 'Rainbow Desaturated': ... }
 
-        # Result container
-        result = {}
+        Images are rasterized once per preset and number of samples.
+        """
+        if names is None:
+            names = self.colorMapNames
 
-        # Loop over all presets
-        for name in self.colorMapNames:
-            lutProxy.ApplyPreset(name, True)
-            rgb = [ 0, 0, 0 ]
-            for i in range(numSamples):
-                lut.GetColor(dataRange[0] + float(i) * delta, rgb)
-                r = int(round(rgb[0] * 255))
-                g = int(round(rgb[1] * 255))
-                b = int(round(rgb[2] * 255))
-                colorArray.SetTuple3(i, r, g, b)
+        missing = [ name for name in names if (name, numSamples) not in self.presetImageCache ]
+        if missing:
+            pxm = simple.servermanager.ProxyManager()
+            lutProxy = pxm.NewProxy('lookup_tables', 'PVLookupTable')
+            lut = lutProxy.GetClientSideObject()
+            dataRange = lut.GetRange()
+            encoder = vtkDataEncoder()
 
-            result[name] = encoder.EncodeAsBase64Png(imgData, 0)
+            for name in missing:
+                if lutProxy.ApplyPreset(name, True):
+                    self.presetImageCache[(name, numSamples)] = \
+                        self.encodeLutImage(lut, dataRange, numSamples, encoder)
 
-        simple.Delete(lutProxy)
+            simple.Delete(lutProxy)
 
+        result = {}
+        for name in names:
+            if (name, numSamples) in self.presetImageCache:
+                result[name] = self.presetImageCache[(name, numSamples)]
         return result
 
     # RpcName: setSurfaceOpacity => pv.color.manager.surface.opacity.set
@@ -1620,6 +1768,8 @@ class ParaViewWebProxyManager(ParaViewWebProtocol):
         self.groupProxyEditorPropertyWidget = groupProxyEditorWidgets
         self.respectPropertyGroups = respectPropertyGroups
         self.proxyDefinitionCache = {}
+        self.proxyDetailsCache = {}
+        self.definitionGeneration = 0
         self.domainFunctionMap = { "vtkSMBooleanDomain": booleanDomainDecorator,
                                    "vtkSMProxyListDomain": proxyListDomainDecorator,
                                    "vtkSMIntRangeDomain": numberRangeDomainDecorator,
@@ -1676,6 +1826,12 @@ class ParaViewWebProxyManager(ParaViewWebProtocol):
                 self.open(fileToLoad)
 
         self.simpleTypes = [int, float, list, str]
+
+        # Proxy definitions only change when plugins or custom filters are loaded
+        definitionManager = servermanager.ActiveConnection.Session.GetProxyDefinitionManager()
+        definitionManager.AddObserver(definitionManager.ProxyDefinitionsUpdated, self.clearDefinitionCaches)
+        definitionManager.AddObserver(definitionManager.CompoundProxyDefinitionsUpdated, self.clearDefinitionCaches)
+
         self.view = simple.GetRenderView()
         simple.SetActiveView(self.view)
         simple.Render()
@@ -1740,6 +1896,22 @@ class ParaViewWebProxyManager(ParaViewWebProtocol):
         self.proxyDefinitionCache[cacheKey] = xmlElement
         return xmlElement
 
+    #--------------------------------------------------------------------------
+    # Forget everything derived from the proxy definitions, called when they
+    # get updated (e.g. a plugin got loaded)
+    #--------------------------------------------------------------------------
+    def clearDefinitionCaches(self, *args):
+        self.proxyDefinitionCache = {}
+        self.proxyDetailsCache = {}
+        self.definitionGeneration += 1
+
+    #--------------------------------------------------------------------------
+    # Key identifying the static metadata of a proxy type, changes whenever
+    # the proxy definitions get updated.
+    #--------------------------------------------------------------------------
+    def getProxyDefinitionKey(self, proxy):
+        return '%s:%s:%d' % (proxy.GetXMLGroup(), proxy.GetXMLName(), self.definitionGeneration)
+
     #--------------------------------------------------------------------------
     # Look higher up in XML hierarchy for attributes on a property (useful if
     # a property is an exposed property).  From the documentation of vtkSMProperty,
@@ -2010,9 +2182,87 @@ class ParaViewWebProxyManager(ParaViewWebProtocol):
                     self.processXmlElement(proxy, xmlChild, inPropGroup, group, parentGroup, belongsToProxyProperty)
 
     #--------------------------------------------------------------------------
-    # Entry point for the xml processing methods.
+    # List the ids of a proxy and of the proxies of its proxy list domains, in
+    # an order that only depends on the proxy type.
+    #--------------------------------------------------------------------------
+    def getProxyIdList(self, proxy, idList=None):
+        if idList is None:
+            idList = []
+        smproxy = proxy.SMProxy if hasattr(proxy, 'SMProxy') else proxy
+        idList.append(smproxy.GetGlobalIDAsString())
+        for prop in servermanager.PropertyIterator(smproxy):
+            if prop.IsA('vtkSMProxyProperty'):
+                domain = prop.FindDomain('vtkSMProxyListDomain')
+                if domain:
+                    for i in range(domain.GetNumberOfProxies()):
+                        self.getProxyIdList(domain.GetProxy(i), idList)
+        return idList
+
+    #--------------------------------------------------------------------------
+    # Entry point for the xml processing methods.  The xml only needs to be
+    # processed once per proxy type, other proxies of the same type reuse
+    # those results with their own ids substituted.
     #--------------------------------------------------------------------------
     def getProxyXmlDefinitions(self, proxy):
+        cacheKey = self.getProxyDefinitionKey(proxy)
+        idList = self.getProxyIdList(proxy)
+        cached = self.proxyDetailsCache.get(cacheKey)
+        if cached is None or len(cached['ids']) != len(idList):
+            self.processProxyXmlDefinitions(proxy)
+            self.proxyDetailsCache[cacheKey] = {
+                'ids': idList,
+                'orderedNameList': self.orderedNameList,
+                'propertyDetailsMap': self.propertyDetailsMap,
+                'groupDetailsMap': self.groupDetailsMap
+            }
+            return
+
+        self.proxyIsRepresentation = proxy.GetXMLGroup() == 'representations'
+        self.proxyPropertyDependents = {}
+        idMap = {}
+        for cachedId, proxyId in zip(cached['ids'], idList):
+            if cachedId != proxyId:
+                idMap[cachedId] = proxyId
+
+        if not idMap:
+            self.orderedNameList = cached['orderedNameList']
+            self.propertyDetailsMap = cached['propertyDetailsMap']
+            self.groupDetailsMap = cached['groupDetailsMap']
+            return
+
+        # Keys and groups are prefixed by the id of the proxy they belong to,
+        # unlabeled groups also carry it in their name
+        def translateName(name, prefix):
+            unlabeled = 'Unlabeled Property Group (%s)'
+            if name == unlabeled % prefix:
+                return unlabeled % idMap[prefix]
+            return name
+
+        def translate(key):
+            if key is None:
+                return None
+            prefix, sep, suffix = key.partition(':')
+            if prefix not in idMap:
+                return key
+            return idMap[prefix] + sep + translateName(suffix, prefix)
+
+        self.orderedNameList = [ translate(name) for name in cached['orderedNameList'] ]
+        self.propertyDetailsMap = {}
+        for key, details in iteritems(cached['propertyDetailsMap']):
+            if 'group' in details:
+                details = dict(details, group=translate(details['group']), parentGroup=translate(details['parentGroup']))
+            self.propertyDetailsMap[translate(key)] = details
+        self.groupDetailsMap = {}
+        for key, details in iteritems(cached['groupDetailsMap']):
+            prefix = key.partition(':')[0]
+            if prefix in idMap:
+                details = dict(details, groupName=translateName(details['groupName'], prefix))
+            self.groupDetailsMap[translate(key)] = details
+
+    #--------------------------------------------------------------------------
+    # Process the xml definition of a proxy and of its sub-proxies.
+    #--------------------------------------------------------------------------
+    def processProxyXmlDefinitions(self, proxy):
         self.orderedNameList = []
         self.propertyDetailsMap = {}
         self.groupDetailsMap = {}
@@ -2644,14 +2894,17 @@ class ParaViewWebProxyManager(ParaViewWebProtocol):
     @exportRpc("pv.proxy.manager.get")
     def get(self, proxyId, ui=True):
         """
-        Returns the proxy state for the given proxyId as a JSON object.
+        Returns the proxy state for the given proxyId as a JSON object.  The
+        'definition' key of the result identifies the proxy type and changes
+        when proxy definitions get updated (e.g. a plugin got loaded).
         """
         proxyProperties = []
         proxyId = str(proxyId)
         self.fillPropertyList(proxyId, proxyProperties)
 
         proxyProperties, groupsInfo = self.reorderProperties(proxyId, proxyProperties)
-        proxyJson = { 'id': proxyId }
+        proxy = self.mapIdToProxy(proxyId)
+        proxyJson = { 'id': proxyId, 'definition': self.getProxyDefinitionKey(proxy) }
 
         # Perform costly request only when needed
         uiProperties = None
@@ -2668,8 +2921,6 @@ class ParaViewWebProxyManager(ParaViewWebProtocol):
         if 'specialHints' in self.propertyDetailsMap:
             proxyJson['hints'] = self.propertyDetailsMap['specialHints']
 
-        proxy = self.mapIdToProxy(proxyId)
-
         if proxy.SMProxy.IsA('vtkSMRepresentationProxy') == 1:
             colorInfo = self.getColorInformation(proxy)
             proxyJson['colorBy'] = colorInfo
@@ -3042,7 +3293,7 @@ class ParaViewWebStateLoader(ParaViewWebProtocol):
 
 class ParaViewWebFileListing(ParaViewWebProtocol):
 
-    def __init__(self, basePath, name, excludeRegex=r"^\.|~$|^\$", groupRegex=r"[0-9]+\.", **kwargs):
+    def __init__(self, basePath, name, excludeRegex=r"^\.|~$|^\$", groupRegex=r"[0-9]+\.", cacheSize=64, **kwargs):
         """
         Configure the way the WebFile browser will expose the server content.
          - basePath: specify the base directory (or directories) that we should start with, if this
@@ -3051,6 +3302,8 @@ class ParaViewWebFileListing(ParaViewWebProtocol):
          will be given the name associated with the directory in the argument.
          - name: Name of that base directory that will show up on the web
          - excludeRegex: Regular expression of what should be excluded from the list of files/directories
+         - cacheSize: Number of directory listings kept, a listing is reused until the
+         modification time of its directory changes
         """
         self.setBaseDirectory(basePath)
 
@@ -3061,8 +3314,75 @@ class ParaViewWebFileListing(ParaViewWebProtocol):
         self.directory_proxy = pxm.NewProxy('misc', 'ListDirectory')
         self.fileList = simple.servermanager.VectorProperty(self.directory_proxy,self.directory_proxy.GetProperty('FileList'))
         self.directoryList = simple.servermanager.VectorProperty(self.directory_proxy,self.directory_proxy.GetProperty('DirectoryList'))
+        self.cacheSize = cacheSize
+        # path -> (mtime, listing), least recently used first
+        self.listingCache = collections.OrderedDict()
+
+    def listNames(self, prop):
+        if len(prop) > 1:
+            names = prop.GetData()
+        elif len(prop) == 1:
+            names = [ prop.GetData() ]
+        else:
+            names = []
+        return [ n for n in names if not self.pattern.search(n) ]
 
-    def handleSingleRoot(self, baseDirectory, relativeDir, startPath=None):
+    def listDirectory(self, currentPath):
+        """
+        Returns the directories, files and file sequences of a directory,
+        files only being listed once, either by themselves or in a sequence.
+        """
+        self.directory_proxy.List(currentPath)
+        self.directory_proxy.UpdatePropertyInformation()
+
+        files = sorted(self.listNames(self.fileList))
+        dirs = self.listNames(self.directoryList)
+
+        # Files matching the group pattern with the same prefix and suffix
+        # form a sequence, unless they are alone.
+        groups = []
+        groupIdx = {}
+        for f in files:
+            fileSplit = re.split(self.gPattern, f)
+            if len(fileSplit) == 2:
+                gName = '*.'.join(fileSplit)
+                if gName not in groupIdx:
+                    groupIdx[gName] = { 'files' : [], 'label': gName }
+                    groups.append(groupIdx[gName])
+                groupIdx[gName]['files'].append(f)
+        groups = [ g for g in groups if len(g['files']) > 1 ]
+        grouped = set()
+        for g in groups:
+            grouped.update(g['files'])
+        files = [ f for f in files if f not in grouped ]
+
+        return { 'files': files, 'dirs': dirs, 'groups': groups }
+
+    def getDirectoryListing(self, currentPath):
+        """
+        Returns listDirectory(currentPath), reusing the listing made last time
+        unless the directory was modified since. The modification time is
+        only known when the data server runs in this process, so directories
+        of a remote server, or that cannot be stat'ed, are listed every time.
+        """
+        mtime = None
+        if not servermanager.ActiveConnection.IsRemote():
+            try:
+                mtime = os.stat(currentPath).st_mtime
+            except OSError:
+                pass
+        cached = self.listingCache.pop(currentPath, None)
+        if cached and mtime is not None and cached[0] == mtime:
+            listing = cached[1]
+        else:
+            listing = self.listDirectory(currentPath)
+        if mtime is not None:
+            self.listingCache[currentPath] = (mtime, listing)
+            while len(self.listingCache) > self.cacheSize:
+                self.listingCache.popitem(last=False)
+        return listing
+
+    def handleSingleRoot(self, baseDirectory, relativeDir, startPath=None, offset=0, limit=None):
         path = startPath or [ self.rootName ]
         if len(relativeDir) > len(self.rootName):
             relativeDir = relativeDir[len(self.rootName)+1:]
@@ -3080,76 +3400,49 @@ class ParaViewWebFileListing(ParaViewWebProtocol):
             print ("### CAUTION ==========================================")
             currentPath = normBase
 
-        self.directory_proxy.List(currentPath)
-        self.directory_proxy.UpdatePropertyInformation()
-
-        # build file/dir lists
-        files = []
-        if len(self.fileList) > 1:
-            for f in self.fileList.GetData():
-                if not re.search(self.pattern, f):
-                    files.append( { 'label': f })
-        elif len(self.fileList) == 1 and not re.search(self.pattern, self.fileList.GetData()):
-            files.append( { 'label': self.fileList.GetData() })
-
-        dirs = []
-        if len(self.directoryList) > 1:
-            for d in self.directoryList.GetData():
-                if not re.search(self.pattern, d):
-                    dirs.append(d)
-        elif len(self.directoryList) == 1 and not re.search(self.pattern, self.directoryList.GetData()):
-            dirs.append(self.directoryList.GetData())
-
-        result =  { 'label': relativeDir, 'files': files, 'dirs': dirs, 'groups': [], 'path': path }
+        listing = self.getDirectoryListing(currentPath)
+        files = listing['files']
+        groups = listing['groups']
+        if limit is not None:
+            files = files[offset:offset + limit]
+            groups = groups[offset:offset + limit]
+
+        result =  { 'label': relativeDir,
+                    'files': [ { 'label': f } for f in files ],
+                    'dirs': list(listing['dirs']),
+                    'groups': [ { 'files': g['files'], 'label': g['label'] } for g in groups ],
+                    'path': path }
         if relativeDir == '.':
             result['label'] = self.rootName
-
-        # Filter files to create groups. Dicts are not orderable in Py3 - supply a key function.
-        files.sort(key=lambda x: x["label"])
-        groups = result['groups']
-        groupIdx = {}
-        filesToRemove = []
-        for file in files:
-            fileSplit = re.split(self.gPattern, file['label'])
-            if len(fileSplit) == 2:
-                filesToRemove.append(file)
-                gName = '*.'.join(fileSplit)
-                if gName in groupIdx:
-                    groupIdx[gName]['files'].append(file['label'])
-                else:
-                    groupIdx[gName] = { 'files' : [file['label']], 'label': gName }
-                    groups.append(groupIdx[gName])
-        for file in filesToRemove:
-            gName = '*.'.join(re.split(self.gPattern, file['label']))
-            if len(groupIdx[gName]['files']) > 1:
-                files.remove(file)
-            else:
-                groups.remove(groupIdx[gName])
+        if limit is not None:
+            result['offset'] = offset
+            result['totals'] = { 'files': len(listing['files']), 'groups': len(listing['groups']) }
 
         return result
 
-    def handleMultiRoot(self, relativeDir):
+    def handleMultiRoot(self, relativeDir, offset=0, limit=None):
         if relativeDir == '.':
             return { 'label': self.rootName, 'files': [], 'dirs': list(self.baseDirectoryMap), 'groups': [], 'path': [ self.rootName ] }
 
         pathList = relativeDir.replace('\\', '/').split('/')
         currentBaseDir = self.baseDirectoryMap[pathList[1]]
         if len(pathList) == 2:
-            return self.handleSingleRoot(currentBaseDir, '.', pathList)
+            return self.handleSingleRoot(currentBaseDir, '.', pathList, offset, limit)
         else:  # must be greater than 2
-            return self.handleSingleRoot(currentBaseDir, '/'.join([pathList[0]] + pathList[2:]), pathList[0:2])
+            return self.handleSingleRoot(currentBaseDir, '/'.join([pathList[0]] + pathList[2:]), pathList[0:2], offset, limit)
 
     # RpcName: listServerDirectory => file.server.directory.list
     @exportRpc("file.server.directory.list")
-    def listServerDirectory(self, relativeDir='.'):
+    def listServerDirectory(self, relativeDir='.', offset=0, limit=None):
         """
         RPC Callback to list a server directory relative to the basePath
-        provided at start-up.
+        provided at start-up. When a limit is given, only that many files and
+        file groups are returned, starting at offset, along with their totals.
         """
         if self.multiRoot == True:
-            return self.handleMultiRoot(relativeDir)
+            return self.handleMultiRoot(relativeDir, offset, limit)
         else:
-            return self.handleSingleRoot(self.baseDirectory, relativeDir)
+            return self.handleSingleRoot(self.baseDirectory, relativeDir, offset=offset, limit=limit)
 
 # =============================================================================
 #
@@ -2944,11 +2944,17 @@ __colorMapsXML = """
   </ColorMap>
 </ColorMaps>
 """
+__colorMapsParser = None
+
 def getColorMaps():
-    """Returns the vtkPVXMLElement instance for the default (legacy) color maps"""
-    global __colorMapsXML
-    from paraview.modules.vtkPVCore import vtkPVXMLParser
-    parser = vtkPVXMLParser()
-    if parser.Parse(__colorMapsXML):
-        return parser.GetRootElement()
-    return None
+    """Returns the vtkPVXMLElement instance for the default (legacy) color maps.
+    The XML is only parsed on the first call, the element returned is shared
+    and must not be modified."""
+    global __colorMapsXML, __colorMapsParser
+    if __colorMapsParser is None:
+        from paraview.modules.vtkPVCore import vtkPVXMLParser
+        parser = vtkPVXMLParser()
+        if not parser.Parse(__colorMapsXML):
+            return None
+        __colorMapsParser = parser
+    return __colorMapsParser.GetRootElement()
@@ -2,7 +2,8 @@
 This module has utilities to benchmark paraview.
 
 logbase contains core routines for collecting and gathering timing logs from
-all nodes.
+all nodes, and for saving them to log archives that runs can be appended to
+and partially loaded from.
 logparser contains additional routines for parsing the raw logs and
 calculating statistics across ranks and frames.
 
@@ -11,6 +12,14 @@ of spheres and moves the camera around the scene.  To run the benchmark,
 either explicitly import manyspheres from paraview.benchmark and call it's
 run method, or call the manyspheres.py module directly via pvbatch or pvpython.
 
+tracestate measures Python trace and Python state generation for pipelines
+of 100, 1,000 and 10,000 proxies. It's run the same way as manyspheres.
+
+pythonlayer has microbenchmarks of paraview.servermanager and paraview.simple
+(proxy creation, property sets, source lookups, tracing, state generation and
+Fetch), whose results can be saved to a log archive and compared to a
+baseline. It's run the same way as manyspheres.
+
 ::
 
     TODO: this doesn't handle split render/data server mode
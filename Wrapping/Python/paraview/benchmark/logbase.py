@@ -98,36 +98,218 @@ def get_memuse() :
                            'hu': infos.GetHostMemoryUse(i)})
     return retval
 
+# Log archives are zip files holding, for each run appended to them, a JSON
+# header (runNNNN.json), the raw log text (runNNNN/text.txt) and, when NumPy
+# is available, the entries parsed by logparser.LogColumns as compressed
+# arrays (runNNNN/*.npy), one per column. Runs, and columns of a run, can
+# thus be loaded separately.
+ARCHIVE_VERSION = 1
+
+def _run_prefix(run):
+    return 'run%04d' % run
+
+def _archive_runs(archive):
+    return sorted(int(n[3:-5]) for n in archive.namelist()
+                  if n.startswith('run') and n.endswith('.json'))
+
+def _write_array(archive, name, array):
+    import io
+    import numpy
+    stream = io.BytesIO()
+    numpy.lib.format.write_array(stream, numpy.ascontiguousarray(array),
+                                 allow_pickle=False)
+    archive.writestr(name, stream.getvalue())
+
+def _read_array(archive, name):
+    import io
+    import numpy
+    return numpy.lib.format.read_array(io.BytesIO(archive.read(name)),
+                                       allow_pickle=False)
+
+def append_logs( filename, metadata=None ) :
+    """
+    Appends the logs we've gathered to a log archive as a new run, creating
+    the archive if needed, and returns the index of the run. metadata is a
+    dict of JSON values saved in the run's header, e.g. to describe the
+    benchmark and its parameters.
+    """
+    import json
+    import time
+    import zipfile
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    from .logparser import LogColumns
+    global logs
+
+    # the entries are only parsed to columns when they can be saved.
+    comp_columns = {}
+    for log in logs if numpy else []:
+        comp_columns.setdefault(log.component, LogColumns()).feed_lines(
+            log.lines, log.rank)
+
+    # a single table of entry names for all the components.
+    names = []
+    name_keys = {}
+    components = []
+    parts = []
+    for component, log_columns in comp_columns.items():
+        columns = log_columns.columns()
+        remap = numpy.array([name_keys.setdefault(n, len(name_keys))
+                             for n in log_columns.Names], dtype=numpy.int32)
+        columns['Key'] = remap[columns['Key']] if len(remap) else columns['Key']
+        columns['Component'] = numpy.full(len(columns['Key']), len(components),
+                                          dtype=numpy.int32)
+        components.append(component)
+        parts.append(columns)
+    for name, key in sorted(name_keys.items(), key=lambda item: item[1]):
+        names.append(list(name))
+
+    texts = [('\n'.join(log.lines)).encode('utf-8') for log in logs]
+
+    with zipfile.ZipFile(filename, 'a', zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+        runs = _archive_runs(archive)
+        run = runs[-1] + 1 if runs else 0
+        prefix = _run_prefix(run)
+        column_names = []
+        if numpy:
+            column_names = ['Component', 'Rank', 'Frame', 'Indent', 'Key', 'Duration']
+        for c in column_names:
+            if parts:
+                values = numpy.concatenate([p[c] for p in parts])
+            else:
+                values = numpy.zeros(0, dtype=numpy.float64 if c == 'Duration' else numpy.int32)
+            _write_array(archive, '%s/%s.npy' % (prefix, c), values)
+        archive.writestr(prefix + '/text.txt', b''.join(texts))
+        header = {'version': ARCHIVE_VERSION,
+                  'time': time.time(),
+                  'metadata': metadata or {},
+                  'components': components,
+                  'names': names,
+                  'columns': column_names,
+                  'logs': [{'runmode': log.runmode, 'servertype': log.servertype,
+                            'component': log.component, 'rank': log.rank,
+                            'size': len(text)}
+                           for log, text in zip(logs, texts)]}
+        archive.writestr(prefix + '.json', json.dumps(header))
+    return run
+
 def dump_logs( filename ) :
     """
     This saves off the logs we've gathered.
     Ot allows you to run a benchmark somewhere, save off all of the details in
     raw format, then load them somewhere else. You can then do a detailed
     analysis and you always have the raw data to go back to.
+    The logs are saved as a log archive with a single run, see append_logs().
     """
-    import pickle
-    global logs
-    if sys.version_info < (3,):
-        f = open(filename, "w")
-    else:
-        f = open(filename, "wb")
-    pickle.dump(logs, f)
-    f.close()
+    import os
+    if os.path.exists(filename):
+        os.remove(filename)
+    append_logs(filename)
 
-def import_logs( filename ) :
+def list_runs( filename ) :
+    """
+    Returns the JSON headers of the runs in a log archive, without loading
+    any of their logs. Each header has the 'metadata' and 'time' of the run,
+    the 'components' and the entry 'names' (pairs of id and name) the columns
+    refer to, and the 'logs' of the run.
+    """
+    import json
+    import zipfile
+    with zipfile.ZipFile(filename, 'r') as archive:
+        return [json.loads(archive.read(_run_prefix(run) + '.json').decode('utf-8'))
+                for run in _archive_runs(archive)]
+
+def load_columns( filename, run=-1, ranks=None, frames=None, names=None,
+                  components=None, columns=None ) :
+    """
+    Loads the parsed entries of a run of a log archive (the last one by
+    default) as a dict of NumPy arrays, one per column: Component, Rank,
+    Frame, Indent, Key and Duration. Only the columns in columns are
+    returned if given. Component and Key index the 'components' and 'names'
+    of the run's header, returned along with the dict.
+
+    Only the entries of the given ranks, frames, entry names and components
+    are kept if any of them is given. The raw log text is not loaded.
+    """
+    import json
+    import zipfile
+    import numpy
+    with zipfile.ZipFile(filename, 'r') as archive:
+        runs = _archive_runs(archive)
+        prefix = _run_prefix(runs[run])
+        header = json.loads(archive.read(prefix + '.json').decode('utf-8'))
+        if not header['columns']:
+            raise RuntimeError('The run was saved without NumPy, its entries '
+                               'can only be loaded with import_logs().')
+        if columns is None:
+            columns = header['columns']
+
+        filters = []
+        if ranks is not None:
+            filters.append(('Rank', list(ranks)))
+        if frames is not None:
+            filters.append(('Frame', list(frames)))
+        if names is not None:
+            names = set(names)
+            filters.append(('Key', [key for key, (entry_id, name) in
+                                    enumerate(header['names']) if name in names]))
+        if components is not None:
+            components = set(components)
+            filters.append(('Component', [key for key, c in
+                                          enumerate(header['components']) if c in components]))
+
+        result = {}
+        keep = None
+        for c, values in filters:
+            result[c] = _read_array(archive, '%s/%s.npy' % (prefix, c))
+            selected = numpy.isin(result[c], values)
+            keep = selected if keep is None else keep & selected
+        for c in columns:
+            if c not in result:
+                result[c] = _read_array(archive, '%s/%s.npy' % (prefix, c))
+    for c in list(result):
+        if c not in columns:
+            del result[c]
+        elif keep is not None:
+            result[c] = result[c][keep]
+    return result, header
+
+def import_logs( filename, run=-1 ) :
     """
     This is for bringing in a saved log files and parse it after the fact.
+    Restores the raw logs of a run of a log archive (the last one by default).
+    Files saved with pickle by older versions are still read, only use these
+    with files you trust.
     TODO: add an option to load in raw paraview logs in text format
     """
-    import pickle
+    import json
+    import zipfile
     global logs
     logs = []
-    if sys.version_info < (3,):
-        f = open(filename, "r")
-    else:
-        f = open(filename, "rb")
-    logs = pickle.load(f)
-    f.close()
+    if not zipfile.is_zipfile(filename):
+        import pickle
+        if sys.version_info < (3,):
+            f = open(filename, "r")
+        else:
+            f = open(filename, "rb")
+        logs = pickle.load(f)
+        f.close()
+        return
+
+    with zipfile.ZipFile(filename, 'r') as archive:
+        prefix = _run_prefix(_archive_runs(archive)[run])
+        header = json.loads(archive.read(prefix + '.json').decode('utf-8'))
+        text = archive.read(prefix + '/text.txt')
+    offset = 0
+    for info in header['logs']:
+        alog = OneLog(info['runmode'], info['servertype'], rank=info['rank'])
+        alog.component = info['component']
+        chunk = text[offset:offset + info['size']]
+        offset += info['size']
+        alog.lines = chunk.decode('utf-8').split('\n') if chunk else []
+        logs.append(alog)
 
 def get_logs() :
     """
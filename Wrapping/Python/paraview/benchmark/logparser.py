@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 
+import array
 import sys
 from . import logbase
 
@@ -43,7 +44,7 @@ class FrameLogEntry:
             return 'tree comp', 'tree comp', float(match.group(1))
         match = cls._match_comp_xmit.match(msg)
         if match:
-            return name, match.group(1), float(match.group(6))
+            return 'tree comp', match.group(1), float(match.group(6))
         match = cls._match_composite.match(msg)
         if match:
             return 'comp', 'composite', float(match.group(1))
@@ -286,6 +287,274 @@ def summarize_stats(rank_frame_logs):
     return frame_stats, summary_stats
 
 
+_COLUMN_TYPES = (('Rank', 'i'), ('Frame', 'i'), ('Indent', 'i'), ('Key', 'i'),
+                 ('Duration', 'd'))
+
+
+class LogColumns:
+    '''Incremental parser turning timer logs into columns of records
+
+    Each timed log entry becomes a record holding the rank and frame it
+    belongs to, its indentation, its key and its duration. Keys index Names,
+    the list of (Id, Name) pairs of the entries, as FrameLogEntry parses them.
+    Frames are delimited as by process_logs(). Text can be fed a chunk at a
+    time, so that very large logs, or logs still being written, are parsed in
+    bounded memory: only the records are kept, in compact arrays.
+    '''
+
+    def __init__(self):
+        self.Names = []
+        self._name_keys = {}
+        # message without its duration -> key, or None if not a timed entry
+        self._head_keys = {}
+        self._columns = dict((c, array.array(t)) for c, t in _COLUMN_TYPES)
+        # rank -> [frame, keys of the frame's top level entries, partial line]
+        self._ranks = {}
+
+    def _rank_state(self, rank):
+        if rank not in self._ranks:
+            self._ranks[rank] = [0, set(), '']
+        return self._ranks[rank]
+
+    def _head_key(self, head):
+        entry_id, name, duration = FrameLogEntry._parse_message(head + ' 0 seconds')
+        key = None
+        if entry_id is not None:
+            key = self._name_keys.get((entry_id, name))
+            if key is None:
+                key = self._name_keys[(entry_id, name)] = len(self.Names)
+                self.Names.append((entry_id, name))
+        self._head_keys[head] = key
+        return key
+
+    def feed(self, text, rank=0):
+        '''Parses a chunk of a rank's log, a trailing partial line is kept
+        until the next chunk or finish() completes it'''
+        state = self._rank_state(rank)
+        lines = (state[2] + text).split('\n')
+        state[2] = lines.pop()
+        self.feed_lines(lines, rank)
+
+    def finish(self):
+        '''Parses the partial lines left over by feed()'''
+        for rank, state in self._ranks.items():
+            if state[2]:
+                line, state[2] = state[2], ''
+                self.feed_lines([line], rank)
+
+    def feed_lines(self, lines, rank=0):
+        '''Parses complete lines of a rank's log'''
+        state = self._rank_state(rank)
+        frame, toplevel = state[0], state[1]
+        head_keys = self._head_keys
+        columns = self._columns
+        add_rank = columns['Rank'].append
+        add_frame = columns['Frame'].append
+        add_indent = columns['Indent'].append
+        add_key = columns['Key'].append
+        add_duration = columns['Duration'].append
+        for line in lines:
+            msg = line.strip()
+            if not msg:
+                frame += 1
+                toplevel = set()
+                continue
+            parts = msg.rsplit(None, 2)
+            if len(parts) != 3 or parts[2] != 'seconds':
+                continue
+            try:
+                key = head_keys[parts[0]]
+            except KeyError:
+                key = self._head_key(parts[0])
+            if key is None:
+                continue
+            try:
+                duration = float(parts[1])
+            except ValueError:
+                continue
+            indent = line.find(msg)
+            # a top level entry seen before in the frame starts a new one
+            if indent == 0:
+                if key in toplevel:
+                    frame += 1
+                    toplevel = set()
+                toplevel.add(key)
+            add_rank(rank)
+            add_frame(frame)
+            add_indent(indent)
+            add_key(key)
+            add_duration(duration)
+        state[0], state[1] = frame, toplevel
+
+    def parse_file(self, filename, rank=0, chunk_size=1 << 24):
+        '''Parses a log file a chunk at a time'''
+        with open(filename, 'r') as infile:
+            while True:
+                text = infile.read(chunk_size)
+                if not text:
+                    break
+                self.feed(text, rank)
+        self.finish()
+
+    def columns(self, complete_frames_only=True):
+        '''Returns a dict of numpy arrays, one per column. Unless
+        complete_frames_only is False, the records of the frame each rank is
+        still in are left out, as process_logs() does.'''
+        import numpy
+        result = {}
+        for c, t in _COLUMN_TYPES:
+            result[c] = numpy.frombuffer(self._columns[c], dtype=t).copy()
+        if complete_frames_only and len(result['Rank']):
+            current = numpy.zeros(max(self._ranks) + 1, dtype=result['Frame'].dtype)
+            for rank, state in self._ranks.items():
+                current[rank] = state[0]
+            keep = result['Frame'] < current[result['Rank']]
+            for c in result:
+                result[c] = result[c][keep]
+        return result
+
+
+def parse_logs():
+    '''Collect the logs for all ranks and parse them into a LogColumns per
+    component'''
+    logbase.get_logs()
+
+    comp_columns = {}
+    for log in logbase.logs:
+        comp_columns.setdefault(log.component, LogColumns()).feed_lines(
+            log.lines, log.rank)
+    return comp_columns
+
+
+def _group(columns):
+    '''Returns the group of each row and the first row of each group, a
+    group being a distinct combination of values of the given columns'''
+    import numpy
+    if not len(columns[0]):
+        return numpy.zeros(0, dtype=numpy.intp), numpy.zeros(0, dtype=numpy.intp)
+    # the columns hold small non-negative integers, combine them into one
+    # integer unless that would overflow.
+    dims = [int(c.max()) + 1 for c in columns]
+    size = 1
+    for d in dims:
+        size *= d
+    if size < 2**62:
+        keys = numpy.ravel_multi_index(columns, dims)
+    else:
+        keys = numpy.stack(columns, axis=1)
+    unique, first, groups = numpy.unique(keys, axis=0, return_index=True,
+                                         return_inverse=True)
+    return groups.reshape(-1), first
+
+
+def _occurrences(groups):
+    '''Returns for each row the number of earlier rows in its group'''
+    import numpy
+    order = numpy.argsort(groups, kind='stable')
+    sorted_groups = groups[order]
+    starts = numpy.flatnonzero(numpy.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    sizes = numpy.diff(numpy.r_[starts, len(groups)])
+    result = numpy.empty(len(groups), dtype=numpy.intp)
+    result[order] = numpy.arange(len(groups)) - numpy.repeat(starts, sizes)
+    return result
+
+
+def grouped_stats(groups, values, ngroups):
+    '''Vectorized BasicStats of values for each of ngroups groups, as a dict
+    of Count, Mean, StdDev, Min and Max arrays'''
+    import numpy
+    count = numpy.bincount(groups, minlength=ngroups)
+    mean = numpy.bincount(groups, weights=values, minlength=ngroups) / \
+        numpy.maximum(count, 1)
+    deviation = values - mean[groups]
+    variance = numpy.bincount(groups, weights=deviation * deviation,
+                              minlength=ngroups) / numpy.maximum(count - 1, 1)
+    order = numpy.argsort(groups, kind='stable')
+    starts = numpy.searchsorted(groups[order], numpy.arange(ngroups))
+    return {'Count': count, 'Mean': mean, 'StdDev': numpy.sqrt(variance),
+            'Min': numpy.minimum.reduceat(values[order], starts),
+            'Max': numpy.maximum.reduceat(values[order], starts)}
+
+
+def _select(columns, rows):
+    return dict((c, v[rows]) for c, v in columns.items())
+
+
+def merge_frames(columns, merge_before_nframes):
+    '''Returns the frame of each record once the frames of each rank before
+    its last merge_before_nframes ones are merged into frame 0'''
+    import numpy
+    frame = columns['Frame']
+    if merge_before_nframes <= 0 or not len(frame):
+        return frame
+    rank = columns['Rank']
+    order = numpy.argsort(rank, kind='stable')
+    ranks, starts = numpy.unique(rank[order], return_index=True)
+    nframes = numpy.zeros(ranks[-1] + 1, dtype=frame.dtype)
+    nframes[ranks] = numpy.maximum.reduceat(frame[order], starts) + 1
+    cutoff = numpy.maximum(nframes - merge_before_nframes, 1)[columns['Rank']]
+    return numpy.where(frame < cutoff, 0, frame - cutoff + 1)
+
+
+def column_frame_stats(columns, merge_before_nframes=0):
+    '''Statistics across ranks of the entries of each frame but the first
+
+    Entries are matched across ranks by frame, indentation, key and how many
+    times the key occurred in the frame before. Returns a dict of columns,
+    one row per entry ordered as in the logs, with Frame, Indent, Key and the
+    columns of grouped_stats(); Duration is the Max across ranks.
+
+    Keyword arguments:
+    merge_before_nframes -- All entries before this many frames will be merged
+    '''
+    import numpy
+    frame = merge_frames(columns, merge_before_nframes)
+    occurrence = _occurrences(
+        _group([columns['Rank'], frame, columns['Key']])[0])
+    rows = numpy.flatnonzero(frame > 0)
+    groups, first = _group([frame[rows], columns['Indent'][rows],
+                            columns['Key'][rows], occurrence[rows]])
+    stats = grouped_stats(groups, columns['Duration'][rows], len(first))
+    order = numpy.argsort(first, kind='stable')
+    result = _select(stats, order)
+    for c, v in (('Frame', frame), ('Indent', columns['Indent']),
+                 ('Key', columns['Key']), ('Occurrence', occurrence)):
+        result[c] = v[rows][first[order]]
+    result['Duration'] = result['Max']
+    return result
+
+
+def column_summary_stats(frame_stats):
+    '''Statistics across frames of the Duration of the entries returned by
+    column_frame_stats(), Duration being their Mean'''
+    import numpy
+    groups, first = _group([frame_stats['Indent'], frame_stats['Key'],
+                            frame_stats['Occurrence']])
+    stats = grouped_stats(groups, frame_stats['Duration'], len(first))
+    order = numpy.argsort(first, kind='stable')
+    result = _select(stats, order)
+    for c in ('Indent', 'Key', 'Occurrence'):
+        result[c] = frame_stats[c][first[order]]
+    result['Duration'] = result['Mean']
+    return result
+
+
+def write_column_stats_to_file(stats, names, outfile=sys.stdout):
+    '''Print the statistics returned by column_frame_stats() or
+    column_summary_stats(), one frame after the other for the former'''
+    frames = stats.get('Frame')
+    for i in range(len(stats['Key'])):
+        if frames is not None and (i == 0 or frames[i] != frames[i - 1]):
+            if i > 0:
+                outfile.write('\n')
+            outfile.write('Frame ' + str(frames[i]) + '\n' + '-' * 40 + '\n')
+        entry_id, name = names[stats['Key'][i]]
+        outfile.write(' ' * int(stats['Indent'][i]) + entry_id + ' ' + name +
+                      ', Count: %d, Mean: %f, StdDev: %f, Min: %f, Max: %f\n' %
+                      (stats['Count'][i], stats['Mean'][i], stats['StdDev'][i],
+                       stats['Min'][i], stats['Max'][i]))
+
+
 def write_stats_to_file(stats, indent=0, outfile=sys.stdout):
     '''Print the statics for a given frame'''
     for s in stats:
@@ -297,26 +566,56 @@ def write_stats_to_file(stats, indent=0, outfile=sys.stdout):
             write_stats_to_file(s, indent + 4, outfile)
 
 
-def summarize_results(num_frames, num_seconds_m0, items_per_frame, item_label,
-                      save_logs=False, output_basename=None):
-    '''Process the timing logs to display, save, and gather stats
+def _summarize_columns(comp_columns, num_frames, save_logs, output_basename):
+    '''Print and save the statistics of the server logs computed from
+    their columns, as returned by parse_logs()'''
+    # Only deal with the server logs
+    if 'Servers' in comp_columns.keys():
+        log_columns = comp_columns['Servers']
+    elif 'ClientAndServers' in comp_columns.keys():
+        log_columns = comp_columns['ClientAndServers']
+    else:
+        log_columns = None
+
+    if log_columns:
+        columns = log_columns.columns()
+        frame_stats = column_frame_stats(columns, num_frames - 1)
+        first_frame = (columns['Rank'] == 0) & \
+            (merge_frames(columns, num_frames - 1) == 0)
+        r0f0 = '\n'.join(
+            ' ' * int(i) + '%s %s %f' % (log_columns.Names[k] + (d,))
+            for i, k, d in zip(columns['Indent'][first_frame],
+                               columns['Key'][first_frame],
+                               columns['Duration'][first_frame]))
+        print ('Rank 0 Frame 0\n' + '-' * 40)
+        print (r0f0)
+        print ('')
+        if save_logs:
+            with open(output_basename + '.stats.r0f0.txt', 'w') as ofile:
+                ofile.write(r0f0)
 
-    Keyword arguments:
-    num_frames      -- Number of frames to process
-    num_seconds_m0  -- Total number of seconds, excluding the first frame
-    items_per_frame -- Number of items per frame getting processed
-    item_label      -- Output label for associated items_per_frame
-    save_logs       -- Whether or not to write the logs to a file
-    output_basename -- Basename to use for output files
-    '''
+        if len(frame_stats['Key']):
+            write_column_stats_to_file(frame_stats, log_columns.Names,
+                                       outfile=sys.stdout)
+            print ('')
+            if save_logs:
+                with open(output_basename + '.stats.frame.txt', 'w') as ofile:
+                    write_column_stats_to_file(frame_stats, log_columns.Names,
+                                               outfile=ofile)
+
+            summary_stats = column_summary_stats(frame_stats)
+            print ('Frame Summary\n' + '-' * 40)
+            write_column_stats_to_file(summary_stats, log_columns.Names,
+                                       outfile=sys.stdout)
+            if save_logs:
+                with open(output_basename + '.stats.summary.txt', 'w') as ofile:
+                    write_column_stats_to_file(summary_stats, log_columns.Names,
+                                               outfile=ofile)
 
-    comp_rank_frame_logs = process_logs(num_frames - 1)
-    if save_logs:
-        logbase.dump_logs(output_basename + '.logs.raw.bin')
-        with open(output_basename + '.logs.parsed.bin', 'wb') as ofile:
-            import pickle
-            pickle.dump(comp_rank_frame_logs, ofile)
 
+def _summarize_frame_logs(comp_rank_frame_logs, save_logs, output_basename):
+    '''Print and save the statistics of the server logs computed from
+    their FrameLog objects, as returned by process_logs(), without numpy'''
     # Only deal with the server logs
     if 'Servers' in comp_rank_frame_logs.keys():
         rank_frame_logs = comp_rank_frame_logs['Servers']
@@ -325,7 +624,6 @@ def summarize_results(num_frames, num_seconds_m0, items_per_frame, item_label,
     else:
         rank_frame_logs = None
 
-    print ('\nStatistics:\n' + '=' * 40 + '\n')
     if rank_frame_logs:
         print ('Rank 0 Frame 0\n' + '-' * 40)
         print (rank_frame_logs[0][0])
@@ -340,6 +638,7 @@ def summarize_results(num_frames, num_seconds_m0, items_per_frame, item_label,
                 print ('Frame ' + str(f + 1) + '\n' + '-' * 40)
                 write_stats_to_file(frame_stats[f], outfile=sys.stdout)
                 print ('')
+            if save_logs:
                 with open(output_basename + '.stats.frame.txt', 'w') as ofile:
                     for f in range(0, len(frame_stats)):
                         ofile.write('Frame ' + str(f + 1) + '\n' + '-' * 40 + '\n')
@@ -353,6 +652,37 @@ def summarize_results(num_frames, num_seconds_m0, items_per_frame, item_label,
                 with open(output_basename + '.stats.summary.txt', 'w') as ofile:
                     write_stats_to_file(summary_stats, outfile=ofile)
 
+
+def summarize_results(num_frames, num_seconds_m0, items_per_frame, item_label,
+                      save_logs=False, output_basename=None):
+    '''Process the timing logs to display, save, and gather stats
+
+    Keyword arguments:
+    num_frames      -- Number of frames to process
+    num_seconds_m0  -- Total number of seconds, excluding the first frame
+    items_per_frame -- Number of items per frame getting processed
+    item_label      -- Output label for associated items_per_frame
+    save_logs       -- Whether or not to write the logs to a file
+    output_basename -- Basename to use for output files
+    '''
+
+    # the column statistics need numpy, without it they are computed from
+    # FrameLog objects, sample by sample.
+    try:
+        import numpy
+        comp_columns = parse_logs()
+    except ImportError:
+        comp_columns = None
+        comp_rank_frame_logs = process_logs(num_frames - 1)
+    if save_logs:
+        logbase.dump_logs(output_basename + '.logs.zip')
+
+    print ('\nStatistics:\n' + '=' * 40 + '\n')
+    if comp_columns is not None:
+        _summarize_columns(comp_columns, num_frames, save_logs, output_basename)
+    else:
+        _summarize_frame_logs(comp_rank_frame_logs, save_logs, output_basename)
+
     fps = (num_frames - 1) / num_seconds_m0
     ips = fps * items_per_frame
     print ('')
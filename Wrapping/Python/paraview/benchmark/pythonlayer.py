@@ -0,0 +1,211 @@
+'''
+Microbenchmarks of ParaView's Python layer, i.e. of paraview.servermanager
+and paraview.simple rather than of the VTK pipelines and rendering they drive.
+The benchmarks run in the builtin session and measure:
+
+* proxies: creating sources with simple (the CreateObject functions)
+* properties: Property.SetData calls
+* find: FindSource and GetSources with thousands of sources
+* trace: building a pipeline with Python tracing enabled, to be compared to
+  building it with tracing disabled (pipeline)
+* state: smstate.get_state on a large pipeline
+* fetch: Fetch round-trips of a small dataset
+
+Each benchmark is run several times and its best time is kept, to make results
+reproducible. Results can be appended to a log archive (see
+logbase.append_logs), along with the timer logs gathered while they ran, and
+compared against the results of an earlier run to catch regressions. Either
+import pythonlayer from paraview.benchmark and call its run method, or run the
+module directly via pvpython or pvbatch.
+'''
+
+from __future__ import print_function
+
+import timeit
+from paraview import servermanager
+from paraview import smstate, smtrace
+from paraview.simple import *
+from paraview.benchmark import logbase
+from paraview.benchmark.tracestate import build_pipeline
+
+
+def bench_proxies(size):
+    '''Creates size Sphere sources.'''
+    t0 = timeit.default_timer()
+    for i in range(size):
+        Sphere()
+    return timeit.default_timer() - t0
+
+
+def bench_properties(size):
+    '''Sets the Radius and Center properties of a source size times each.'''
+    sphere = Sphere()
+    radius = sphere.GetProperty('Radius')
+    center = sphere.GetProperty('Center')
+    t0 = timeit.default_timer()
+    for i in range(size):
+        radius.SetData(0.5 + (i % 2))
+        center.SetData([i % 3, 0, 0])
+    return timeit.default_timer() - t0
+
+
+def bench_find(size):
+    '''Creates size named sources, then looks each of them up with
+    FindSource and lists all of them with GetSources ten times.'''
+    for i in range(size):
+        Sphere(guiName='Sphere%d' % i)
+    t0 = timeit.default_timer()
+    for i in range(size):
+        FindSource('Sphere%d' % i)
+    for i in range(10):
+        GetSources()
+    return timeit.default_timer() - t0
+
+
+def bench_pipeline(size):
+    '''Builds a pipeline of size proxies with tracing disabled.'''
+    t0 = timeit.default_timer()
+    build_pipeline(size)
+    return timeit.default_timer() - t0
+
+
+def bench_trace(size):
+    '''Builds a pipeline of size proxies with tracing enabled.'''
+    t0 = timeit.default_timer()
+    smtrace.start_trace()
+    build_pipeline(size)
+    smtrace.stop_trace()
+    return timeit.default_timer() - t0
+
+
+def bench_state(size):
+    '''Generates the Python state of a pipeline of size proxies.'''
+    build_pipeline(size)
+    t0 = timeit.default_timer()
+    smstate.get_state()
+    return timeit.default_timer() - t0
+
+
+def bench_fetch(size):
+    '''Fetches the output of a small source size times.'''
+    sphere = Sphere()
+    sphere.UpdatePipeline()
+    t0 = timeit.default_timer()
+    for i in range(size):
+        servermanager.Fetch(sphere)
+    return timeit.default_timer() - t0
+
+
+# name -> (function, default size)
+BENCHMARKS = [('proxies', bench_proxies, 1000),
+              ('properties', bench_properties, 10000),
+              ('find', bench_find, 2000),
+              ('pipeline', bench_pipeline, 1000),
+              ('trace', bench_trace, 1000),
+              ('state', bench_state, 1000),
+              ('fetch', bench_fetch, 100)]
+
+
+def run(names=None, sizes=None, repeat=3, filename=None, metadata=None):
+    '''Runs the benchmarks in names (all of them by default) repeat times
+    each, with the number of operations given by sizes, a dict of name to
+    size, or the benchmark's default size. Returns a dict of name to a dict
+    with the 'size' and the best 'seconds'. If a filename is specified, the
+    results are appended to that log archive as the metadata of a new run,
+    along with the given metadata and the timer logs.
+    '''
+    servermanager.SetProgressPrintingEnabled(0)
+    sizes = sizes or {}
+    if filename:
+        logbase.maximize_logs()
+
+    results = {}
+    for name, function, size in BENCHMARKS:
+        if names and name not in names:
+            continue
+        size = sizes.get(name, size)
+        times = []
+        for i in range(repeat):
+            ResetSession()
+            times.append(function(size))
+        results[name] = {'size': size, 'seconds': min(times)}
+        print('%-10s %6d: %.4f secs' % (name, size, min(times)))
+
+    if filename:
+        logbase.get_logs()
+        logbase.append_logs(filename, dict(metadata or {},
+                                           benchmark='pythonlayer',
+                                           results=results))
+    ResetSession()
+    return results
+
+
+def load_results(filename, run=-1):
+    '''Returns the results of a run saved to a log archive by run().'''
+    runs = [r for r in logbase.list_runs(filename)
+            if r['metadata'].get('benchmark') == 'pythonlayer']
+    try:
+        return runs[run]['metadata']['results']
+    except IndexError:
+        raise RuntimeError('%s has no run %d of the Python layer benchmarks '
+                           '(%d runs)' % (filename, run, len(runs)))
+
+
+def compare(results, baseline, tolerance=0.2):
+    '''Compares results to baseline results and returns the list of
+    (name, seconds, baseline seconds) of the benchmarks that are more than
+    tolerance (a fraction) slower. Benchmarks missing from the baseline or run
+    with a different size are ignored.
+    '''
+    regressions = []
+    for name in sorted(results):
+        base = baseline.get(name)
+        if not base or base['size'] != results[name]['size']:
+            continue
+        if results[name]['seconds'] > base['seconds'] * (1 + tolerance):
+            regressions.append((name, results[name]['seconds'], base['seconds']))
+    return regressions
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Benchmark the ParaView Python layer')
+    parser.add_argument('-b', '--benchmarks', default=None,
+                        type=lambda s: s.split(','),
+                        help='Comma separated benchmarks to run, among %s' %
+                        ', '.join(name for name, function, size in BENCHMARKS))
+    parser.add_argument('-s', '--sizes', default={},
+                        type=lambda s: dict((n, int(v)) for n, v in
+                                            (x.split('=') for x in s.split(','))),
+                        help='Comma separated name=size benchmark sizes')
+    parser.add_argument('-r', '--repeat', default=3, type=int,
+                        help='Number of times each benchmark is run')
+    parser.add_argument('-o', '--output', default=None, type=str,
+                        help='Append the results to this log archive')
+    parser.add_argument('--baseline', default=None, type=str,
+                        help='Compare the results to the last run of this log archive')
+    parser.add_argument('-t', '--tolerance', default=0.2, type=float,
+                        help='Slowdown relative to the baseline that is reported')
+
+    args = parser.parse_args(argv)
+    baseline = None
+    if args.baseline:
+        # check the baseline before spending time on the benchmarks.
+        try:
+            baseline = load_results(args.baseline)
+        except (RuntimeError, IOError, OSError) as e:
+            parser.error('cannot use the baseline: %s' % e)
+    results = run(names=args.benchmarks, sizes=args.sizes, repeat=args.repeat,
+                  filename=args.output)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, seconds, baseline in regressions:
+            print('Regression: %s took %.4f secs instead of %.4f secs' %
+                  (name, seconds, baseline))
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,79 @@
+'''
+Benchmarks Python tracing and Python state generation for pipelines with
+many proxies. For every requested size, a pipeline of that many sources and
+filters is created with tracing enabled, then the Python state for it is
+generated with smstate.get_state. Either import tracestate from
+paraview.benchmark and call its run method, or run the module directly via
+pvpython or pvbatch.
+'''
+
+from __future__ import print_function
+
+import datetime as dt
+from paraview import servermanager
+from paraview import smstate, smtrace
+from paraview.simple import *
+
+
+def build_pipeline(num_proxies):
+    '''Creates num_proxies pipeline proxies, half of them Sphere sources and
+    half Shrink filters applied to them.'''
+    for i in range(num_proxies // 2):
+        sphere = Sphere(ThetaResolution=8)
+        Shrink(Input=sphere)
+    if num_proxies % 2:
+        Sphere()
+
+
+def run(sizes=(100, 1000, 10000), filename=None):
+    '''Runs the benchmark for each pipeline size in sizes and returns a list of
+    (size, trace seconds, state seconds) tuples. If a filename is specified,
+    the results are also written to that file as csv.
+    '''
+    servermanager.SetProgressPrintingEnabled(0)
+
+    results = []
+    for size in sizes:
+        ResetSession()
+
+        t0 = dt.datetime.now()
+        smtrace.start_trace()
+        build_pipeline(size)
+        trace = smtrace.stop_trace()
+        trace_time = (dt.datetime.now() - t0).total_seconds()
+
+        t0 = dt.datetime.now()
+        state = smstate.get_state()
+        state_time = (dt.datetime.now() - t0).total_seconds()
+
+        print('%6d proxies: trace %.3f secs (%d lines), state %.3f secs (%d lines)' %
+              (size, trace_time, trace.count('\n'),
+               state_time, state.count('\n')))
+        results.append((size, trace_time, state_time))
+
+    ResetSession()
+
+    if filename:
+        with open(filename, 'w') as ofile:
+            ofile.write('proxies,trace,state\n')
+            for result in results:
+                ofile.write('%d,%f,%f\n' % result)
+    return results
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Benchmark ParaView Python trace and state generation')
+    parser.add_argument('-s', '--sizes', default=[100, 1000, 10000],
+                        type=lambda s: [int(x) for x in s.split(',')],
+                        help='Comma separated numbers of proxies to benchmark')
+    parser.add_argument('-o', '--output', default=None, type=str,
+                        help='Write the results to this csv file')
+
+    args = parser.parse_args(argv)
+    run(sizes=args.sizes, filename=args.output)
+
+if __name__ == "__main__":
+    import sys
+    main(sys.argv[1:])
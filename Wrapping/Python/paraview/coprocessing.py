@@ -51,6 +51,9 @@ class CoProcessor(object):
         # created by the adaptor for this pipeline. The adaptor may be able to generate
         # other channels as well though.
         self.__ProducersMap = {}
+        # __TemporalProducersMap has, for each channel, the producer and the
+        # TemporalDataCache created by CreateTemporalProducer() with a budget.
+        self.__TemporalProducersMap = {}
         self.__WritersList = []
         self.__ViewsList = []
         self.__EnableLiveVisualization = False
@@ -223,6 +226,11 @@ class CoProcessor(object):
                 producer.GetClientSideObject().SetOutput(
                     datadescription.GetInputDescriptionByName(name).GetGrid(),
                     simtime)
+            for name, (producer, cache) in self.__TemporalProducersMap.items():
+                grid = datadescription.GetInputDescriptionByName(name).GetGrid()
+                if grid:
+                    cache.Add(simtime, grid)
+                    producer.GetClientSideObject().SetOutput(grid, simtime)
 
 
     def WriteData(self, datadescription):
@@ -429,6 +437,16 @@ class CoProcessor(object):
     def CreateProducer(self, datadescription, inputname):
         """Creates a producer proxy for the grid. This method is generally used in
          CreatePipeline() call to create producers."""
+        producer = self.__NewProducer(datadescription, inputname)
+        if not producer:
+            return
+
+        # Save the producer for easy access in UpdateProducers() call.
+        self.__ProducersMap[inputname] = producer
+        producer.UpdatePipeline(datadescription.GetTime())
+        return producer
+
+    def __NewProducer(self, datadescription, inputname):
         # Check that the producer name for the input given is valid for the
         # current setup.
         if not datadescription.GetInputDescriptionByName(inputname):
@@ -454,19 +472,35 @@ class CoProcessor(object):
                 grid.IsA("vtkRectilinearGrid") == True:
             extent = datadescription.GetInputDescriptionByName(inputname).GetWholeExtent()
             producer.WholeExtent= [ extent[0], extent[1], extent[2], extent[3], extent[4], extent[5] ]
-
-        # Save the producer for easy access in UpdateProducers() call.
-        self.__ProducersMap[inputname] = producer
-        producer.UpdatePipeline(datadescription.GetTime())
         return producer
 
-    def CreateTemporalProducer(self, datadescription, inputname):
+    def CreateTemporalProducer(self, datadescription, inputname, maxbytes=None,
+                               maxtimes=None, compress=True, spilldirectory=None):
         """Python access to a temporal cache object associated with a specific
         one simulation product. Much like CreateProducer, only this ends up with
-        a temporal cache filter instead of a PVTrivialProducer."""
+        a temporal cache filter instead of a PVTrivialProducer.
+
+        When maxbytes is given, the recent outputs are instead kept by a
+        TemporalDataCache with that memory budget (see TemporalDataCache for
+        the other arguments), which does not need the adaptor to create a
+        temporal cache. The returned PVTrivialProducer produces the current
+        output; its cpTemporalCache attribute holds the cache and
+        LoadTemporalData() makes it produce an earlier output."""
         if not datadescription.GetInputDescriptionByName(inputname):
             raise RuntimeError ("Simulation input name '%s' does not exist" % inputname)
 
+        if maxbytes is not None:
+            producer = self.__NewProducer(datadescription, inputname)
+            if not producer:
+                return
+            cache = TemporalDataCache(maxbytes, maxtimes, compress, spilldirectory)
+            cache.Add(datadescription.GetTime(),
+                      datadescription.GetInputDescriptionByName(inputname).GetGrid())
+            producer.add_attribute("cpTemporalCache", cache)
+            self.__TemporalProducersMap[inputname] = (producer, cache)
+            producer.UpdatePipeline(datadescription.GetTime())
+            return producer
+
         idd = datadescription.GetInputDescriptionByName(inputname)
 
         cache = idd.GetTemporalCache()
@@ -476,6 +510,19 @@ class CoProcessor(object):
 
         return servermanager._getPyProxy(cache)
 
+    def LoadTemporalData(self, producer, time):
+        """Makes a producer created by CreateTemporalProducer() with a
+        maxbytes budget produce its output for the given time, loading it
+        back if it was compressed or spilled to disk. Returns False if that
+        time is no longer cached. The producer goes back to the current
+        output on the next UpdateProducers() call."""
+        dataobject = producer.cpTemporalCache.Get(time)
+        if dataobject is None:
+            return False
+        producer.GetClientSideObject().SetOutput(dataobject, time)
+        producer.UpdatePipeline(time)
+        return True
+
     def ProcessExodusIIWriter(self, writer):
         """Extra work for the ExodusII writer to avoid undesired warnings
            and print out a message on how to read the files into Ensight."""
@@ -621,6 +668,8 @@ class CoProcessor(object):
         for view in self.__ViewsList:
             if hasattr(view, 'Finalize'):
                 view.Finalize()
+        for producer, cache in self.__TemporalProducersMap.values():
+            cache.Clear()
 
     def RescaleDataRange(self, view, time):
         """DataRange can change across time, sometime we want to rescale the
@@ -901,3 +950,170 @@ class CoProcessor(object):
                 fileName = self.__DataRootDirectory + writer.parameters.GetProperty("FileName").GetElement(0)
                 writer.parameters.GetProperty("FileName").SetElement(0, fileName)
                 writer.parameters.FileName = fileName
+
+# -----------------------------------------------------------------------------
+
+class TemporalDataCache(object):
+    """Keeps copies of the most recent outputs of a simulation channel, within
+    a memory budget, so that ex post facto triggers can process the timesteps
+    that led to an event.
+
+    The newest outputs are kept as they are. Once they take more than
+    maxbytes, the oldest ones are serialized, and compressed when compress is
+    True. Serialized outputs are written to files in spilldirectory, ideally
+    on node-local disk, once they do not fit in the budget either; without a
+    spilldirectory they are discarded instead. The newest output is always
+    kept in memory. At most maxtimes outputs are kept, if given.
+
+    Get() loads outputs back on demand. Statistics holds the memory in use
+    and the number and duration of spills and reloads.
+    """
+
+    def __init__(self, maxbytes, maxtimes=None, compress=True, spilldirectory=None):
+        import collections
+        self.MaximumBytes = maxbytes
+        self.MaximumNumberOfTimes = maxtimes
+        self.Compress = compress
+        self.SpillDirectory = spilldirectory
+        # time -> entry, oldest first. See __Store() for the entries.
+        self.__Entries = collections.OrderedDict()
+        self.Statistics = { 'memory_bytes' : 0, 'spilled_bytes' : 0,
+                            'serializations' : 0, 'serialization_seconds' : 0.0,
+                            'spills' : 0, 'spill_seconds' : 0.0,
+                            'reloads' : 0, 'reload_seconds' : 0.0 }
+
+    def GetTimes(self):
+        """Returns the times of the cached outputs, oldest first."""
+        return list(self.__Entries.keys())
+
+    def GetMemoryUsage(self):
+        """Returns the number of bytes of memory used by the cached outputs."""
+        return self.Statistics['memory_bytes']
+
+    def Add(self, time, dataobject):
+        """Caches a copy of dataobject as the output for time."""
+        if time in self.__Entries:
+            self.__Discard(time)
+        copy = dataobject.NewInstance()
+        copy.DeepCopy(dataobject)
+        self.__Store(time, { 'data' : copy,
+                             'bytes' : copy.GetActualMemorySize() * 1024 })
+        self.__Trim()
+
+    def Get(self, time):
+        """Returns the output cached for time or None."""
+        import timeit, zlib
+        entry = self.__Entries.get(time)
+        if entry is None:
+            return None
+        if 'data' in entry:
+            return entry['data']
+        start = timeit.default_timer()
+        if 'filename' in entry:
+            with open(entry['filename'], 'rb') as f:
+                payload = f.read()
+        else:
+            payload = entry['payload']
+        if entry['compressed']:
+            payload = zlib.decompress(payload)
+        dataobject = self.__Deserialize(entry['classname'], payload)
+        self.Statistics['reloads'] += 1
+        self.Statistics['reload_seconds'] += timeit.default_timer() - start
+        return dataobject
+
+    def Clear(self):
+        """Discards all cached outputs, removing any spilled files."""
+        for time in list(self.__Entries.keys()):
+            self.__Discard(time)
+
+    def __Account(self, entry, sign):
+        key = 'spilled_bytes' if 'filename' in entry else 'memory_bytes'
+        self.Statistics[key] += sign * entry['bytes']
+
+    def __Store(self, time, entry):
+        # an entry holds either the 'data' object itself, the serialized
+        # 'payload' or the 'filename' it was spilled to, along with the
+        # 'bytes' of memory or disk it uses. Replacing an entry keeps its
+        # place in the age order.
+        if time in self.__Entries:
+            self.__Account(self.__Entries[time], -1)
+        self.__Entries[time] = entry
+        self.__Account(entry, 1)
+
+    def __Discard(self, time):
+        import os
+        entry = self.__Entries.pop(time)
+        self.__Account(entry, -1)
+        if 'filename' in entry:
+            os.remove(entry['filename'])
+
+    def __Trim(self):
+        while self.MaximumNumberOfTimes and \
+              len(self.__Entries) > self.MaximumNumberOfTimes:
+            self.__Discard(next(iter(self.__Entries)))
+        # the newest output is never serialized, it is the one in use.
+        older = list(self.__Entries.keys())[:-1]
+        for time in older:
+            if self.GetMemoryUsage() <= self.MaximumBytes:
+                return
+            if 'data' in self.__Entries[time]:
+                if self.Compress:
+                    self.__Serialize(time)
+                elif self.SpillDirectory:
+                    self.__Serialize(time)
+                    self.__Spill(time)
+                else:
+                    self.__Discard(time)
+        for time in older:
+            if self.GetMemoryUsage() <= self.MaximumBytes:
+                return
+            if 'payload' in self.__Entries.get(time, {}):
+                if self.SpillDirectory:
+                    self.__Spill(time)
+                else:
+                    self.__Discard(time)
+
+    def __Serialize(self, time):
+        import timeit, zlib
+        from vtkmodules.vtkCommonCore import vtkCharArray
+        from vtkmodules.vtkParallelCore import vtkCommunicator
+        from vtkmodules.util.numpy_support import vtk_to_numpy
+        start = timeit.default_timer()
+        dataobject = self.__Entries[time]['data']
+        buffer = vtkCharArray()
+        vtkCommunicator.MarshalDataObject(dataobject, buffer)
+        payload = vtk_to_numpy(buffer).tobytes()
+        if self.Compress:
+            payload = zlib.compress(payload, 1)
+        self.__Store(time, { 'payload' : payload, 'bytes' : len(payload),
+                             'classname' : dataobject.GetClassName(),
+                             'compressed' : self.Compress })
+        self.Statistics['serializations'] += 1
+        self.Statistics['serialization_seconds'] += timeit.default_timer() - start
+
+    def __Spill(self, time):
+        import os, tempfile, timeit
+        start = timeit.default_timer()
+        entry = self.__Entries[time]
+        fd, filename = tempfile.mkstemp(suffix=".vtkmarshal", prefix="cptemporalcache",
+                                        dir=self.SpillDirectory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(entry['payload'])
+        self.__Store(time, { 'filename' : filename, 'bytes' : len(entry['payload']),
+                             'classname' : entry['classname'],
+                             'compressed' : entry['compressed'] })
+        self.Statistics['spills'] += 1
+        self.Statistics['spill_seconds'] += timeit.default_timer() - start
+
+    @staticmethod
+    def __Deserialize(classname, payload):
+        import numpy
+        from vtkmodules.vtkCommonCore import VTK_CHAR
+        from vtkmodules.vtkCommonDataModel import vtkDataObjectTypes
+        from vtkmodules.vtkParallelCore import vtkCommunicator
+        from vtkmodules.util.numpy_support import numpy_to_vtk
+        buffer = numpy_to_vtk(numpy.frombuffer(payload, dtype=numpy.int8),
+                              deep=1, array_type=VTK_CHAR)
+        dataobject = vtkDataObjectTypes.NewDataObject(classname)
+        vtkCommunicator.UnMarshalDataObject(buffer, dataobject)
+        return dataobject
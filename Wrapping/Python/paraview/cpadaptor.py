@@ -0,0 +1,193 @@
+r"""
+This module provides adaptors for simulations written in Python that use
+Catalyst. An adaptor keeps the VTK grid handed to Catalyst across timesteps
+and wraps the simulation's NumPy arrays as VTK arrays without copying them,
+so that only the arrays the simulation changes are updated on each call::
+
+    from paraview import cpadaptor
+    adaptor = cpadaptor.ImageDataAdaptor("input")
+    adaptor.SetGeometry(extent, wholeExtent, spacing=spacing)
+
+    def coprocess(time, timeStep, velocity, pressure):
+        datadescription = vtkCPDataDescription()
+        datadescription.SetTimeData(time, timeStep)
+        datadescription.AddInput("input")
+        if not coProcessor.RequestDataDescription(datadescription):
+            return
+        adaptor.SetPointArray("velocity", velocity)
+        adaptor.SetCellArray("pressure", pressure)
+        adaptor.Attach(datadescription)
+        coProcessor.CoProcess(datadescription)
+
+The VTK arrays share their memory with the NumPy arrays, which the adaptor
+keeps alive for as long as the VTK arrays use them. The simulation may
+update a NumPy array in place between calls, passing it again simply marks
+the VTK array as modified.
+"""
+
+from __future__ import absolute_import
+
+from vtkmodules.vtkCommonCore import vtkPoints, VTK_UNSIGNED_CHAR
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkImageData, vtkUnstructuredGrid
+from vtkmodules.util import numpy_support
+import numpy
+
+POINTS = 0
+CELLS = 1
+FIELD = 2
+
+# -----------------------------------------------------------------------------
+
+class GridAdaptor(object):
+    """Base class for adaptors. Subclasses create the grid in CreateGrid() and
+    update its geometry as needed."""
+
+    def __init__(self, inputname="input"):
+        self.InputName = inputname
+        self.Grid = None
+        # (association, name) -> (NumPy array, VTK array, array VTK shares
+        # the memory of)
+        self.__Arrays = {}
+
+    def CreateGrid(self):
+        """Must be overridden by subclasses to return a new, empty grid."""
+        raise NotImplementedError("Subclasses must override this method.")
+
+    def GetGrid(self):
+        """Returns the grid, creating it the first time."""
+        if self.Grid is None:
+            self.Grid = self.CreateGrid()
+        return self.Grid
+
+    def GetInputDescription(self, datadescription):
+        return datadescription.GetInputDescriptionByName(self.InputName)
+
+    def IsGridNeeded(self, datadescription):
+        """Returns True if the pipelines need the grid for this timestep."""
+        idd = self.GetInputDescription(datadescription)
+        return bool(idd) and idd.GetIfGridIsNecessary()
+
+    def __GetData(self, association):
+        grid = self.GetGrid()
+        if association == POINTS:
+            return grid.GetPointData()
+        elif association == CELLS:
+            return grid.GetCellData()
+        return grid.GetFieldData()
+
+    def SetArray(self, name, values, association=POINTS):
+        """Sets the array of the given association to values, a NumPy array
+        with one row per point (or cell). The VTK array shares the memory of
+        values when it is contiguous. If values is the array set last time,
+        the VTK array is just marked as modified, after copying values again
+        if its memory is not shared."""
+        key = (association, name)
+        cached = self.__Arrays.get(key)
+        if cached is not None and cached[0] is values:
+            if cached[2] is not values:
+                numpy.copyto(cached[2], values, casting='unsafe')
+            cached[1].Modified()
+            return cached[1]
+
+        # this only copies values if it is not contiguous or not in a type
+        # VTK supports.
+        pinned = numpy.ascontiguousarray(values)
+        if pinned.dtype == numpy.bool_:
+            pinned = pinned.astype(numpy.uint8)
+        array = numpy_support.numpy_to_vtk(pinned, deep=0)
+        array.SetName(name)
+        self.__GetData(association).AddArray(array)
+        # values is held on to so that its memory outlives the VTK array and
+        # to recognize it on the next call, pinned may be a copy of it.
+        self.__Arrays[key] = (values, array, pinned)
+        return array
+
+    def SetPointArray(self, name, values):
+        return self.SetArray(name, values, POINTS)
+
+    def SetCellArray(self, name, values):
+        return self.SetArray(name, values, CELLS)
+
+    def RemoveArray(self, name, association=POINTS):
+        if self.__Arrays.pop((association, name), None) is not None:
+            self.__GetData(association).RemoveArray(name)
+
+    def Attach(self, datadescription):
+        """Hands the grid to Catalyst. Does nothing if no pipeline needs it
+        for this timestep. Returns True if the grid was attached."""
+        if not self.IsGridNeeded(datadescription):
+            return False
+        self.GetInputDescription(datadescription).SetGrid(self.GetGrid())
+        return True
+
+# -----------------------------------------------------------------------------
+
+class ImageDataAdaptor(GridAdaptor):
+    """Adaptor for simulations on uniform grids."""
+
+    def __init__(self, inputname="input"):
+        GridAdaptor.__init__(self, inputname)
+        self.WholeExtent = None
+
+    def CreateGrid(self):
+        return vtkImageData()
+
+    def SetGeometry(self, extent, wholeExtent=None, spacing=(1, 1, 1), origin=(0, 0, 0)):
+        """Sets the point extent of this process and of the whole grid, the
+        grid is only modified when they change."""
+        grid = self.GetGrid()
+        if tuple(grid.GetExtent()) != tuple(extent):
+            grid.SetExtent(extent)
+        if tuple(grid.GetSpacing()) != tuple(spacing):
+            grid.SetSpacing(spacing)
+        if tuple(grid.GetOrigin()) != tuple(origin):
+            grid.SetOrigin(origin)
+        self.WholeExtent = tuple(wholeExtent) if wholeExtent else tuple(extent)
+
+    def Attach(self, datadescription):
+        if not GridAdaptor.Attach(self, datadescription):
+            return False
+        self.GetInputDescription(datadescription).SetWholeExtent(self.WholeExtent)
+        return True
+
+# -----------------------------------------------------------------------------
+
+class UnstructuredGridAdaptor(GridAdaptor):
+    """Adaptor for simulations on unstructured grids."""
+
+    def __init__(self, inputname="input"):
+        GridAdaptor.__init__(self, inputname)
+        # (NumPy array, array VTK shares the memory of, vtkPoints)
+        self.__Points = None
+
+    def CreateGrid(self):
+        return vtkUnstructuredGrid()
+
+    def SetPoints(self, coordinates):
+        """Sets the point coordinates, a (number of points, 3) NumPy array,
+        without copying them when possible. If coordinates is the array set
+        last time, the points are just marked as modified, after copying
+        coordinates again if their memory is not shared."""
+        if self.__Points is not None and self.__Points[0] is coordinates:
+            if self.__Points[1] is not coordinates:
+                numpy.copyto(self.__Points[1], coordinates, casting='unsafe')
+            self.__Points[2].Modified()
+            return
+        pinned = numpy.ascontiguousarray(coordinates)
+        points = vtkPoints()
+        points.SetData(numpy_support.numpy_to_vtk(pinned, deep=0))
+        self.GetGrid().SetPoints(points)
+        self.__Points = (coordinates, pinned, points)
+
+    def SetCells(self, celltypes, cells):
+        """Sets the cells of the grid. celltypes holds the VTK cell type of
+        each cell and cells the number of points of each cell followed by
+        their ids. The topology is copied, it only needs to be set again when
+        it changes."""
+        cellarray = vtkCellArray()
+        cellarray.SetCells(len(celltypes), numpy_support.numpy_to_vtkIdTypeArray(
+            numpy.asarray(cells, dtype=numpy_support.ID_TYPE_CODE), deep=1))
+        types = numpy_support.numpy_to_vtk(
+            numpy.asarray(celltypes, dtype=numpy.uint8), deep=1,
+            array_type=VTK_UNSIGNED_CHAR)
+        self.GetGrid().SetCells(types, cellarray)
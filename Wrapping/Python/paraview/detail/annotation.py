@@ -34,7 +34,52 @@ import sys # also for sys.stderr
 if sys.version_info >= (3,):
     xrange = range
 
-def _get_ns(self, do, association):
+# expression -> names it references, or None if it does not compile.
+_expression_names = {}
+
+def _get_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, "co_names"):
+            names.update(_get_names(const))
+    return names
+
+def _get_expression_names(expression):
+    """Returns the names an expression references, so that only the arrays it
+    uses need to be gathered, or None if the expression does not compile."""
+    try:
+        return _expression_names[expression]
+    except KeyError: pass
+    names = set()
+    try:
+        # calculator.compute() evaluates each of these separately.
+        for subEx in expression.split(' and '):
+            names.update(_get_names(compile(subEx, "<annotation>", "eval")))
+        names = sorted(names)
+    except SyntaxError:
+        names = None
+    if len(_expression_names) > 100:
+        _expression_names.clear()
+    _expression_names[expression] = names
+    return names
+
+def _get_time_steps(self):
+    """Returns the input time steps and a dict mapping each of them to its
+    index. These only change when the pipeline does, so they are computed once
+    per pipeline change instead of on every execution."""
+    key = (self.GetExecutive().GetPipelineMTime(), self.GetNumberOfTimeSteps())
+    cached = getattr(self, "_annotation_time_steps", None)
+    if cached is None or cached[0] != key:
+        steps = [self.GetTimeStep(x) for x in range(self.GetNumberOfTimeSteps())]
+        indices = {}
+        for index, step in enumerate(steps):
+            indices.setdefault(step, index)
+        cached = self._annotation_time_steps = (key, steps, indices)
+    return cached[1], cached[2]
+
+def _get_ns(self, do, association, names=None):
+    """Returns the namespace to evaluate expressions in. If names is given,
+    only the arrays among these are added to it."""
     if association == vtkDataObject.FIELD:
         # For FieldData, it gets tricky. In general, one would think we are going
         # to look at field data in inputDO directly -- same for composite datasets.
@@ -54,7 +99,7 @@ def _get_ns(self, do, association):
                     if (not fieldData is None) and (len(fieldData.keys()) > 0): break
     else:
         fieldData = do.GetAttributes(association)
-    arrays = calculator.get_arrays(fieldData)
+    arrays = calculator.get_arrays(fieldData, names=names)
 
     ns = {}
     ns["input"] = do
@@ -63,7 +108,9 @@ def _get_ns(self, do, association):
         ns["t_value"] = ns["time_value"]
 
     if self.GetNumberOfTimeSteps() > 0:
-        ns["time_steps"] = [self.GetTimeStep(x) for x in range(self.GetNumberOfTimeSteps())]
+        time_steps, time_indices = _get_time_steps(self)
+        # a copy, expressions may modify it.
+        ns["time_steps"] = list(time_steps)
         ns["t_steps"] = ns["time_steps"]
 
     if self.GetTimeRangeValid():
@@ -71,10 +118,9 @@ def _get_ns(self, do, association):
         ns["t_range"] = ns["time_range"]
 
     if self.GetDataTimeValid() and self.GetNumberOfTimeSteps() > 0:
-        try:
-            ns["time_index"] = ns["time_steps"].index(ns["time_value"])
+        if ns["time_value"] in time_indices:
+            ns["time_index"] = time_indices[ns["time_value"]]
             ns["t_index"] = ns["time_index"]
-        except ValueError: pass
     ns.update(arrays)
     return ns
 
@@ -89,7 +135,7 @@ def execute(self):
     inputs = [dsa.WrapDataObject(inputDO)]
 
     association = self.GetArrayAssociation()
-    ns = _get_ns(self, inputs[0], association)
+    ns = _get_ns(self, inputs[0], association, _get_expression_names(expression))
 
     try:
         result = calculator.compute(inputs, expression, ns=ns)
@@ -112,7 +158,8 @@ def execute_on_global_data(self):
 
     inputs = [dsa.WrapDataObject(inputDO)]
     association = self.GetArrayAssociation()
-    ns = _get_ns(self, inputs[0], association)
+    ns = _get_ns(self, inputs[0], association,
+                 [self.GetFieldArrayName(), "mode_shape", "mode_shape_range"])
     if self.GetFieldArrayName() not in ns:
         print("Failed to locate global array '%s'." % self.GetFieldArrayName(), file=sys.stderr)
         raise RuntimeError("Failed to locate global array")
@@ -168,7 +215,7 @@ def execute_on_attribute_data(self, evaluate_locally):
     array_name = info.Get(vtkDataObject.FIELD_NAME())
 
     # note: _get_ns() needs to be called on all ranks to avoid deadlocks.
-    ns = _get_ns(self, inputs[0], association)
+    ns = _get_ns(self, inputs[0], association, [array_name])
     if array_name not in ns:
         print("Failed to locate array '%s'." % array_name, file=sys.stderr)
         raise RuntimeError("Failed to locate array")
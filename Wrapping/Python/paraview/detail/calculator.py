@@ -21,7 +21,16 @@ import sys
 if sys.version_info >= (3,):
     xrange = range
 
-def get_arrays(attribs, controller=None):
+_valid_names = {}
+
+def _make_name_valid(key):
+    try:
+        return _valid_names[key]
+    except KeyError:
+        varname = _valid_names[key] = paraview.make_name_valid(key)
+        return varname
+
+def get_arrays(attribs, controller=None, names=None):
     """Returns a 'dict' referring to arrays in dsa.DataSetAttributes or
     dsa.CompositeDataSetAttributes instance.
 
@@ -29,15 +38,37 @@ def get_arrays(attribs, controller=None):
     reduced across all ranks and for any arrays missing on the local process, a
     NoneArray will be added to the returned dictionary. This ensures that
     expressions evaluate without issues due to missing arrays on certain ranks.
+
+    If names is given, only the arrays with these (valid Python) names are
+    returned, which avoids going over all the arrays when an expression only
+    uses a few of them. names must be the same on all ranks.
     """
     if not isinstance(attribs, dsa.DataSetAttributes) and \
         not isinstance(attribs, dsa.CompositeDataSetAttributes):
             raise ValueError (
                 "Argument must be DataSetAttributes or CompositeDataSetAttributes.")
     arrays = dict()
-    for key in attribs.keys():
-        varname = paraview.make_name_valid(key)
-        arrays[varname] = attribs[key]
+    if names is None:
+        for key in attribs.keys():
+            varname = _make_name_valid(key)
+            arrays[varname] = attribs[key]
+    else:
+        # most array names are valid Python names, look these up directly and
+        # only go over all the arrays for the others.
+        missing = set()
+        for name in names:
+            if not name:
+                continue
+            array = attribs[name]
+            if array is None or array is dsa.NoneArray:
+                missing.add(name)
+            else:
+                arrays[name] = array
+        if missing:
+            for key in attribs.keys():
+                varname = _make_name_valid(key)
+                if varname in missing:
+                    arrays[varname] = attribs[key]
 
 
     # If running in parallel, ensure that the arrays are synced up so that
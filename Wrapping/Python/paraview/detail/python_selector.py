@@ -11,11 +11,14 @@ except ImportError:
   raise RuntimeError ("'numpy' module is not found. numpy is needed for "\
     "this functionality to work. Please install numpy and try again.")
 
+import ast
+import math
 import re
 import vtkmodules.numpy_interface.dataset_adapter as dsa
 import vtkmodules.numpy_interface.algorithms as algos
 from vtkmodules.vtkCommonDataModel import vtkDataObject
 from vtkmodules.util import vtkConstants
+from vtkmodules.util.numpy_support import get_numpy_array_type
 from . import calculator
 
 # import wrapping module for `vtkPythonSelector`
@@ -41,6 +44,262 @@ def _create_id_array(dataobject, attributeType):
         return dsa.VTKArray(\
                 np.arange(dataobject.GetNumberOfElements(attributeType)))
 
+# Names of the arrays for which queries only selecting values or ranges of
+# values are evaluated by looking the ids up instead of evaluating the query
+# over every element. "id" is the element index unless the data has an "id"
+# array.
+ID_ARRAY_NAMES = ("id", "vtkOriginalPointIds", "vtkOriginalCellIds", "vtkGlobalIds")
+
+_INT_MIN = np.iinfo(np.int64).min
+_INT_MAX = np.iinfo(np.int64).max
+
+def _normalize(intervals):
+    """Sorts and merges overlapping or adjacent [low, high] id intervals."""
+    result = []
+    for low, high in sorted(i for i in intervals if i[0] <= i[1]):
+        if result and low <= result[-1][1] + 1:
+            result[-1][1] = max(result[-1][1], high)
+        else:
+            result.append([low, high])
+    return result
+
+def _intersect(intervals, others):
+    result = []
+    i = j = 0
+    while i < len(intervals) and j < len(others):
+        low = max(intervals[i][0], others[j][0])
+        high = min(intervals[i][1], others[j][1])
+        if low <= high:
+            result.append([low, high])
+        if intervals[i][1] < others[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+def _get_number(node):
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _get_number(node.operand)
+        if value is not None and isinstance(node.op, ast.USub):
+            value = -value
+        return value
+    if hasattr(ast, "Constant") and isinstance(node, ast.Constant):
+        value = node.value
+    elif hasattr(ast, "Num") and isinstance(node, ast.Num):
+        value = node.n
+    else:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or \
+        (isinstance(value, float) and (math.isinf(value) or math.isnan(value))):
+        return None
+    return value
+
+def _comparison_intervals(op, value):
+    """Intervals of the integer ids for which `id <op> value` holds."""
+    if isinstance(op, ast.Eq):
+        return [[int(value), int(value)]] if value == int(value) else []
+    if isinstance(op, ast.NotEq):
+        if value != int(value):
+            return [[_INT_MIN, _INT_MAX]]
+        return [[_INT_MIN, int(value) - 1], [int(value) + 1, _INT_MAX]]
+    if isinstance(op, ast.Lt):
+        return [[_INT_MIN, int(math.ceil(value)) - 1]]
+    if isinstance(op, ast.LtE):
+        return [[_INT_MIN, int(math.floor(value))]]
+    if isinstance(op, ast.Gt):
+        return [[int(math.floor(value)) + 1, _INT_MAX]]
+    if isinstance(op, ast.GtE):
+        return [[int(math.ceil(value)), _INT_MAX]]
+    return None
+
+_SWAPPED_OPS = { ast.Lt : ast.Gt, ast.LtE : ast.GtE, ast.Gt : ast.Lt,
+                 ast.GtE : ast.LtE, ast.Eq : ast.Eq, ast.NotEq : ast.NotEq }
+
+def _list_intervals(node):
+    if not isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return None
+    intervals = []
+    for element in node.elts:
+        value = _get_number(element)
+        if value is None:
+            return None
+        if value == int(value):
+            intervals.append([int(value), int(value)])
+    return intervals
+
+class _IdQueryParser(object):
+    """Turns queries that only select values or ranges of values of a single
+    array, e.g. `id == 5`, `(id == 1) | (id == 7)`, `(id > 3) & (id < 9)`,
+    `id in [1, 7]` or `in1d(id, [1, 7])`, into lists of id intervals."""
+
+    def __init__(self):
+        self.Name = None
+
+    def __set_name(self, node):
+        if not isinstance(node, ast.Name):
+            return False
+        if self.Name is None:
+            self.Name = node.id
+        return node.id == self.Name
+
+    def __operands(self, node, optype):
+        # (a | b) | c parses as a left-deep tree, go down it iteratively so
+        # that long lists of clauses do not exhaust the recursion limit.
+        operands = []
+        while isinstance(node, ast.BinOp) and isinstance(node.op, optype):
+            operands.append(node.right)
+            node = node.left
+        operands.append(node)
+        return operands
+
+    def parse(self, node):
+        if isinstance(node, ast.Expression):
+            return self.parse(node.body)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.BitOr, ast.BitAnd)):
+            union = isinstance(node.op, ast.BitOr)
+            result = [] if union else [[_INT_MIN, _INT_MAX]]
+            for operand in self.__operands(node, type(node.op)):
+                intervals = self.parse(operand)
+                if intervals is None:
+                    return None
+                if union:
+                    result.extend(intervals)
+                else:
+                    result = _intersect(result, intervals)
+            return _normalize(result) if union else result
+        if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+            # calculator.compute() evaluates `a and b` as `a & b`.
+            result = [[_INT_MIN, _INT_MAX]]
+            for value in node.values:
+                intervals = self.parse(value)
+                if intervals is None:
+                    return None
+                result = _intersect(result, intervals)
+            return result
+        if isinstance(node, ast.Compare):
+            return self.__parse_compare(node)
+        if isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and \
+                func.value.id in ("np", "numpy") and func.attr in ("in1d", "isin") and \
+                len(node.args) == 2 and not node.keywords and self.__set_name(node.args[0]):
+                intervals = _list_intervals(node.args[1])
+                return None if intervals is None else _normalize(intervals)
+        return None
+
+    def __parse_compare(self, node):
+        result = [[_INT_MIN, _INT_MAX]]
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            if isinstance(op, ast.In) and self.__set_name(left):
+                intervals = _list_intervals(right)
+                intervals = None if intervals is None else _normalize(intervals)
+            elif self.__set_name(left) and _get_number(right) is not None:
+                intervals = _comparison_intervals(op, _get_number(right))
+            elif self.__set_name(right) and _get_number(left) is not None and \
+                type(op) in _SWAPPED_OPS:
+                intervals = _comparison_intervals(_SWAPPED_OPS[type(op)](), _get_number(left))
+            else:
+                return None
+            if intervals is None:
+                return None
+            result = _intersect(result, _normalize(intervals))
+            left = right
+        return result
+
+def parse_id_query(query):
+    """Returns (array name, intervals) if the query only selects values or
+    ranges of values of one of the ID_ARRAY_NAMES arrays, intervals being a
+    sorted list of disjoint [low, high] ranges of selected ids. Returns None
+    for any other query."""
+    try:
+        tree = ast.parse(query.strip(), mode="eval")
+    except (SyntaxError, RuntimeError, MemoryError):
+        # RuntimeError: too deeply nested to parse.
+        return None
+    parser = _IdQueryParser()
+    intervals = parser.parse(tree)
+    if intervals is None or parser.Name not in ID_ARRAY_NAMES:
+        return None
+    return (parser.Name, intervals)
+
+# array -> (MTime, order, sorted values) for the id arrays that are not sorted.
+_sorted_ids = {}
+
+def _get_sorted_ids(vtkarray, values):
+    """Returns the permutation that sorts values, or None if they are sorted
+    already, and the sorted values. Computed once per array modification."""
+    key = vtkarray.__this__
+    cached = _sorted_ids.get(key)
+    if cached is not None and cached[0] == vtkarray.GetMTime():
+        return cached[1], cached[2]
+    if values.shape[0] < 2 or np.all(values[1:] >= values[:-1]):
+        order, svalues = None, values
+    else:
+        order = np.argsort(values, kind="mergesort")
+        svalues = values[order]
+    if len(_sorted_ids) >= 8:
+        _sorted_ids.clear()
+    # the array is kept alive so its address is not reused while cached.
+    _sorted_ids[key] = (vtkarray.GetMTime(), order, svalues, vtkarray)
+    return order, svalues
+
+def _has_integer_ids(dataobject, attributeType, name):
+    """Returns True if the ids are the element indices or all the `name`
+    arrays are integer ones. The intervals only hold integers, so queries on
+    arrays of other types must be evaluated."""
+    if dataobject.IsA("vtkCompositeDataSet"):
+        return all(_has_integer_ids(ds, attributeType, name) for ds in dataobject)
+    vtkarray = dataobject.GetAttributes(attributeType).VTKObject.GetArray(name)
+    if vtkarray is None:
+        return True
+    return np.issubdtype(get_numpy_array_type(vtkarray.GetDataType()), np.integer)
+
+def _on_all_ranks(flag):
+    """Returns True if flag is True on all ranks. Must be called by all
+    ranks."""
+    from vtkmodules.vtkParallelCore import vtkMultiProcessController, vtkCommunicator
+    from vtkmodules.vtkCommonCore import vtkIntArray
+    controller = vtkMultiProcessController.GetGlobalController()
+    if controller is None or controller.GetNumberOfProcesses() < 2:
+        return flag
+    send = vtkIntArray()
+    send.InsertNextValue(1 if flag else 0)
+    recv = vtkIntArray()
+    controller.AllReduce(send, recv, vtkCommunicator.MIN_OP)
+    return recv.GetValue(0) == 1
+
+def _id_mask(dataobject, attributeType, name, intervals):
+    if dataobject.IsA("vtkCompositeDataSet"):
+        return dsa.VTKCompositeDataArray(
+            [_id_mask(ds, attributeType, name, intervals) for ds in dataobject])
+
+    vtkarray = dataobject.GetAttributes(attributeType).VTKObject.GetArray(name)
+    if vtkarray is None and name != "id":
+        return dsa.NoneArray
+    if vtkarray is not None and vtkarray.GetNumberOfComponents() != 1:
+        raise RuntimeError("Array '%s' has more than one component." % name)
+    nelements = dataobject.GetNumberOfElements(attributeType)
+    mask = np.zeros(nelements, dtype=np.int8)
+    if vtkarray is None:
+        # the ids are the element indices.
+        for low, high in intervals:
+            low, high = max(low, 0), min(high, nelements - 1)
+            if low <= high:
+                mask[low:high+1] = 1
+        return dsa.VTKArray(mask)
+
+    values = dsa.vtkDataArrayToVTKArray(vtkarray, dataobject)
+    order, svalues = _get_sorted_ids(vtkarray, values)
+    for low, high in intervals:
+        first = np.searchsorted(svalues, low, side="left")
+        last = np.searchsorted(svalues, high, side="right")
+        if order is None:
+            mask[first:last] = 1
+        else:
+            mask[order[first:last]] = 1
+    return dsa.VTKArray(mask)
+
 def maskarray_is_valid(maskArray):
     """Validates that the maskArray is either a VTKArray or a
     VTKCompositeDataArrays or a NoneArray other returns false."""
@@ -67,13 +326,22 @@ def execute(inputDO, selectionNode, insidednessArrayName, outputDO):
 
     query = selectionNode.GetQueryString()
 
+    idquery = parse_id_query(query)
+    if idquery is not None and \
+        _on_all_ranks(_has_integer_ids(inputs[0], attributeType, idquery[0])):
+        # look the selected ids up, this scales with the number of ids rather
+        # than the number of elements. All ranks must take the same path, as
+        # evaluating the query is collective (see calculator.get_arrays()).
+        maskArray = _id_mask(inputs[0], attributeType, *idquery)
+        _add_insidedness(maskArray, insidednessArrayName, attributeType, outputDO)
+        return
+
     # Get a dictionary for arrays in the dataset attributes. We pass that
     # as the variables in the eval namespace for calculator.compute().
     elocals = calculator.get_arrays(inputs[0].GetAttributes(attributeType))
     if ("id" not in elocals) and re.search(r'\bid\b', query):
-        # Add "id" array if the query string refers to id.
-        # This is a temporary fix. We should look into
-        # accelerating id-based selections in the future.
+        # Add "id" array if the query string refers to id. Queries that only
+        # select ids are handled by parse_id_query() above.
         elocals["id"] = _create_id_array(inputs[0], attributeType)
     try:
         maskArray = calculator.compute(inputs, query, ns=elocals)
@@ -92,6 +360,9 @@ def execute(inputDO, selectionNode, insidednessArrayName, outputDO):
             "expression. Verify that the expression is valid." % \
             (query, type(maskArray)))
 
+    _add_insidedness(maskArray, insidednessArrayName, attributeType, outputDO)
+
+def _add_insidedness(maskArray, insidednessArrayName, attributeType, outputDO):
     # Preserve topology. Just add the mask array as vtkSignedCharArray to the
     # output.
     # Note: we must force the data type to VTK_SIGNED_CHAR or the array will
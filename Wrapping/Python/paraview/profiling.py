@@ -0,0 +1,160 @@
+r"""
+Lightweight timing of the hot paths of paraview.servermanager and
+paraview.simple, to see how much time a script spends in ParaView's Python
+layer without running it under a profiler.
+
+Instrumented functions are decorated with :func:`instrument`, which only adds
+a flag check to each call while timing is disabled. Once enabled, the
+durations of the calls are aggregated per call site into a count, a total, a
+minimum, a maximum and a histogram with power of two buckets::
+
+    from paraview import profiling
+    profiling.enable()
+    ... # run the script
+    profiling.report(profiling.gather())
+
+Statistics gathered with :func:`get_stats` are plain dicts that can be saved
+with :func:`dump`, and combined with :func:`merge` or, across the ranks of an
+MPI run, :func:`gather`.
+"""
+#==============================================================================
+#
+#  Program:   ParaView
+#  Module:    profiling.py
+#
+#  Copyright (c) Kitware, Inc.
+#  All rights reserved.
+#  See Copyright.txt or http://www.paraview.org/HTML/Copyright.html for details.
+#
+#     This software is distributed WITHOUT ANY WARRANTY without even
+#     the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+#     PURPOSE.  See the above copyright notice for more information.
+#
+#==============================================================================
+from __future__ import absolute_import, print_function
+
+import functools
+import sys
+import timeit
+
+_enabled = False
+_clock = timeit.default_timer
+
+# call site -> [count, total, min, max, histogram]. Histogram bucket i counts
+# the calls that took less than 2**i microseconds, and at least 2**(i-1)
+# microseconds for i > 0.
+_sites = {}
+
+def instrument(site):
+    """Decorator timing the calls of a function as the given call site
+    whenever timing is enabled."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            start = _clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _record(site, _clock() - start)
+        return wrapper
+    return decorator
+
+def _record(site, seconds):
+    stats = _sites.get(site)
+    if stats is None:
+        stats = _sites[site] = [0, 0.0, seconds, seconds, []]
+    stats[0] += 1
+    stats[1] += seconds
+    if seconds < stats[2]:
+        stats[2] = seconds
+    if seconds > stats[3]:
+        stats[3] = seconds
+    bucket = int(seconds * 1e6).bit_length()
+    histogram = stats[4]
+    if bucket >= len(histogram):
+        histogram.extend([0] * (bucket + 1 - len(histogram)))
+    histogram[bucket] += 1
+
+def enable():
+    """Starts timing the instrumented functions."""
+    global _enabled
+    _enabled = True
+
+def disable():
+    """Stops timing the instrumented functions, the statistics are kept."""
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """Discards the statistics gathered so far."""
+    _sites.clear()
+
+def get_stats():
+    """Returns a dict of call site to a dict with the 'count', 'total', 'min'
+    and 'max' durations in seconds and the 'histogram' of the calls."""
+    return dict((site, {'count': s[0], 'total': s[1], 'min': s[2], 'max': s[3],
+                        'histogram': list(s[4])})
+                for site, s in _sites.items())
+
+def merge(statslist):
+    """Combines statistics returned by get_stats()."""
+    result = {}
+    for stats in statslist:
+        for site, s in stats.items():
+            r = result.get(site)
+            if r is None:
+                result[site] = dict(s, histogram=list(s['histogram']))
+                continue
+            r['count'] += s['count']
+            r['total'] += s['total']
+            r['min'] = min(r['min'], s['min'])
+            r['max'] = max(r['max'], s['max'])
+            histogram = r['histogram']
+            if len(s['histogram']) > len(histogram):
+                histogram.extend([0] * (len(s['histogram']) - len(histogram)))
+            for i, count in enumerate(s['histogram']):
+                histogram[i] += count
+    return result
+
+def gather(controller=None):
+    """Returns the statistics of all the ranks of an MPI run merged together
+    on all ranks, or the local statistics when not running in parallel. This
+    must be called on all ranks."""
+    from vtkmodules.vtkParallelCore import vtkMultiProcessController
+    if controller is None:
+        controller = vtkMultiProcessController.GetGlobalController()
+    stats = get_stats()
+    if controller and controller.IsA("vtkMPIController") and \
+        controller.GetNumberOfProcesses() > 1:
+        from vtkmodules.vtkParallelMPI4Py import vtkMPI4PyCommunicator
+        comm = vtkMPI4PyCommunicator.ConvertToPython(controller.GetCommunicator())
+        return merge(comm.allgather(stats))
+    return stats
+
+def report(stats=None, outfile=sys.stdout):
+    """Writes a table of the statistics, the local ones by default, slowest
+    call sites first."""
+    if stats is None:
+        stats = get_stats()
+    outfile.write('%-45s %8s %10s %10s %10s %10s\n' % (
+        'Call site', 'Calls', 'Total (s)', 'Mean (us)', 'Min (us)', 'Max (us)'))
+    for site, s in sorted(stats.items(), key=lambda item: -item[1]['total']):
+        outfile.write('%-45s %8d %10.4f %10.1f %10.1f %10.1f\n' % (
+            site, s['count'], s['total'], 1e6 * s['total'] / s['count'],
+            1e6 * s['min'], 1e6 * s['max']))
+        buckets = ['<%dus: %d' % (2**i, count)
+                   for i, count in enumerate(s['histogram']) if count]
+        outfile.write('    ' + ', '.join(buckets) + '\n')
+
+def dump(filename, stats=None):
+    """Saves the statistics, the local ones by default, to a JSON file."""
+    import json
+    if stats is None:
+        stats = get_stats()
+    with open(filename, 'w') as f:
+        json.dump(stats, f, indent=1, sort_keys=True)
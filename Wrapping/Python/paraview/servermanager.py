@@ -52,6 +52,7 @@ import paraview, re, os, os.path, types, sys
 # vtk modules.
 from paraview import vtk
 from paraview import _backwardscompatibilityhelper as _bc
+from paraview import profiling
 
 from paraview.modules.vtkPVVTKExtensionsCore import *
 from paraview.modules.vtkRemotingCore import *
@@ -89,7 +90,13 @@ def _wrap_property(proxy, smproperty):
     Given a server manager property and its domains, returns the
     appropriate python object.
     """
-    property = None
+    return _get_property_class(smproperty)(proxy, smproperty)
+
+def _get_property_class(smproperty):
+    """ Internal function.
+    Given a server manager property and its domains, returns the
+    python class used to wrap it.
+    """
     if paraview.compatibility.GetVersion() >= 3.5 and \
       smproperty.IsA("vtkSMStringVectorProperty"):
         arraySelectionDomain = smproperty.FindDomain("vtkSMArraySelectionDomain")
@@ -99,41 +106,40 @@ def _wrap_property(proxy, smproperty):
         fileListDomain = smproperty.FindDomain("vtkSMFileListDomain")
         stringListDomain = smproperty.FindDomain("vtkSMStringListDomain")
         if arraySelectionDomain and smproperty.GetRepeatable():
-            property = ArrayListProperty(proxy, smproperty)
+            return ArrayListProperty
         elif chartSeriesSelectionDomain and smproperty.GetRepeatable() and \
           chartSeriesSelectionDomain.GetDefaultMode() == 1:
-            property = ArrayListProperty(proxy, smproperty)
+            return ArrayListProperty
         elif subsetInclusionLatticeDomain and smproperty.GetRepeatable():
-            property = SubsetInclusionLatticeProperty(proxy, smproperty)
+            return SubsetInclusionLatticeProperty
         elif arrayListDomain and smproperty.GetRepeatable():
             # if it is repeatable, then it is not a single array selection... and if it happens
             # to have 5 elements in the repeatable proxy, avoid an exception by testing this case
             # first.
-            property = VectorProperty(proxy, smproperty)
+            return VectorProperty
         elif arrayListDomain and smproperty.GetNumberOfElements() == 5:
-            property = ArraySelectionProperty(proxy, smproperty)
+            return ArraySelectionProperty
         elif fileListDomain and fileListDomain.GetIsOptional() == 0:
             # Refer to BUG #9710 to see why optional domains need to be ignored.
-            property = FileNameProperty(proxy, smproperty)
+            return FileNameProperty
         elif stringListDomain:
-            property = StringListProperty(proxy, smproperty)
+            return StringListProperty
         else:
-            property = VectorProperty(proxy, smproperty)
+            return VectorProperty
     elif smproperty.IsA("vtkSMVectorProperty"):
         if smproperty.IsA("vtkSMIntVectorProperty") and \
           smproperty.FindDomain("vtkSMEnumerationDomain"):
-            property = EnumerationProperty(proxy, smproperty)
+            return EnumerationProperty
         else:
-            property = VectorProperty(proxy, smproperty)
+            return VectorProperty
     elif smproperty.IsA("vtkSMInputProperty"):
-        property = InputProperty(proxy, smproperty)
+        return InputProperty
     elif smproperty.IsA("vtkSMProxyProperty"):
-        property = ProxyProperty(proxy, smproperty)
+        return ProxyProperty
     elif smproperty.IsA("vtkSMDoubleMapProperty"):
-        property = DoubleMapProperty(proxy, smproperty)
+        return DoubleMapProperty
     else:
-        property = Property(proxy, smproperty)
-    return property
+        return Property
 
 class ParaViewPipelineController(object):
     """ParaViewPipelineController wraps vtkSMParaViewPipelineController class
@@ -253,6 +259,12 @@ class Proxy(object):
     of the ``vtkSMProxy`` C++ class.
     """
 
+    # Maps valid python names of property labels to the XML names of the
+    # properties. Set on the classes created by _createClass(). When None,
+    # GetProperty() searches the labels of all properties instead.
+    _PropertyLabelIndex = None
+
+    @profiling.instrument('servermanager.Proxy.__init__')
     def __init__(self, **args):
         """ Default constructor. It can be used to initialize properties
         by passing keyword arguments where the key is the name of the
@@ -262,7 +274,9 @@ class Proxy(object):
         self.add_attribute('Observed', None)
         self.add_attribute('ObserverTag', -1)
         self.add_attribute('_Proxy__Properties', {})
+        self.add_attribute('_Proxy__ResolvedProperties', {})
         self.add_attribute('_Proxy__LastAttrName', None)
+        self.add_attribute('_Proxy__TransactionDepth', 0)
         self.add_attribute('SMProxy', None)
         if 'port' in args:
             self.add_attribute('Port', args['port'])
@@ -292,8 +306,10 @@ class Proxy(object):
             pxm.RegisterProxy(registrationGroup, registrationName, self.SMProxy)
         if update:
             self.UpdateVTKObjects()
-        for key in args.keys():
-            setattr(self, key, args[key])
+        if args:
+            with self.PropertyTransaction():
+                for key in args.keys():
+                    setattr(self, key, args[key])
         # Visit all properties so that they are created
         for prop in self:
             pass
@@ -349,6 +365,38 @@ class Proxy(object):
         "Creates an iterator for the properties."
         return PropertyIterator(self)
 
+    def BeginPropertyTransaction(self):
+        """Starts deferring the pushes of property changes to the server
+        until the matching CommitPropertyTransaction(). Transactions can be
+        nested, the outermost commit pushes."""
+        self.add_attribute('_Proxy__TransactionDepth',
+                           self.__TransactionDepth + 1)
+
+    def CommitPropertyTransaction(self):
+        """Ends a transaction started with BeginPropertyTransaction(). When
+        this ends the outermost transaction, all the properties modified in
+        the meantime are pushed to the server at once."""
+        if self.__TransactionDepth <= 0:
+            raise RuntimeError("No property transaction in progress.")
+        self.add_attribute('_Proxy__TransactionDepth',
+                           self.__TransactionDepth - 1)
+        if self.__TransactionDepth == 0:
+            self.SMProxy.UpdateVTKObjects()
+
+    def IsInPropertyTransaction(self):
+        """Returns True while property pushes are being deferred."""
+        return self.__TransactionDepth > 0
+
+    def PropertyTransaction(self):
+        """Returns a context manager that batches property changes, so that
+        they are sent to the server in a single push when the block exits::
+
+            with proxy.PropertyTransaction():
+                proxy.Center = [1, 2, 3]
+                proxy.Radius = 3.5
+        """
+        return _PropertyTransaction(self)
+
     def SetPropertyWithName(self, pname, arg):
         """Generic method for setting the value of a property."""
         prop = self.GetProperty(pname)
@@ -389,22 +437,40 @@ class Proxy(object):
 
     def GetProperty(self, name):
         """Given a property name, returns the property object."""
-        if name in self.__Properties and self.__Properties[name]():
-            return self.__Properties[name]()
-        smproperty = self.SMProxy.GetProperty(name)
-        # Maybe they are looking by the label. Try to match that.
-        if not smproperty:
-            iter = PropertyIterator(self)
-            for prop in iter:
-                if name == _make_name_valid(iter.PropertyLabel):
-                    smproperty = prop.SMProperty
-                    break
-        if smproperty:
-            property = _wrap_property(self, smproperty)
-            if property is not None:
-                import weakref
-                self.__Properties[name] = weakref.ref(property)
+        ref = self.__Properties.get(name)
+        property = ref() if ref else None
+        if property is not None:
             return property
+        resolved = self.__ResolvedProperties.get(name)
+        if resolved is None:
+            smproperty = self.SMProxy.GetProperty(name)
+            # Maybe they are looking by the label. Try to match that.
+            if not smproperty:
+                smproperty = self.__FindPropertyByLabel(name)
+            if not smproperty:
+                return None
+            # The wrapper class depends on the property's domains only, so
+            # remember it along with the property. The wrappers themselves
+            # are only weakly referenced since they refer back to the proxy.
+            resolved = (smproperty, _get_property_class(smproperty))
+            self.__ResolvedProperties[name] = resolved
+        property = resolved[1](self, resolved[0])
+        import weakref
+        self.__Properties[name] = weakref.ref(property)
+        return property
+
+    def __FindPropertyByLabel(self, name):
+        """ Internal method.
+        Returns the SMProperty whose label, made a valid python name,
+        is `name`."""
+        index = self._PropertyLabelIndex
+        if index is not None:
+            xmlname = index.get(name)
+            return self.SMProxy.GetProperty(xmlname) if xmlname else None
+        iter = PropertyIterator(self.SMProxy)
+        for smproperty in iter:
+            if name == _make_name_valid(iter.PropertyLabel):
+                return smproperty
         return None
 
     def ListProperties(self):
@@ -528,6 +594,22 @@ class Proxy(object):
             pass
         return getattr(self.SMProxy, name)
 
+class _PropertyTransaction(object):
+    """Internal class. Context manager returned by
+    Proxy.PropertyTransaction()."""
+    def __init__(self, proxy):
+        self.Proxy = proxy
+
+    def __enter__(self):
+        self.Proxy.BeginPropertyTransaction()
+        return self.Proxy
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # commit even on errors, so that the server is in sync with the
+        # values that were set on the client
+        self.Proxy.CommitPropertyTransaction()
+        return False
+
 class SourceProxy(Proxy):
     """Proxy for a source object. This class adds a few methods to Proxy
     that are specific to sources. It also provides access to the output
@@ -536,6 +618,7 @@ class SourceProxy(Proxy):
     or
     > op = source['some name'].
     """
+    @profiling.instrument('servermanager.SourceProxy.UpdatePipeline')
     def UpdatePipeline(self, time=None):
         """This method updates the server-side VTK pipeline and the associated
         data information. Make sure to update a source to validate the output
@@ -636,6 +719,12 @@ class MultiplexerSourceProxy(SourceProxy):
         cdict = _createClassProperties(self, exclude)
         for key, val in cdict.items():
             self.add_attribute(key, val)
+        self.add_attribute('_PropertyLabelIndex',
+                           _createPropertyLabelIndex(self.SMProxy))
+        # Names may now refer to other properties. The dicts are cleared in
+        # place since the proxies of the other output ports share them.
+        self._Proxy__ResolvedProperties.clear()
+        self._Proxy__Properties.clear()
 
 class ViewLayoutProxy(Proxy):
     """Special class to define convenience methods for View Layout"""
@@ -748,6 +837,7 @@ class Property(object):
         "Returns the name of this property."
         return self.Proxy.GetPropertyName(self.SMProperty)
 
+    @profiling.instrument('servermanager.Property._UpdateProperty')
     def _UpdateProperty(self):
         "Pushes the value of this property to the server."
         # For now, we are updating all properties. This is due to an
@@ -757,7 +847,10 @@ class Property(object):
         # updated has the effect of pushing values set before Input
         # when Input is updated.
         # self.Proxy.SMProxy.UpdateProperty(self._FindPropertyName())
-        self.Proxy.SMProxy.UpdateVTKObjects()
+        # Within a property transaction the push is deferred until the
+        # transaction is committed.
+        if not self.Proxy.IsInPropertyTransaction():
+            self.Proxy.SMProxy.UpdateVTKObjects()
 
     def __getattr__(self, name):
         "Unknown attribute requests get forwarded to SMProperty."
@@ -987,9 +1080,12 @@ class FileNameProperty(VectorProperty):
     This property updates the pipeline information everytime its value changes.
     This is used to keep the array lists up to date."""
 
+    @profiling.instrument('servermanager.FileNameProperty._UpdateProperty')
     def _UpdateProperty(self):
         "Pushes the value of this property to the server."
-        VectorProperty._UpdateProperty(self)
+        # Not deferred by property transactions, the pipeline information
+        # must be up to date before any other property is set.
+        self.Proxy.SMProxy.UpdateVTKObjects()
         try:
             self.Proxy.FileNameChanged()
         except AttributeError:
@@ -1467,9 +1563,13 @@ class InputProperty(ProxyProperty):
                 self.SMProperty.AddInputConnection(value.SMProxy, value.Port)
         self._UpdateProperty()
 
+    @profiling.instrument('servermanager.InputProperty._UpdateProperty')
     def _UpdateProperty(self):
         "Pushes the value of this property to the server."
-        ProxyProperty._UpdateProperty(self)
+        # Not deferred by property transactions, the domains of the
+        # properties that depend on the input must be up to date before
+        # they are set.
+        self.Proxy.SMProxy.UpdateVTKObjects()
         iter = PropertyIterator(self.Proxy)
         for prop in iter:
             if isinstance(prop, ArraySelectionProperty):
@@ -1706,6 +1806,7 @@ def OutputPort(proxy, outputPort=0):
     newinstance = _getPyProxy(proxy.SMProxy, outputPort)
     newinstance.Port = outputPort
     newinstance._Proxy__Properties = proxy._Proxy__Properties
+    newinstance._Proxy__ResolvedProperties = proxy._Proxy__ResolvedProperties
     return newinstance
 
 class ProxyManager(object):
@@ -2378,6 +2479,7 @@ def LoadPlugin(filename,  remote=True, connection=None):
         # we should never have to call this. The modules should update automatically.
         updateModules(connection.Modules)
 
+@profiling.instrument('servermanager.Fetch')
 def Fetch(input, arg1=None, arg2=None, idx=0):
     """
     A convenience method that moves data from the server to the client,
@@ -2544,6 +2646,7 @@ def Finalize():
 
 # Internal methods
 
+@profiling.instrument('servermanager._getPyProxy')
 def _getPyProxy(smproxy, outputPort=0):
     """Returns a python wrapper for a server manager proxy. This method
     first checks if there is already such an object by looking in the
@@ -2756,6 +2859,17 @@ def _createClassProperties(proto, excludeset=frozenset()):
                                        propDoc)
     return cdict
 
+def _createPropertyLabelIndex(proto):
+    """Builds a dict mapping the valid python names of the labels of all
+    SMProperties on the `proto` proxy to the properties' XML names."""
+    index = {}
+    iter = PropertyIterator(proto)
+    for prop in iter:
+        label = _make_name_valid(iter.PropertyLabel)
+        if label and label not in index:
+            index[label] = iter.GetKey()
+    return index
+
 def _createClass(groupName, proxyName, apxm=None, prototype=None):
     """Defines a new class type for the proxy."""
     if prototype is None:
@@ -2776,6 +2890,10 @@ def _createClass(groupName, proxyName, apxm=None, prototype=None):
     # Create an Initialize() method for this sub-class.
     cdict['Initialize'] = _createInitialize(groupName, proxyName)
     cdict.update(_createClassProperties(proto))
+    if not proto.IsA("vtkSMMultiplexerSourceProxy"):
+        # multiplexers expose more properties as their input changes, they
+        # get an index per instance in UpdateDynamicProperties().
+        cdict['_PropertyLabelIndex'] = _createPropertyLabelIndex(proto)
 
     # Add the documentation as the class __doc__
     if proto.GetDocumentation() and \
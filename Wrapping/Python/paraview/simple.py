@@ -39,6 +39,7 @@ from __future__ import absolute_import, division, print_function
 
 import paraview
 from paraview import servermanager
+from paraview import profiling
 import paraview._backwardscompatibilityhelper
 
 # Bring OutputPort in our namespace.
@@ -288,6 +289,7 @@ def SetViewProperties(view=None, **params):
 
 # -----------------------------------------------------------------------------
 
+@profiling.instrument('simple.Render')
 def Render(view=None):
     """Renders the given view (default value is active view)"""
     if not view:
@@ -498,6 +500,7 @@ def GetDisplayProperties(proxy=None, view=None):
     return GetRepresentation(proxy, view)
 
 # -----------------------------------------------------------------------------
+@profiling.instrument('simple.Show')
 def Show(proxy=None, view=None, representationType=None, **params):
     """Turns the visibility of a given pipeline object on in the given view.
     If pipeline object and/or view are not specified, active objects are used."""
@@ -635,10 +638,10 @@ def SetProperties(proxy=None, **params):
     """
     if not proxy:
         proxy = active_objects.source
-    properties = proxy.ListProperties()
-    for param in params.keys():
-        pyproxy = servermanager._getPyProxy(proxy)
-        pyproxy.__setattr__(param, params[param])
+    pyproxy = servermanager._getPyProxy(proxy)
+    with pyproxy.PropertyTransaction():
+        for param in params.keys():
+            pyproxy.__setattr__(param, params[param])
 
 # -----------------------------------------------------------------------------
 
@@ -2333,7 +2336,8 @@ def _create_func(key, module, skipRegisteration=False):
               registrationName = params[nameParam]
               del params[nameParam]
 
-        # Pass all the named arguments as property,value pairs
+        # Pass all the named arguments as property,value pairs, pushed to
+        # the server at once by SetProperties.
         SetProperties(px, **params)
 
         # post initialize
@@ -40,81 +40,132 @@ class visible_representations(object):
             pass
         return True
 
-def __toposort(input_set):
+class PipelineGraph(object):
+    """Snapshot of the producer/consumer relationships between proxies. The
+    neighbours of a proxy are looked up, and wrapped as Python proxies, the
+    first time they are needed and reused afterwards, so that collecting,
+    sorting and tracing the proxies for a state visit each edge once."""
+    def __init__(self):
+        self.__pyproxies = {}
+        self.__consumers = {}
+        self.__producers = {}
+
+    def __wrap(self, smproxy):
+        smproxy = smproxy.GetTrueParentProxy() if smproxy else None
+        if not smproxy:
+            return None
+        try:
+            return self.__pyproxies[smproxy]
+        except KeyError:
+            pyproxy = sm._getPyProxy(smproxy)
+            if pyproxy and pyproxy.IsPrototype():
+                pyproxy = None
+            self.__pyproxies[smproxy] = pyproxy
+            return pyproxy
+
+    def consumers(self, proxy):
+        """Returns the list of proxies consuming `proxy`."""
+        try:
+            return self.__consumers[proxy]
+        except KeyError:
+            result = []
+            for i in xrange(proxy.GetNumberOfConsumers()):
+                consumer = self.__wrap(proxy.GetConsumerProxy(i))
+                if consumer and consumer not in result:
+                    result.append(consumer)
+            self.__consumers[proxy] = result
+            return result
+
+    def producers(self, proxy):
+        """Returns the list of proxies `proxy` depends on. These include the
+        lookup table and scalar opacity function it uses, if any."""
+        try:
+            return self.__producers[proxy]
+        except KeyError:
+            result = []
+            for i in xrange(proxy.GetNumberOfProducers()):
+                producer = self.__wrap(proxy.GetProducerProxy(i))
+                if producer and producer not in result:
+                    result.append(producer)
+            # FIXME: LookupTable is missed :/, darn subproxies!
+            for name in ("LookupTable", "ScalarOpacityFunction"):
+                try:
+                    function = getattr(proxy, name)
+                except AttributeError:
+                    continue
+                if function and function not in result:
+                    result.append(function)
+            self.__producers[proxy] = result
+            return result
+
+def __toposort(input_set, graph):
     """implementation of Tarjan topological sort to sort proxies using consumer
     dependencies as graph edges."""
     result = []
     marked_set = set()
-    while marked_set != input_set:
-        unmarked_node = (input_set - marked_set).pop()
-        __toposort_visit(result, unmarked_node, input_set, marked_set)
+    for proxy in input_set:
+        if proxy not in marked_set:
+            __toposort_visit(result, proxy, input_set, marked_set, graph)
     result.reverse()
     return result
 
-def __toposort_visit(result, proxy, input_set, marked_set, t_marked_set=None):
-    if t_marked_set is None:
-        temporarily_marked_set = set()
-    else:
-        temporarily_marked_set = t_marked_set
-    if proxy in temporarily_marked_set:
-        raise RuntimeError ("Cycle detected in pipeline! %r" % proxy)
-    if not proxy in marked_set:
-        temporarily_marked_set.add(proxy)
-        consumers = set()
-        get_consumers(proxy, lambda x: x in input_set, consumer_set=consumers, recursive=False)
-        for x in consumers:
-            __toposort_visit(result, x, input_set, marked_set, temporarily_marked_set)
-        marked_set.add(proxy)
-        temporarily_marked_set.discard(proxy)
-        result.append(proxy)
-
-def get_consumers(proxy, filter, consumer_set, recursive=True):
+def __toposort_visit(result, proxy, input_set, marked_set, graph):
+    # depth first traversal with an explicit stack, deep pipelines would
+    # exceed the recursion limit otherwise.
+    def consumers(x):
+        return iter([y for y in graph.consumers(x) if y in input_set])
+    temporarily_marked_set = set([proxy])
+    stack = [(proxy, consumers(proxy))]
+    while stack:
+        node, node_consumers = stack[-1]
+        for x in node_consumers:
+            if x in temporarily_marked_set:
+                raise RuntimeError ("Cycle detected in pipeline! %r" % x)
+            if x not in marked_set:
+                temporarily_marked_set.add(x)
+                stack.append((x, consumers(x)))
+                break
+        else:
+            stack.pop()
+            temporarily_marked_set.discard(node)
+            marked_set.add(node)
+            result.append(node)
+
+def get_consumers(proxy, filter, consumer_set, recursive=True, graph=None):
     """Returns the consumers for a proxy iteratively. If filter is non-None,
     filter is used to cull consumers."""
-    for i in xrange(proxy.GetNumberOfConsumers()):
-        consumer = proxy.GetConsumerProxy(i)
-        consumer = consumer.GetTrueParentProxy() if consumer else None
-        consumer = sm._getPyProxy(consumer)
-        if not consumer or consumer.IsPrototype() or consumer in consumer_set:
-            continue
-        if filter(consumer):
-            consumer_set.add(consumer)
-            if recursive: get_consumers(consumer, filter, consumer_set)
-
-def get_producers(proxy, filter, producer_set):
+    if graph is None:
+        graph = PipelineGraph()
+    stack = [proxy]
+    while stack:
+        for consumer in graph.consumers(stack.pop()):
+            if consumer in consumer_set:
+                continue
+            if filter(consumer):
+                consumer_set.add(consumer)
+                if recursive: stack.append(consumer)
+
+def get_producers(proxy, filter, producer_set, graph=None):
     """Returns the producers for a proxy iteratively. If filter is non-None,
     filter is used to cull producers."""
-    for i in xrange(proxy.GetNumberOfProducers()):
-        producer = proxy.GetProducerProxy(i)
-        producer = producer.GetTrueParentProxy() if producer else None
-        producer = sm._getPyProxy(producer)
-        if not producer or producer.IsPrototype() or producer in producer_set:
-            continue
-        if filter(producer):
-            producer_set.add(producer)
-            get_producers(producer, filter, producer_set)
-    # FIXME: LookupTable is missed :/, darn subproxies!
-    try:
-        if proxy.LookupTable and filter(proxy.LookupTable):
-            producer_set.add(proxy.LookupTable)
-            get_producers(proxy.LookupTable, filter, producer_set)
-    except AttributeError: pass
-    try:
-        if proxy.ScalarOpacityFunction and filter(proxy.ScalarOpacityFunction):
-            producer_set.add(proxy.ScalarOpacityFunction)
-            get_producers(proxy.ScalarOpacityFunction, filter, producer_set)
-    except AttributeError: pass
+    if graph is None:
+        graph = PipelineGraph()
+    stack = [proxy]
+    while stack:
+        for producer in graph.producers(stack.pop()):
+            if producer in producer_set:
+                continue
+            if filter(producer):
+                producer_set.add(producer)
+                stack.append(producer)
 
 def get_state(propertiesToTraceOnCreate=RECORD_MODIFIED_PROPERTIES,
     skipHiddenRepresentations=True, skipRenderingComponents=False, source_set=[], filter=None, raw=False):
     """Returns the state string"""
 
-    # essential to ensure any obsolete accessors don't linger - can cause havoc
-    # when saving state following a Python trace session
-    # (paraview/paraview#18994)
-    import gc
-    gc.collect()
-
+    # note: obsolete accessors from an earlier Python trace session, which can
+    # cause havoc here (paraview/paraview#18994), are already collected when
+    # that trace is stopped.
     if sm.vtkSMTrace.GetActiveTracer():
         raise RuntimeError ("Cannot generate Python state when tracing is active.")
 
@@ -130,13 +181,14 @@ def get_state(propertiesToTraceOnCreate=RECORD_MODIFIED_PROPERTIES,
     start_set = [x for x in start_set if filter(x)]
 
     # now, locate dependencies for the start_set, pruning irrelevant branches
+    graph = PipelineGraph()
     consumers = set(start_set)
     for proxy in start_set:
-        get_consumers(proxy, filter, consumers)
+        get_consumers(proxy, filter, consumers, graph=graph)
 
     producers = set()
     for proxy in consumers:
-        get_producers(proxy, filter, producers)
+        get_producers(proxy, filter, producers, graph=graph)
 
     # proxies_of_interest is set of all proxies that we should trace.
     proxies_of_interest = producers.union(consumers)
@@ -204,7 +256,7 @@ def get_state(propertiesToTraceOnCreate=RECORD_MODIFIED_PROPERTIES,
 
     #--------------------------------------------------------------------------
     # Next, trace data processing pipelines.
-    sorted_proxies_of_interest = __toposort(proxies_of_interest)
+    sorted_proxies_of_interest = __toposort(proxies_of_interest, graph)
     sorted_sources = [x for x in sorted_proxies_of_interest \
         if smtrace.Trace.get_registered_name(x, "sources")]
     if sorted_sources:
@@ -234,9 +286,11 @@ def get_state(propertiesToTraceOnCreate=RECORD_MODIFIED_PROPERTIES,
     # print ("sorted_representations", sorted_representations)
     # print ("scalarbar_representations", scalarbar_representations)
     if not skipRenderingComponents and (sorted_representations or scalarbar_representations):
+        representation_set = set(sorted_representations)
+        scalarbar_set = set(scalarbar_representations)
         for view in views:
-            view_representations = [x for x in view.Representations if x in sorted_representations]
-            view_scalarbars = [x for x in view.Representations if x in scalarbar_representations]
+            view_representations = [x for x in view.Representations if x in representation_set]
+            view_scalarbars = [x for x in view.Representations if x in scalarbar_set]
             if view_representations or view_scalarbars:
                 trace.append_separated([\
                     "# ----------------------------------------------------------------",
@@ -112,6 +112,10 @@ class TraceOutput:
 
 class Trace(object):
     __REGISTERED_ACCESSORS = {}
+    # number of registered accessors using each variable name.
+    __VARNAMES = {}
+    # next suffix to try for each suggested variable name.
+    __VARNAME_SUFFIXES = {}
 
     Output = None
 
@@ -119,6 +123,8 @@ class Trace(object):
     def reset(cls):
         """Resets the Output and clears all register accessors."""
         cls.__REGISTERED_ACCESSORS.clear()
+        cls.__VARNAMES.clear()
+        cls.__VARNAME_SUFFIXES.clear()
         cls.Output = TraceOutput()
 
     @classmethod
@@ -133,24 +139,52 @@ class Trace(object):
         find a good suffix that's available."""
         name = sm._make_name_valid(name)
         name = name[0].lower() + name[1:]
+        if name not in cls.__VARNAMES:
+            return name
         original_name = name
-        suffix = 1
-        # build a set of existing variable names
-        varnameset = set([accessor.Varname for accessor in cls.__REGISTERED_ACCESSORS.values()])
-        while name in varnameset:
-            name = "%s_%d" % (original_name, suffix)
+        # suffixes below the last one handed out for this name were taken
+        # already, start probing from there.
+        suffix = cls.__VARNAME_SUFFIXES.get(original_name, 1)
+        name = "%s_%d" % (original_name, suffix)
+        while name in cls.__VARNAMES:
             suffix += 1
+            name = "%s_%d" % (original_name, suffix)
+        cls.__VARNAME_SUFFIXES[original_name] = suffix + 1
         return name
 
+    @classmethod
+    def __add_varname(cls, varname):
+        cls.__VARNAMES[varname] = cls.__VARNAMES.get(varname, 0) + 1
+
+    @classmethod
+    def __remove_varname(cls, varname):
+        count = cls.__VARNAMES.get(varname, 0)
+        if count > 1:
+            cls.__VARNAMES[varname] = count - 1
+            return
+        cls.__VARNAMES.pop(varname, None)
+        # make the freed suffix available again, so that get_varname()
+        # still hands out the lowest free suffix.
+        base, sep, suffix = varname.rpartition("_")
+        if sep and suffix.isdigit() and \
+            int(suffix) < cls.__VARNAME_SUFFIXES.get(base, 1):
+            cls.__VARNAME_SUFFIXES[base] = int(suffix)
+
     @classmethod
     def register_accessor(cls, accessor):
         """Register an instance of an Accessor or subclass"""
-        cls.__REGISTERED_ACCESSORS[accessor.get_object()] = accessor
+        obj = accessor.get_object()
+        if obj in cls.__REGISTERED_ACCESSORS:
+            cls.__remove_varname(cls.__REGISTERED_ACCESSORS[obj].Varname)
+        cls.__REGISTERED_ACCESSORS[obj] = accessor
+        cls.__add_varname(accessor.Varname)
 
     @classmethod
     def unregister_accessor(cls, accessor):
-        if accessor.get_object() in cls.__REGISTERED_ACCESSORS:
-            del cls.__REGISTERED_ACCESSORS[accessor.get_object()]
+        obj = accessor.get_object()
+        if obj in cls.__REGISTERED_ACCESSORS:
+            cls.__remove_varname(cls.__REGISTERED_ACCESSORS[obj].Varname)
+            del cls.__REGISTERED_ACCESSORS[obj]
 
     @classmethod
     def get_accessor(cls, obj):
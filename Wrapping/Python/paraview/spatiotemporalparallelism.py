@@ -75,57 +75,156 @@ def WriteFiles(currentTimeStep, currentTime, writers):
         cnt = cnt + 1
     return cinemaLines
 
+def StaticTimeSteps(numTimeSteps, numTimeCompartments, timeCompartmentIndex):
+    "Returns the contiguous block of timestep indices of a time compartment"
+    tpp = numTimeSteps//numTimeCompartments
+    remainder = numTimeSteps%numTimeCompartments
+    myStartTimeStep = tpp*timeCompartmentIndex + min(timeCompartmentIndex, remainder)
+    myEndTimeStep = myStartTimeStep+tpp
+    if timeCompartmentIndex < remainder:
+        myEndTimeStep = myEndTimeStep+1
+    return range(myStartTimeStep, myEndTimeStep)
+
+def DynamicTimeSteps(comm, numTimeSteps, timeCompartmentSize):
+    """Generates the timestep indices a time compartment works on, one at a
+    time. The leader of each compartment takes the next unprocessed index
+    from a counter held by the coordinator (rank 0 of comm) and broadcasts it
+    to the rest of its compartment. The counter is updated with one sided
+    atomic operations so the coordinator keeps working on its own timesteps.
+
+    Many MPI implementations only complete one sided operations when the
+    target rank calls into MPI, which the coordinator does not do while it
+    renders. When MPI supports MPI_THREAD_MULTIPLE, a thread of the
+    coordinator polls MPI so that the other leaders are not held up.
+    Otherwise a leader may wait for the coordinator to finish its current
+    timestep, unless MPI provides asynchronous progress (e.g.
+    MPICH_ASYNC_PROGRESS=1 with MPICH). Must be called by all ranks of comm."""
+    import numpy
+    myGID = comm.Get_rank()
+    counter = numpy.zeros(1, dtype=numpy.int64)
+    window = MPI.Win.Create(counter, counter.itemsize, comm=comm)
+    compartment = comm.Split(myGID//timeCompartmentSize, myGID)
+    one = numpy.ones(1, dtype=numpy.int64)
+    step = numpy.zeros(1, dtype=numpy.int64)
+    progress = None
+    if myGID == 0 and MPI.Query_thread() == MPI.THREAD_MULTIPLE:
+        progress = ProgressThread()
+    try:
+        while True:
+            if compartment.Get_rank() == 0:
+                window.Lock(0, MPI.LOCK_SHARED)
+                window.Fetch_and_op(one, step, 0, 0, MPI.SUM)
+                window.Unlock(0)
+            compartment.Bcast(step, root=0)
+            if step[0] >= numTimeSteps:
+                break
+            yield int(step[0])
+    finally:
+        if progress:
+            progress.Stop()
+        compartment.Free()
+        window.Free()
+
+class ProgressThread(object):
+    """Thread calling into MPI periodically so that one sided operations
+    targeting this rank complete while it is busy otherwise. Requires
+    MPI_THREAD_MULTIPLE."""
+    def __init__(self, interval=0.001):
+        import threading
+        self.Done = threading.Event()
+        self.Thread = threading.Thread(target=self.Run, args=(interval,))
+        self.Thread.daemon = True
+        self.Thread.start()
+
+    def Run(self, interval):
+        while not self.Done.wait(interval):
+            MPI.COMM_SELF.Iprobe(source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG)
+
+    def Stop(self):
+        self.Done.set()
+        self.Thread.join()
+
+class CinemaTable(object):
+    """Cinema database index that rows are appended to as they are produced,
+    by any rank. The rows are sorted by timestep on closing, as they arrive
+    in no particular order. Opening and closing are collective over comm."""
+    def __init__(self, comm, filename="data.csv"):
+        self.Comm = comm
+        self.FileName = filename
+        self.File = MPI.File.Open(comm, filename, MPI.MODE_WRONLY | MPI.MODE_CREATE)
+        self.File.Set_size(0)
+        if comm.Get_rank() == 0:
+            self.Write(["timestep,producer,FILE\n"])
+        # make sure the header is written before any row
+        comm.Barrier()
+
+    def Write(self, lines):
+        if lines:
+            self.File.Write_shared(bytearray(''.join(lines).encode('utf-8')))
+
+    def Close(self):
+        self.File.Close()
+        if self.Comm.Get_rank() == 0:
+            with open(self.FileName, 'r') as f:
+                lines = f.readlines()
+            # stable, so the rows of a timestep keep their order
+            rows = sorted(lines[1:], key=lambda row: float(row.split(',', 1)[0]))
+            with open(self.FileName, 'w') as f:
+                f.writelines(lines[:1] + rows)
+        self.Comm.Barrier()
+
 def IterateOverTimeSteps(globalController, timeCompartmentSize, timeSteps, writers, views, make_cinema_table=False):
+    """Writes the images and files for all timesteps, each time compartment
+    handling a share of them. When mpi4py is available the timesteps are
+    handed out dynamically, as compartments finish their previous one, so
+    timesteps with very different costs are balanced. Returns a list of
+    (timestep index, seconds) for the timesteps this compartment processed."""
+    import time
     if make_cinema_table and not can_savecinema:
         print ("WARNING: Can not save cinema table because MPI4PY is not available.")
         make_cinema_table = False
 
     numProcs = globalController.GetNumberOfProcesses()
     numTimeCompartments = numProcs//timeCompartmentSize
-    tpp = len(timeSteps)/numTimeCompartments
-    remainder = len(timeSteps)%numTimeCompartments
-    timeCompartmentIndex = int(globalController.GetLocalProcessId()/timeCompartmentSize)
-    myStartTimeStep = tpp*timeCompartmentIndex
-    myEndTimeStep = myStartTimeStep+tpp
-    if timeCompartmentIndex < remainder:
-        myStartTimeStep = myStartTimeStep+timeCompartmentIndex
-        myEndTimeStep = myStartTimeStep+tpp+1
+    myGID = globalController.GetLocalProcessId()
+    timeCompartmentIndex = int(myGID/timeCompartmentSize)
+    # only one node per time compartment writes rows to the cinema table
+    isLeader = int(myGID) % int(timeCompartmentSize) == 0
+
+    comm = None
+    if can_savecinema and globalController.IsA('vtkMPIController'):
+        try:
+            from vtkmodules.vtkParallelMPI4Py import vtkMPI4PyCommunicator
+            comm = vtkMPI4PyCommunicator.ConvertToPython(globalController.GetCommunicator())
+        except ImportError:
+            pass
+    if make_cinema_table and comm is None:
+        print ("WARNING: Can not save cinema table because the controller can not be used with MPI4PY.")
+        make_cinema_table = False
+    if comm is not None and numTimeCompartments > 1:
+        myTimeSteps = DynamicTimeSteps(comm, len(timeSteps), timeCompartmentSize)
     else:
-        myStartTimeStep = myStartTimeStep+remainder
-        myEndTimeStep = myStartTimeStep+tpp
+        myTimeSteps = StaticTimeSteps(len(timeSteps), numTimeCompartments, timeCompartmentIndex)
 
-    myStartTimeStep = int(myStartTimeStep)
-    myEndTimeStep = int(myEndTimeStep)
-    cinemaLines = []
-    for currentTimeStep in range(myStartTimeStep,myEndTimeStep):
+    table = CinemaTable(comm) if make_cinema_table else None
+    timings = []
+    for currentTimeStep in myTimeSteps:
         #print (globalController.GetLocalProcessId(), " is working on ", currentTimeStep)
+        start = time.time()
+        cinemaLines = []
         ret = WriteImages(currentTimeStep, timeSteps[currentTimeStep], views)
         if ret:
             cinemaLines.extend(ret)
         ret = WriteFiles(currentTimeStep, timeSteps[currentTimeStep], writers)
         if ret:
             cinemaLines.extend(ret)
+        timings.append((currentTimeStep, time.time() - start))
+        if table and isLeader:
+            table.Write(cinemaLines)
 
-    if make_cinema_table:
-        # gather the file list from each time compartment to the root and save it
-        myGID = globalController.GetLocalProcessId()
-        myLID = int(myGID) % int(timeCompartmentSize)
-        mystring = ''
-        # only one node per time compartment should participate
-        if myLID == 0:
-            mystring = ''.join(x for x in cinemaLines)
-        mylen = len(mystring)
-        result = ''
-        comm = vtkMPI4PyCommunicator.ConvertToPython(globalController.GetCommunicator())
-        gathered_lines = comm.gather(mystring, root=0)
-        if myGID == 0:
-            # root writes the file, prepending header
-            f = open("data.csv", "w")
-            f.write("timestep,producer,FILE\n")
-            for x in gathered_lines:
-                if x:
-                    f.write(x)
-            f.close()
+    if table:
+        table.Close()
+    return timings
 
 def CreateReader(ctor, fileInfo, **kwargs):
     "Creates a reader, checks if it can be used, and sets the filenames"